@@ -0,0 +1,11 @@
+"""
+Benchmarks for the ``publisher`` package.
+=========================================
+
+Each module runs standalone from the repository root and prints a report:
+
+    python -m benchmarks.bench_publish
+
+They talk to ``publisher.local_broker`` on 127.0.0.1, never to
+io.adafruit.com, so they are safe to run without an account.
+"""
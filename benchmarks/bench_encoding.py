@@ -0,0 +1,75 @@
+"""
+Payload encoding benchmark.
+===========================
+
+Encodes a backlog of timestamped samples with every encoder in
+publisher.encoding and reports, per sample:
+
+    bytes      payload plus MQTT topic (or REST path) bytes on the wire
+    us         CPU time to encode
+    messages   MQTT messages or HTTP requests needed for the backlog
+
+Run it on the Pi itself: the CPU column is what matters on a Pi Zero.
+
+Usage:
+    python -m benchmarks.bench_encoding
+    python -m benchmarks.bench_encoding --samples 28800 --repeat 5
+"""
+
+import argparse
+import random
+import time
+
+from publisher.encoding import ENCODERS, MQTT, REST
+
+
+USERNAME = "student"
+FEEDS = ("temperature", "humidity")
+
+
+def make_backlog(count, start=1772366400.0, interval=3.0, seed=0):
+    """``count`` samples per feed, one every ``interval`` seconds."""
+    rng = random.Random(seed)
+    return {feed: [(start + i * interval, round(20 + rng.gauss(0, 2), 1)) for i in range(count)]
+            for feed in FEEDS}
+
+
+def envelope(transport, feed_id):
+    """Bytes sent next to each payload: the topic or the REST request path."""
+    if transport == MQTT:
+        return len(f"{USERNAME}/feeds/{feed_id}") + 4   # + fixed header and topic length
+    if transport == REST:
+        return len(f"POST /api/v2/{USERNAME}/feeds/{feed_id}/data/batch HTTP/1.1\r\n")
+    return 0
+
+
+def bench(encoder, backlog, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        messages = [m for feed, samples in backlog.items() for m in encoder.encode(feed, samples)]
+        best = min(best, time.perf_counter() - started)
+    size = sum(len(payload.encode()) + envelope(encoder.transport, feed_id)
+               for feed_id, payload in messages)
+    return size, best, len(messages)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, default=2 * 24 * 3600 // 3 // 2,
+                        help="samples per feed (default: one day at 3 s)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per encoder, best kept")
+    args = parser.parse_args(argv)
+
+    backlog = make_backlog(args.samples)
+    total = args.samples * len(FEEDS)
+    print(f"Encoding {total} samples ({len(FEEDS)} feeds)\n")
+    print(f"{'encoder':<8} {'transport':<10} {'bytes':>8} {'us':>8} {'messages':>9}")
+    for name, cls in ENCODERS.items():
+        size, elapsed, messages = bench(cls(), backlog, args.repeat)
+        print(f"{name:<8} {cls.transport:<10} {size / total:8.1f} {elapsed / total * 1e6:8.2f} "
+              f"{messages:>9}")
+
+
+if __name__ == "__main__":
+    main()
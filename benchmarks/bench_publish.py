@@ -0,0 +1,214 @@
+"""
+Publish throughput benchmark.
+=============================
+
+Measures, against a LocalBroker on the loopback interface:
+
+    msgs/s         publishes received by the broker per second
+    p50 / p99      latency from the publish call to the broker reading it
+    bytes/sample   memory held per buffered sample, per buffer design
+
+The AsyncPublisher is always measured, at QoS 0 and at QoS 1 both
+stop-and-wait (one publish in flight) and pipelined (``--inflight``);
+``--latency`` delays the broker's PUBACKs like a network round trip.
+``Adafruit_IO.MQTTClient`` is
+measured too when the library is installed. The REST batch path
+(publisher.rest) is measured against a LocalRestServer for comparison.
+
+Usage:
+    python -m benchmarks.bench_publish
+    python -m benchmarks.bench_publish --count 20000 --latency 0.002 --drop-rate 0.01
+    python -m benchmarks.bench_publish --latency 0.05 --inflight 64
+"""
+
+import argparse
+import asyncio
+import collections
+import functools
+import time
+import tracemalloc
+
+from publisher.async_engine import AsyncPublisher
+from publisher.local_broker import LocalBroker, LocalRestServer
+from publisher.rest import RestUploader
+from publisher.ring_buffer import RingBuffer
+
+
+FEED = "temperature"
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, broker, sent_at, elapsed):
+    """
+    Match each broker receive time to its send time through the sequence
+    number carried in the payload.
+    """
+    latencies = [received - sent_at[int(float(payload))]
+                 for received, _, payload in broker.messages]
+    rate = len(broker.messages) / elapsed if elapsed else float("nan")
+    print(f"{name:<24} {len(sent_at):>7} sent {len(broker.messages):>7} received "
+          f"{rate:>10.0f} msgs/s   p50 {percentile(latencies, 50) * 1e3:7.3f} ms   "
+          f"p99 {percentile(latencies, 99) * 1e3:7.3f} ms")
+
+
+async def wait_until(predicate, timeout):
+    deadline = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < deadline:
+        await asyncio.sleep(0.001)
+
+
+# ---------------------------------------------------------------------------
+# Publishers
+# ---------------------------------------------------------------------------
+def bench_async_engine(broker, port, count, qos=0, inflight=1):
+    async def scenario():
+        publisher = AsyncPublisher("student", "key", host="127.0.0.1", port=port, secure=False,
+                                   qos=qos, inflight=inflight)
+        await publisher.start()
+        await publisher.connected.wait()
+        sent_at = []
+        started = time.perf_counter()
+        for i in range(count):
+            sent_at.append(time.perf_counter())
+            await publisher.publish(FEED, i)
+        await wait_until(lambda: broker.received >= count, timeout=30)
+        if qos:
+            # Dropped publishes are never acked (they would be resent on reconnect)
+            await wait_until(lambda: not publisher.backlog(), timeout=1 + broker.latency)
+        else:
+            await publisher.drain()
+        elapsed = time.perf_counter() - started
+        await publisher.close()
+        return sent_at, elapsed
+
+    sent_at, elapsed = asyncio.run(scenario())
+    name = "AsyncPublisher QoS 0" if not qos else f"AsyncPublisher QoS 1 x{inflight}"
+    report(name, broker, sent_at, elapsed)
+
+
+def bench_adafruit_client(broker, port, count):
+    try:
+        from Adafruit_IO import MQTTClient
+    except ImportError:
+        print(f"{'Adafruit_IO.MQTTClient':<24} skipped (Adafruit_IO not installed)")
+        return
+
+    client = MQTTClient("student", "key", service_host="127.0.0.1", secure=False)
+    # Private attribute: MQTTClient() has no port argument and connect() reads this
+    client._service_port = port
+    client.connect()
+    client.loop_background()
+    deadline = time.perf_counter() + 5
+    while not client.is_connected() and time.perf_counter() < deadline:
+        time.sleep(0.001)
+
+    sent_at = []
+    started = time.perf_counter()
+    for i in range(count):
+        sent_at.append(time.perf_counter())
+        client.publish(FEED, i)
+    deadline = time.perf_counter() + 30
+    while broker.received < count and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    client.disconnect()
+    report("Adafruit_IO.MQTTClient", broker, sent_at, elapsed)
+
+
+def bench_rest(count, latency):
+    server = LocalRestServer(latency=latency)
+    url = server.start()
+    try:
+        with RestUploader("student", "key", base_url=url) as uploader:
+            samples = [(time.time(), float(i)) for i in range(count)]
+            started = time.perf_counter()
+            uploader.send_batch(FEED, samples)
+            elapsed = time.perf_counter() - started
+    finally:
+        server.stop()
+    print(f"{'RestUploader (batch)':<24} {count:>7} sent {len(server.points):>7} received "
+          f"{count / elapsed:>10.0f} msgs/s   {uploader.requests} requests over "
+          f"{uploader.connections} connection(s)")
+
+
+# ---------------------------------------------------------------------------
+# Buffer memory
+# ---------------------------------------------------------------------------
+def measure(build, count):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    buffer = build(count)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del buffer
+    return used / count
+
+
+def bench_buffer_memory(count):
+    def as_list(n):
+        # The README's data_buffer: one (feed, value) tuple per sample
+        return [(FEED, float(i) + 0.5) for i in range(n)]
+
+    def as_deque(n):
+        return collections.deque(((FEED, float(i) + 0.5) for i in range(n)), maxlen=n)
+
+    def as_ring(n):
+        ring = RingBuffer(n)
+        for i in range(n):
+            ring.append(FEED, float(i) + 0.5)
+        return ring
+
+    for name, build in (("list of tuples", as_list), ("deque(maxlen)", as_deque),
+                        ("RingBuffer", as_ring)):
+        print(f"{name:<24} {measure(build, count):7.1f} bytes/sample")
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=5000, help="publishes per client")
+    parser.add_argument("--latency", type=float, default=0.0, help="broker ack latency (s)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction of publishes dropped")
+    parser.add_argument("--rate-limit", type=int, default=None, help="broker publishes/min per user")
+    parser.add_argument("--inflight", type=int, default=32, help="QoS 1 publishes in flight")
+    parser.add_argument("--buffer-samples", type=int, default=57600, help="samples for the memory test")
+    args = parser.parse_args(argv)
+
+    print(f"Publishing {args.count} messages to a LocalBroker on 127.0.0.1\n")
+    benches = (
+        bench_async_engine,
+        functools.partial(bench_async_engine, qos=1, inflight=1),
+        functools.partial(bench_async_engine, qos=1, inflight=args.inflight),
+        bench_adafruit_client,
+    )
+    for bench in benches:
+        broker = LocalBroker(latency=args.latency, drop_rate=args.drop_rate,
+                             rate_limit=args.rate_limit, seed=0)
+        port = broker.start_in_thread()
+        try:
+            bench(broker, port, args.count)
+        finally:
+            broker.stop_thread()
+        if broker.dropped or broker.throttled:
+            print(f"{'':<24} broker dropped {broker.dropped}, throttled {broker.throttled}")
+    bench_rest(args.count, args.latency)
+
+    print(f"\nMemory for {args.buffer_samples} buffered samples\n")
+    bench_buffer_memory(args.buffer_samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Publisher startup benchmark.
+============================
+
+Starts fresh interpreters the way systemd does and measures the time from
+spawning the process to its ``READY=1`` notification (publisher.daemon),
+received on a private NOTIFY_SOCKET:
+
+    interpreter      ``python -c pass``, the floor
+    buffered         Daemon + BufferedPublisher + TokenBucket
+    async_engine     Daemon + AsyncPublisher (imports ssl and asyncio)
+    Adafruit_IO      Daemon + ``from Adafruit_IO import MQTTClient`` (if installed)
+
+The median of ``--runs`` starts is compared to ``--budget``; the exit status
+is 1 if a daemon scenario is over budget, so this can run in CI or on the
+Pi after a dependency upgrade. ``--imports`` lists the slowest imports of a
+scenario (``python -X importtime``).
+
+Usage:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 20 --budget 1.0 --imports buffered
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from publisher.daemon import DEFAULT_BUDGET
+
+
+READY_TIMEOUT = 30
+
+_DAEMON = "from publisher.daemon import Daemon\nd = Daemon(handle_signals=False)\n"
+
+SCENARIOS = {
+    "interpreter": None,
+    "buffered": _DAEMON + (
+        "import types\n"
+        "from publisher.buffered import BufferedPublisher\n"
+        "from publisher.rate_limit import TokenBucket\n"
+        "BufferedPublisher(types.SimpleNamespace(), bucket=TokenBucket.for_tier('free'))\n"
+        "d.ready()\n"),
+    "async_engine": _DAEMON + (
+        "from publisher.async_engine import AsyncPublisher\n"
+        "AsyncPublisher('student', 'key')\n"
+        "d.ready()\n"),
+    "Adafruit_IO": _DAEMON + (
+        "from Adafruit_IO import MQTTClient\n"
+        "MQTTClient('student', 'key')\n"
+        "d.ready()\n"),
+}
+
+
+def has_adafruit_io():
+    result = subprocess.run([sys.executable, "-c", "import Adafruit_IO"], capture_output=True)
+    return result.returncode == 0
+
+
+def start_once(code, notify_path, listener):
+    """Seconds from spawn to READY=1 (to exit for the bare interpreter)."""
+    env = dict(os.environ, NOTIFY_SOCKET=notify_path, PYTHONDONTWRITEBYTECODE="1")
+    started = time.perf_counter()
+    if code is None:
+        subprocess.run([sys.executable, "-c", "pass"], env=env, check=True)
+        return time.perf_counter() - started
+    process = subprocess.Popen([sys.executable, "-c", code], env=env)
+    try:
+        while True:
+            data = listener.recv(4096)
+            if b"READY=1" in data.split(b"\n"):
+                return time.perf_counter() - started
+    finally:
+        process.wait()
+
+
+def slowest_imports(code, count=10):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code or "pass"],
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10, help="starts per scenario")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="seconds to READY=1")
+    parser.add_argument("--imports", choices=sorted(SCENARIOS), help="list a scenario's slowest imports")
+    args = parser.parse_args(argv)
+
+    scenarios = dict(SCENARIOS)
+    if not has_adafruit_io():
+        del scenarios["Adafruit_IO"]
+
+    over = False
+    with tempfile.TemporaryDirectory() as tmp:
+        notify_path = os.path.join(tmp, "notify")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as listener:
+            listener.bind(notify_path)
+            listener.settimeout(READY_TIMEOUT)
+            print(f"Time to READY=1 over {args.runs} starts (budget {args.budget:g} s)\n")
+            for name, code in scenarios.items():
+                times = [start_once(code, notify_path, listener) for _ in range(args.runs)]
+                median = statistics.median(times)
+                verdict = ""
+                if code is not None:
+                    verdict = "ok" if median <= args.budget else "OVER BUDGET"
+                    over = over or median > args.budget
+                print(f"{name:<14} median {median * 1e3:8.1f} ms   max {max(times) * 1e3:8.1f} ms   "
+                      f"{verdict}".rstrip())
+            if "Adafruit_IO" not in scenarios:
+                print(f"{'Adafruit_IO':<14} skipped (Adafruit_IO not installed)")
+
+    if args.imports:
+        print(f"\nSlowest imports ({args.imports}, cumulative)\n")
+        for micros, name in slowest_imports(scenarios.get(args.imports)):
+            print(f"{micros / 1e3:8.1f} ms  {name}")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""
+Bulk grading of student submissions
+===================================
+
+The classroom workflow runs pytest once per milestone in every fork. To grade
+a whole cohort locally, clone the forks side by side and run:
+
+    python grade_cohort.py submissions/ --json scores.json --csv scores.csv
+
+Every subdirectory of ``submissions/`` is one student's repository. The
+milestone suites (tests/test_milestone_0*.py) are imported once per worker
+process and their test functions are called directly with ``REPO_ROOT``
+pointed at each submission: no pytest start-up, collection or subprocess per
+repository. Workers share nothing, but each keeps its script_analysis cache,
+so all the tests of a submission parse its script once and identical scripts
+(the starter code, copies) are parsed once per worker.
+
+The API key check (secret_scan) caches its results in each fork's git
+directory: grading writes ``.git/secret_scan_cache.json`` into every
+submission that is a git repository, and a later run only reads the blobs
+added since. The file is never committed or pushed.
+
+Scoring follows the workflow: a milestone passes when none of its tests fails
+(skips do not fail it) and then earns the points in its module docstring
+(25, 35 and 40). The ``# Test x.y: ... (N points)`` banners only break the
+table down: each passed test lists the points of its banner.
+
+Usage:
+    python grade_cohort.py submissions/
+    python grade_cohort.py submissions/ --jobs 8 --json scores.json --csv scores.csv
+"""
+
+import argparse
+import csv
+import importlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+
+SUITES = {
+    1: "tests.test_milestone_01",
+    2: "tests.test_milestone_02",
+    3: "tests.test_milestone_03",
+}
+
+PASSED, FAILED, SKIPPED = "passed", "failed", "skipped"
+
+_BANNER = re.compile(r"^# Test [\d.]+: .*\((\d+) points?\)\n(?:#.*\n)*def (test_\w+)", re.MULTILINE)
+_MILESTONE_POINTS = re.compile(r"\((\d+) points?\)")
+
+
+# ---------------------------------------------------------------------------
+# Suites
+# ---------------------------------------------------------------------------
+class Suite:
+    """One milestone module: every test in file order and its banner points."""
+
+    def __init__(self, number, module_name):
+        self.number = number
+        self.module = importlib.import_module(module_name)
+        source = Path(self.module.__file__).read_text()
+        points = {name: int(value) for value, name in _BANNER.findall(source)}
+        # Every test counts for the milestone, bannered or not, as under pytest
+        tests = [(fn.__code__.co_firstlineno, name, fn) for name, fn in vars(self.module).items()
+                 if name.startswith("test_") and callable(fn)]
+        self.tests = [(name, fn, points.get(name, 0)) for _, name, fn in sorted(tests)]
+        self.points = int(_MILESTONE_POINTS.search(self.module.__doc__).group(1))
+
+    def run(self, repo):
+        """``{test: (outcome, message)}`` for the submission at ``repo``."""
+        own_root, self.module.REPO_ROOT = self.module.REPO_ROOT, Path(repo)
+        results = {}
+        try:
+            for name, test, _ in self.tests:
+                results[name] = _run(test)
+        finally:
+            self.module.REPO_ROOT = own_root
+        return results
+
+
+def _run(test):
+    try:
+        test()
+    except pytest.skip.Exception as exc:
+        return SKIPPED, str(exc.msg)
+    except (AssertionError, pytest.fail.Exception) as exc:
+        return FAILED, _first_line(exc)
+    except Exception as exc:
+        # A crash in a check is a failure of that test, not of the run
+        return FAILED, f"{type(exc).__name__}: {exc}"
+    return PASSED, ""
+
+
+def _first_line(exc):
+    message = getattr(exc, "msg", None) or str(exc)
+    lines = [line.strip() for line in message.splitlines() if line.strip()]
+    return lines[0] if lines else type(exc).__name__
+
+
+_suites = None
+
+
+def _load_suites():
+    global _suites
+    if _suites is None:
+        _suites = [Suite(number, name) for number, name in SUITES.items()]
+    return _suites
+
+
+# ---------------------------------------------------------------------------
+# Grading
+# ---------------------------------------------------------------------------
+def grade_repo(repo):
+    """Score one submission: a row of the score table."""
+    started = time.perf_counter()
+    row = {"repo": os.path.basename(os.path.normpath(repo)), "score": 0, "milestones": {},
+           "tests": {}}
+    for suite in _load_suites():
+        results = suite.run(repo)
+        passed = all(outcome != FAILED for outcome, _ in results.values())
+        row["milestones"][suite.number] = passed
+        row["score"] += suite.points if passed else 0
+        for name, test, points in suite.tests:
+            outcome, message = results[name]
+            row["tests"][name] = {"outcome": outcome, "points": points if outcome == PASSED else 0,
+                                  "message": message}
+    row["seconds"] = time.perf_counter() - started
+    return row
+
+
+def find_submissions(root):
+    """Subdirectories of ``root``, sorted, hidden ones excepted."""
+    return sorted(entry.path for entry in os.scandir(root)
+                  if entry.is_dir() and not entry.name.startswith("."))
+
+
+def grade(repos, jobs=None):
+    """
+    Grade ``repos`` over ``jobs`` worker processes (one per CPU by default;
+    ``jobs=1`` grades in this process). Rows are returned in ``repos`` order.
+    """
+    repos = list(repos)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(repos) < 2:
+        return [grade_repo(repo) for repo in repos]
+    jobs = min(jobs, len(repos))
+    # Large chunks: a repository takes well under a millisecond to grade
+    chunksize = max(1, len(repos) // (jobs * 4))
+    with ProcessPoolExecutor(jobs, initializer=_load_suites) as pool:
+        return list(pool.map(grade_repo, repos, chunksize=chunksize))
+
+
+def max_score():
+    return sum(suite.points for suite in _load_suites())
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+def write_json(rows, path):
+    with open(path, "w") as f:
+        json.dump({"max_score": max_score(), "submissions": rows}, f, indent=2)
+
+
+def write_csv(rows, path):
+    fields = ["repo", "score"] + [f"milestone_{n}" for n in SUITES] + ["seconds", "failed"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(dict(
+                repo=row["repo"],
+                score=row["score"],
+                seconds=f"{row['seconds']:.4f}",
+                failed=" ".join(name for name, test in row["tests"].items()
+                                if test["outcome"] == FAILED),
+                **{f"milestone_{n}": "PASS" if ok else "FAIL"
+                   for n, ok in row["milestones"].items()},
+            ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("root", help="directory holding one checked-out repository per student")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPUs)")
+    parser.add_argument("--json", metavar="PATH", help="write the full score table as JSON")
+    parser.add_argument("--csv", metavar="PATH", help="write one line per submission as CSV")
+    args = parser.parse_args(argv)
+
+    repos = find_submissions(args.root)
+    started = time.perf_counter()
+    rows = grade(repos, jobs=args.jobs)
+    elapsed = time.perf_counter() - started
+
+    total = max_score()
+    print(f"{'Submission':<30} {'Score':>9}  M1   M2   M3")
+    for row in rows:
+        milestones = " ".join("PASS" if ok else "FAIL" for ok in row["milestones"].values())
+        print(f"{row['repo']:<30} {row['score']:>4}/{total:<4}  {milestones}")
+    print(f"\n{len(rows)} submissions graded in {elapsed:.2f} s")
+
+    if args.json:
+        write_json(rows, args.json)
+    if args.csv:
+        write_csv(rows, args.csv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
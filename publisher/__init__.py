@@ -0,0 +1,31 @@
+"""
+Building blocks for a robust Adafruit IO publisher.
+===================================================
+
+The reference ``mqtt_publisher.py`` in README.md keeps everything in a
+handful of module-level globals. The modules in this package replace those
+pieces one at a time, so a script can adopt only what it needs:
+
+    ring_buffer   Fixed-capacity offline buffer with an overflow policy
+    outbox        Disk-backed segment log that survives restarts
+    rate_limit    Token bucket sized for the Adafruit IO account tiers
+    interval      Adaptive per-feed publish intervals from quota, backlog, volatility
+    deadband      Per-feed change filter (deadband, heartbeat, swinging door)
+    windows       numpy sampling windows with outlier rejection (needs numpy)
+    aggregate     Per-feed window reduction of the backlog before publishing
+    spsc          Lock-free single-producer/single-consumer hand-off queue
+    encoding      Payload encoders: value, JSON with created_at, REST batch, CSV
+    rest          Keep-alive REST batch uploader for large backlogs
+    feeds         Cached feed-key registry: names to keys, typos rejected locally
+    buffered      publish_or_buffer() / flush_buffer() around an MQTTClient
+    reconnect     Timer-driven reconnect supervisor with jittered backoff
+    mqtt_packets  Minimal MQTT 3.1.1 packet codec (stdlib only)
+    async_engine  Single-threaded asyncio publisher with backpressure
+    daemon        systemd readiness, startup budget, reload over a control socket
+    metrics       Prometheus counters / histograms, text file or HTTP export
+    gateway       UDP / Unix-socket fan-in of a fleet onto one connection
+    local_broker  Loopback MQTT broker and REST stand-ins for tests and benchmarks
+
+Nothing is re-exported here on purpose: importing ``publisher`` must stay
+cheap on a Pi Zero, so each module is imported explicitly where it is used.
+"""
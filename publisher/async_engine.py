@@ -0,0 +1,291 @@
+"""
+Asyncio publisher engine.
+=========================
+
+The README design runs paho's network loop in a thread (``loop_background()``)
+while the main thread sleeps between readings, and both threads share
+``is_connected`` and ``data_buffer`` without a lock: ``connected()`` can
+flush the buffer while ``publish_or_buffer()`` appends to it.
+
+AsyncPublisher drives the MQTT socket from the asyncio event loop instead.
+Sensor reads, publishing, keepalive and reconnection are tasks on one thread,
+so there is no shared state to race on. ``await publish()`` applies
+backpressure: it waits while the send queue is full (e.g. during an outage).
+
+With ``qos=1`` a sample is only released when the broker's PUBACK for it
+arrives, so a link that dies mid-flush loses nothing. Up to ``inflight``
+publishes are kept unacknowledged at once (pipelined, not stop-and-wait);
+after a reconnect the unacknowledged ones are sent again, in order, with the
+DUP flag, before anything new. Delivery is at-least-once: a sample whose
+PUBACK was lost is stored twice.
+
+Usage:
+    async def main():
+        publisher = AsyncPublisher(ADAFRUIT_IO_USERNAME, ADAFRUIT_IO_KEY)
+        await publisher.start()
+        publisher.add_sensor(read_dht, ('temperature', 'humidity'), interval=3)
+        await publisher.wait_closed()
+
+    asyncio.run(main())
+"""
+
+import asyncio
+import inspect
+import os
+import ssl
+from collections import OrderedDict
+
+from publisher import mqtt_packets as mqtt
+from publisher.reconnect import full_jitter, MIN_DELAY, MAX_DELAY
+
+
+ADAFRUIT_IO_HOST = "io.adafruit.com"
+SECURE_PORT = 8883
+INSECURE_PORT = 1883
+
+DEFAULT_KEEPALIVE = 60
+DEFAULT_QUEUE_SIZE = 1000
+CONNECT_TIMEOUT = 10
+# Unacknowledged QoS 1 publishes; 32 hides a 300 ms round trip at 100 msgs/s
+DEFAULT_INFLIGHT = 32
+MAX_PACKET_ID = 0xFFFF
+
+
+class MQTTConnectError(ConnectionError):
+    """The broker refused the connection (CONNACK return code != 0)."""
+
+
+class AsyncPublisher:
+    """Single-threaded MQTT publisher for Adafruit IO running on asyncio."""
+
+    def __init__(self, username, key, host=ADAFRUIT_IO_HOST, port=None, secure=True,
+                 keepalive=DEFAULT_KEEPALIVE, queue_size=DEFAULT_QUEUE_SIZE, bucket=None,
+                 client_id=None, min_delay=MIN_DELAY, max_delay=MAX_DELAY, qos=0,
+                 inflight=DEFAULT_INFLIGHT):
+        if qos not in (0, 1):
+            raise ValueError(f"qos must be 0 or 1, got {qos}")
+        if not 1 <= inflight <= MAX_PACKET_ID:
+            raise ValueError(f"inflight must be between 1 and {MAX_PACKET_ID}, got {inflight}")
+        self.username = username
+        self.key = key
+        self.host = host
+        self.secure = secure
+        self.port = port if port is not None else (SECURE_PORT if secure else INSECURE_PORT)
+        self.keepalive = keepalive
+        self.queue_size = queue_size
+        self.bucket = bucket
+        self.client_id = client_id or f"f5-{os.getpid()}-{os.urandom(3).hex()}"
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.qos = qos
+        self.inflight = inflight
+
+        # Created in start() so they bind to the running loop
+        self.connected = None
+        self._queue = None
+        self._closed = None
+        self._window_open = None
+
+        self._run_task = None
+        self._sensor_tasks = []
+        self._writer = None
+        self._pending = None  # sample taken from the queue but not written yet
+        self._unacked = OrderedDict()  # packet id -> (feed, value), QoS 1 only
+        self._next_id = 0
+        self._last_rx = 0.0
+
+        # Counters
+        self.published = 0
+        self.acked = 0
+        self.retransmitted = 0
+        self.connects = 0
+        self.last_error = None
+
+    # -- Lifecycle ---------------------------------------------------------
+    async def start(self):
+        """Start the connection task. Returns immediately."""
+        self.connected = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._queue = asyncio.Queue(self.queue_size)
+        self._window_open = asyncio.Event()
+        self._run_task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop sensors, disconnect cleanly and stop the connection task."""
+        for task in self._sensor_tasks:
+            task.cancel()
+        if self._writer is not None and self.connected.is_set():
+            try:
+                self._writer.write(mqtt.disconnect())
+                await self._writer.drain()
+            except OSError:
+                pass
+        if self._run_task is not None:
+            self._run_task.cancel()
+            await asyncio.gather(self._run_task, *self._sensor_tasks, return_exceptions=True)
+        self._closed.set()
+
+    async def wait_closed(self):
+        await self._closed.wait()
+
+    # -- Publishing --------------------------------------------------------
+    def topic(self, feed):
+        return f"{self.username}/feeds/{feed}"
+
+    async def publish(self, feed, value):
+        """Queue a sample for publishing, waiting while the queue is full."""
+        await self._queue.put((feed, value))
+
+    async def drain(self):
+        """
+        Wait until every queued sample has been written to the socket (QoS 0)
+        or acknowledged by the broker (QoS 1).
+        """
+        await self._queue.join()
+
+    def backlog(self):
+        return self._queue.qsize() + (self._pending is not None) + len(self._unacked)
+
+    def unacked(self):
+        """QoS 1 publishes sent and waiting for their PUBACK."""
+        return len(self._unacked)
+
+    # -- Sensors -----------------------------------------------------------
+    def add_sensor(self, read, feeds, interval):
+        """
+        Sample ``read()`` every ``interval`` seconds and publish one value per
+        feed. ``read`` may be a plain function or a coroutine function and
+        returns a value for each of ``feeds``, in order.
+        """
+        task = asyncio.create_task(self._sample(read, tuple(feeds), interval))
+        self._sensor_tasks.append(task)
+        return task
+
+    async def _sample(self, read, feeds, interval):
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+        while True:
+            values = read()
+            if inspect.isawaitable(values):
+                values = await values
+            if len(feeds) == 1:
+                values = (values,)
+            for feed, value in zip(feeds, values):
+                await self.publish(feed, value)
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+
+    # -- Connection --------------------------------------------------------
+    async def _run(self):
+        attempt = 0
+        while True:
+            try:
+                await self._session()
+            except (OSError, EOFError, asyncio.TimeoutError, mqtt.MQTTProtocolError) as e:
+                self.last_error = e
+            if self.connected.is_set():
+                # The session was up: start the backoff over
+                attempt = 0
+            self.connected.clear()
+            attempt += 1
+            await asyncio.sleep(full_jitter(attempt, self.min_delay, self.max_delay))
+
+    async def _session(self):
+        context = ssl.create_default_context() if self.secure else None
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=context), CONNECT_TIMEOUT)
+        self._writer = writer
+        try:
+            writer.write(mqtt.connect(self.client_id, self.username, self.key, self.keepalive))
+            await writer.drain()
+            packet_type, _, body = await asyncio.wait_for(mqtt.read_packet(reader), CONNECT_TIMEOUT)
+            if packet_type != mqtt.CONNACK:
+                raise mqtt.MQTTProtocolError(f"Expected CONNACK, got packet type {packet_type}")
+            _, return_code = mqtt.parse_connack(body)
+            if return_code != mqtt.CONNACK_ACCEPTED:
+                raise MQTTConnectError(mqtt.CONNACK_REASONS.get(return_code, f"code {return_code}"))
+
+            self.connects += 1
+            self.connected.set()
+            await self._retransmit(writer)
+            await self._until_first_failure(
+                self._send_loop(writer), self._read_loop(reader), self._ping_loop(writer))
+        finally:
+            self._writer = None
+            writer.close()
+
+    @staticmethod
+    async def _until_first_failure(*coroutines):
+        tasks = [asyncio.create_task(c) for c in coroutines]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in done:
+            task.result()
+        raise EOFError("Connection closed")
+
+    async def _send_loop(self, writer):
+        while True:
+            if self._pending is None:
+                self._pending = await self._queue.get()
+            if len(self._unacked) >= self.inflight:
+                self._window_open.clear()
+                await self._window_open.wait()
+                continue
+            if self.bucket is not None and not self.bucket.try_acquire():
+                await asyncio.sleep(self.bucket.wait_time())
+                continue
+            feed, value = self._pending
+            if self.qos:
+                # Owned by the in-flight window from here on, even if the write fails
+                packet_id = self._packet_id()
+                self._unacked[packet_id] = self._pending
+                self._pending = None
+                writer.write(mqtt.publish(self.topic(feed), str(value), 1, packet_id))
+            else:
+                writer.write(mqtt.publish(self.topic(feed), str(value)))
+                self._pending = None
+                self._queue.task_done()
+            self.published += 1
+            await writer.drain()
+
+    async def _retransmit(self, writer):
+        """Send the publishes left unacknowledged by the previous session."""
+        for packet_id, (feed, value) in self._unacked.items():
+            writer.write(mqtt.publish(self.topic(feed), str(value), 1, packet_id, dup=True))
+            self.retransmitted += 1
+        await writer.drain()
+
+    def _packet_id(self):
+        while True:
+            self._next_id = self._next_id % MAX_PACKET_ID + 1
+            if self._next_id not in self._unacked:
+                return self._next_id
+
+    def _on_puback(self, packet_id):
+        if self._unacked.pop(packet_id, None) is None:
+            return  # Duplicate PUBACK for a retransmitted publish
+        self.acked += 1
+        self._queue.task_done()
+        self._window_open.set()
+
+    async def _read_loop(self, reader):
+        loop = asyncio.get_running_loop()
+        while True:
+            packet_type, _, body = await mqtt.read_packet(reader)
+            self._last_rx = loop.time()
+            if packet_type == mqtt.PUBACK:
+                self._on_puback(mqtt.parse_packet_id(body))
+
+    async def _ping_loop(self, writer):
+        loop = asyncio.get_running_loop()
+        self._last_rx = loop.time()
+        while True:
+            await asyncio.sleep(self.keepalive / 2)
+            if loop.time() - self._last_rx > self.keepalive * 1.5:
+                raise asyncio.TimeoutError("No traffic from broker within keepalive")
+            writer.write(mqtt.pingreq())
+            await writer.drain()
@@ -0,0 +1,324 @@
+"""
+Publish-or-buffer wrapper around an Adafruit IO MQTT client.
+============================================================
+
+Packages the ``connected()`` / ``disconnected()`` / ``publish_or_buffer()`` /
+``flush_buffer()`` functions of the README design into one object, with the
+unbounded ``data_buffer`` list replaced by a RingBuffer. Pass
+``buffer=Outbox(path)`` instead to keep the backlog across restarts: any
+object with ``append()``, ``peek()``, ``popleft()``, ``head()``,
+``head_stamped()``, ``discard()`` and ``__len__()`` works.
+
+Usage:
+    from Adafruit_IO import MQTTClient
+    from publisher.buffered import BufferedPublisher
+
+    client = MQTTClient(ADAFRUIT_IO_USERNAME, ADAFRUIT_IO_KEY)
+    publisher = BufferedPublisher(client)
+    client.connect()
+    client.loop_background()
+
+    publisher.publish_or_buffer('temperature', 22.5)
+
+With a ``bucket`` (see publisher.rate_limit) publishing never exceeds the
+account quota: live samples get tokens first, the backlog drains with what is
+left, and ``flush_buffer()`` must be called periodically (e.g. from the main
+loop) to keep draining after a reconnect.
+
+With an ``encoder`` (see publisher.encoding) each sample is published as
+the encoder's payload, e.g. ``encoder=JSONEncoder()`` for ``{feed}/json``
+messages.
+
+Buffered samples keep the time they were taken. With
+``backfill=JSONEncoder()`` the backlog is published with ``created_at`` so
+an outage shows up on the dashboard at its real time instead of as a spike
+at the reconnect time; without it, Adafruit IO stamps each value on arrival.
+
+With a ``rest`` uploader (see publisher.rest) the backlog is posted in
+batches over HTTPS while MQTT is down, or while it holds more than
+``rest_threshold`` samples. REST is not charged to the MQTT bucket: the
+server's 429 / Retry-After answers pace it, and failures back off with full
+jitter. Uploads block the owner thread for up to the uploader's timeout.
+
+With a ``feeds`` registry (see publisher.feeds) every feed is resolved to
+its key before it is published or buffered: a display name is mapped to its
+key, and an unknown feed raises FeedError in the caller instead of making
+the broker drop the connection later.
+
+With an ``aggregator`` (see publisher.aggregate) the backlog is read in
+chunks and each chunk is reduced per feed before publishing. A chunk is only
+removed from the buffer once all its reduced values are out; if the link
+drops mid-chunk the chunk is reduced and sent again (at-least-once).
+
+Threading: the buffer is only ever touched by the owner thread (the one that
+created the publisher and calls ``publish_or_buffer()``). ``connected()`` and
+``disconnected()`` run on the ``loop_background()`` thread, so they only push
+the event into an SPSCQueue; the owner replays the events in order on its
+next call and flushes there. Called from the owner thread itself, the
+callbacks take effect immediately.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+from publisher.encoding import MQTT
+from publisher.reconnect import full_jitter
+from publisher.ring_buffer import RingBuffer, DROP_OLDEST, wall_time
+from publisher.spsc import SPSCQueue
+
+
+# 2 feeds every 3 seconds for a full day of outage
+DEFAULT_CAPACITY = 2 * 24 * 3600 // 3
+
+# Connection events queued between two calls from the owner thread
+EVENT_QUEUE_SIZE = 64
+
+# Backlog size above which the REST path is preferred over MQTT
+DEFAULT_REST_THRESHOLD = 500
+
+
+class BufferedPublisher:
+    """Publish samples while connected, buffer them while disconnected."""
+
+    def __init__(self, client, buffer=None, capacity=DEFAULT_CAPACITY, policy=DROP_OLDEST,
+                 bucket=None, reserve=1, aggregator=None, encoder=None, backfill=None,
+                 rest=None, rest_threshold=DEFAULT_REST_THRESHOLD, feeds=None,
+                 clock=time.monotonic, wall_clock=time.time):
+        for enc in (encoder, backfill):
+            if enc is not None and (enc.transport != MQTT or enc.max_batch != 1):
+                raise ValueError(f"Encoder {enc.name!r} does not produce single MQTT messages")
+        self.client = client
+        self.encoder = encoder
+        # Encoder for buffered samples, defaults to the live one
+        self.backfill = backfill if backfill is not None else encoder
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self.buffer = buffer if buffer is not None else RingBuffer(capacity, policy, clock, wall_clock)
+        self.bucket = bucket
+        # Tokens the backlog drain leaves untouched so fresh readings go out first
+        self.reserve = 0 if bucket is None else min(reserve, bucket.burst - 1)
+        self.aggregator = aggregator
+        self.rest = rest
+        self.rest_threshold = rest_threshold
+        self.feeds = feeds
+        self.rest_error = None
+        self._rest_failures = 0
+        self._rest_retry_at = -math.inf
+        # Connection state as seen by the owner thread
+        self.is_connected = False
+        # Seconds spent disconnected before the current outage, and its start
+        self._downtime = 0.0
+        self._down_since = clock()
+
+        # Hand-off from the network thread (producer) to the owner (consumer)
+        self._owner = threading.get_ident()
+        self._events = SPSCQueue(EVENT_QUEUE_SIZE)
+        self._link_up = False   # latest state, written by the producer only
+        self._lost = 0          # events that did not fit, producer only
+        self._lost_seen = 0     # owner only
+
+        # Newest live (value, stamp) per feed waiting for a token
+        self._fresh = {}
+        # Reduced values of the backlog chunk being published, and its raw size
+        self._reduced = deque()
+        self._chunk_size = 0
+
+        client.on_connect = self.connected
+        client.on_disconnect = self.disconnected
+
+    # -- MQTTClient callbacks ----------------------------------------------
+    def connected(self, client):
+        """on_connect callback: the backlog is flushed by the owner thread."""
+        self._notify(True)
+
+    def disconnected(self, client):
+        """on_disconnect callback: the owner thread starts buffering."""
+        self._notify(False)
+
+    def _notify(self, up):
+        self._link_up = up
+        if not self._events.push(up):
+            self._lost += 1
+        if threading.get_ident() == self._owner and self._sync():
+            self.flush_buffer()
+
+    def _sync(self):
+        """
+        Owner thread: apply queued connection events in order. Returns True
+        if the publisher just went from disconnected to connected.
+        """
+        was_connected = self.is_connected
+        went_down = False
+        for up in self._events.drain():
+            went_down = went_down or not up
+            self.is_connected = up
+        lost = self._lost
+        if lost != self._lost_seen:
+            # Events were dropped: assume the worst, then take the latest state
+            self._lost_seen = lost
+            went_down = True
+            self.is_connected = self._link_up
+        if went_down:
+            self._on_link_down()
+        if self.is_connected and self._down_since is not None:
+            self._downtime += self._clock() - self._down_since
+            self._down_since = None
+        elif not self.is_connected and self._down_since is None:
+            self._down_since = self._clock()
+        return self.is_connected and (went_down or not was_connected)
+
+    def _on_link_down(self):
+        for feed, (value, stamp) in self._fresh.items():
+            self.buffer.append(feed, value, stamp)
+        self._fresh.clear()
+        # The chunk stays in the buffer and is reduced again after reconnect
+        self._reduced.clear()
+        self._chunk_size = 0
+
+    # -- Publishing --------------------------------------------------------
+    def publish_or_buffer(self, feed, value):
+        """Publish ``value`` to ``feed``, or buffer it while disconnected."""
+        if self.feeds is not None:
+            feed = self.feeds.resolve(feed)
+        if len(self._events) or self._lost != self._lost_seen:
+            if self._sync():
+                self.flush_buffer()
+        if not self.is_connected:
+            self.buffer.append(feed, value, self._clock())
+        elif self.bucket is None or self.bucket.try_acquire():
+            self._send(feed, value)
+        else:
+            # Rate limited: keep only the newest value per feed in front of
+            # the backlog, the displaced one joins the backlog
+            older = self._fresh.pop(feed, None)
+            if older is not None:
+                self.buffer.append(feed, *older)
+            self._fresh[feed] = (value, self._clock())
+
+    def flush_buffer(self):
+        """
+        Publish held fresh values, then buffered samples oldest first, as far
+        as the bucket allows. Returns the number of samples sent.
+        """
+        self._sync()
+        bucket = self.bucket
+        sent = 0
+        while self.is_connected and self._fresh:
+            if bucket is not None and not bucket.try_acquire():
+                return sent
+            feed = next(iter(self._fresh))
+            value, stamp = self._fresh.pop(feed)
+            self._send(feed, value, wall_time(stamp, self._clock, self._wall_clock))
+            sent += 1
+
+        if self._rest_ready():
+            sent += self._flush_rest()
+
+        while self.is_connected and len(self.buffer):
+            if self.aggregator is not None and not self._reduced:
+                chunk = self.buffer.head_stamped(self.aggregator.chunk_size)
+                self._reduced.extend(self.aggregator.reduce_stamped(chunk))
+                self._chunk_size = len(chunk)
+            if bucket is not None:
+                if bucket.tokens < 1 + self.reserve or not bucket.try_acquire():
+                    break
+            if self.aggregator is None:
+                [(stamp, feed, value)] = self.buffer.head_stamped(1)
+                self._send(feed, value, stamp, self.backfill)
+                self.buffer.popleft()
+            else:
+                stamp, feed, value = self._reduced.popleft()
+                self._send(feed, value, stamp, self.backfill)
+                if not self._reduced:
+                    self.buffer.discard(self._chunk_size)
+                    self._chunk_size = 0
+            sent += 1
+        return sent
+
+    def _use_rest(self):
+        """True when the backlog should go through REST rather than MQTT."""
+        return (self.rest is not None and len(self.buffer) and not self._chunk_size
+                and (not self.is_connected or len(self.buffer) >= self.rest_threshold))
+
+    def _rest_ready(self):
+        return self._use_rest() and self._clock() >= self._rest_retry_at
+
+    def _flush_rest(self):
+        # Imported here: http.client is a third of this module's import time
+        from http.client import HTTPException
+        from publisher.rest import RestError
+
+        sent = 0
+        while self._rest_ready():
+            chunk = self.buffer.head_stamped(self.rest.batch_size)
+            samples = chunk if self.aggregator is None else self.aggregator.reduce_stamped(chunk)
+            by_feed = {}
+            for stamp, feed, value in samples:
+                by_feed.setdefault(feed, []).append((stamp, value))
+            try:
+                for feed, points in by_feed.items():
+                    sent += self.rest.send_batch(feed, points)
+            except (OSError, HTTPException, ValueError, RestError) as e:
+                # Feeds already posted are sent again next time (at-least-once)
+                self.rest_error = e
+                self._rest_failures += 1
+                delay = getattr(e, "retry_after", None)
+                if delay is None:
+                    delay = full_jitter(self._rest_failures)
+                self._rest_retry_at = self._clock() + delay
+                return sent
+            self._rest_failures = 0
+            self.buffer.discard(len(chunk))
+        return sent
+
+    def _send(self, feed, value, stamp=None, encoder=None):
+        encoder = encoder or self.encoder
+        if encoder is None:
+            self.client.publish(feed, value)
+            return
+        for feed_id, payload in encoder.encode(feed, [(stamp, value)]):
+            self.client.publish(feed_id, payload)
+
+    def downtime(self):
+        """Total seconds spent disconnected, the current outage included."""
+        if self._down_since is None:
+            return self._downtime
+        return self._downtime + self._clock() - self._down_since
+
+    # -- Scheduling --------------------------------------------------------
+    def backlog(self):
+        """Messages still to publish (held fresh values included)."""
+        pending = len(self.buffer)
+        if self.aggregator is not None:
+            # Chunk in flight counts as its reduced values, the rest as reduced
+            rest = pending - self._chunk_size
+            pending = len(self._reduced) + -(-rest // self.aggregator.window)
+        return pending + len(self._fresh)
+
+    def next_flush_delay(self):
+        """
+        Seconds until ``flush_buffer()`` can make progress again: ``inf``
+        with nothing to flush, or while disconnected without a REST path, so
+        a main loop can sleep ``min(interval, next_flush_delay())``.
+        """
+        if not self.backlog():
+            return math.inf
+        if self._use_rest():
+            return max(0.0, self._rest_retry_at - self._clock())
+        if not self.is_connected:
+            return math.inf
+        if self.bucket is None:
+            return 0.0
+        needed = 1 if self._fresh else 1 + self.reserve
+        return self.bucket.wait_time(needed)
+
+    def drain_eta(self, live_rate=0.0):
+        """
+        Expected seconds to drain the backlog while live publishing uses
+        ``live_rate`` samples/second of the quota.
+        """
+        if self.bucket is None:
+            return 0.0
+        return self.bucket.time_for(self.backlog(), reserved_rate=live_rate)
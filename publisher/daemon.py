@@ -0,0 +1,292 @@
+"""
+Daemon mode for systemd.
+========================
+
+Under systemd a publisher is restarted after every crash, and the samples it
+would have buffered meanwhile are lost until it is up again: cold start time
+is downtime. Daemon keeps the main loop's process around and cheap to start:
+
+    readiness     ``sd_notify("READY=1")`` once the publisher is built, so
+                  ``Type=notify`` units and dependants wait for a working
+                  publisher rather than a started interpreter; watchdog
+                  pings from ``sleep()`` when ``WatchdogSec=`` is set
+    budget        the time from process start to ``ready()`` is measured
+                  (``startup``) and compared to ``budget``; it is reported
+                  in the unit's STATUS line and by the ``status`` command
+    control       a Unix socket taking one command per line: ``status``,
+                  ``reload`` (re-read the JSON config and hand it to the
+                  ``on_reload`` callback, keeping the buffer and connection),
+                  ``stop``; SIGHUP reloads too (``ExecReload=kill -HUP``)
+
+Only the standard library is imported here (json only once needed), and
+``publisher.buffered``, ``feeds`` and ``metrics`` import their REST / HTTP
+server pieces on first use. ``Adafruit_IO`` pulls in ``requests`` and
+``paho`` whatever is imported from it; ``publisher.async_engine`` avoids
+both.
+
+Usage:
+    daemon = Daemon(config_path="f5.json", control_path="/run/f5/control.sock")
+    publisher = build_publisher(daemon.config)
+    daemon.on_reload = lambda config: apply_config(publisher, config)
+    daemon.ready()
+    while daemon.running:
+        publisher.publish_or_buffer('temperature', read_temperature())
+        daemon.sleep(3)             # answers control commands while waiting
+    daemon.close()
+
+    $ echo status | socat - UNIX-CONNECT:/run/f5/control.sock
+
+``python -m benchmarks.bench_startup`` measures the time to READY=1.
+"""
+
+import os
+import select
+import signal
+import socket
+import time
+
+
+# Seconds from process start to ready(); a Pi Zero takes ~0.3 s to start
+# the interpreter alone
+DEFAULT_BUDGET = 1.5
+
+# Bytes read per control command
+MAX_COMMAND = 256
+
+# Fallback start time when /proc is not available
+_IMPORTED_AT = time.monotonic()
+
+
+def sd_notify(*states):
+    """
+    Send ``KEY=value`` states to systemd (see sd_notify(3)). Returns False
+    when not running under a ``Type=notify`` unit.
+    """
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address[0] == "@":
+        address = "\0" + address[1:]
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        try:
+            sock.sendto("\n".join(states).encode(), address)
+        except OSError:
+            return False
+    return True
+
+
+def process_uptime():
+    """Seconds since this process started (since this module was imported off Linux)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22, after the parenthesized command name which may hold spaces
+            started = int(f.read().rpartition(")")[2].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - started / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORTED_AT
+
+
+def load_config(path):
+    """The JSON config at ``path``, or an empty dict without a path."""
+    if path is None:
+        return {}
+    import json
+
+    with open(path) as f:
+        return json.load(f)
+
+
+class Daemon:
+    """Readiness, startup budget, reload and control socket for a main loop."""
+
+    def __init__(self, config_path=None, control_path=None, budget=DEFAULT_BUDGET,
+                 handle_signals=True, clock=time.monotonic):
+        self.config_path = config_path
+        self.config = load_config(config_path)
+        self.budget = budget
+        self.running = True
+        self.on_reload = None       # callable(config), applies a new config
+        self.status = None          # callable() -> dict merged into "status"
+        self._clock = clock
+        self._started = clock() - process_uptime()
+        self._reload_pending = False
+        self._watchdog = _watchdog_interval()
+        self._last_ping = -float("inf")
+        self.commands = {
+            "status": self._status,
+            "reload": self._reload_command,
+            "stop": self._stop_command,
+        }
+
+        # Measurements
+        self.startup = None
+        self.reloads = 0
+        self.reload_error = None
+
+        self.control_path = control_path
+        self._control = None
+        if control_path is not None:
+            self._control = _listen(control_path)
+
+        if handle_signals:
+            signal.signal(signal.SIGHUP, self._on_sighup)
+            signal.signal(signal.SIGTERM, self._on_sigterm)
+
+    # -- Lifecycle ---------------------------------------------------------
+    def ready(self):
+        """
+        Record the startup time and tell systemd the publisher is ready.
+        Returns True if startup was within the budget.
+        """
+        self.startup = self._clock() - self._started
+        within = self.startup <= self.budget
+        sd_notify("READY=1", "STATUS=" + self._status_line())
+        return within
+
+    def close(self):
+        sd_notify("STOPPING=1")
+        if self._control is not None:
+            self._control.close()
+            self._control = None
+            try:
+                os.unlink(self.control_path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def uptime(self):
+        return self._clock() - self._started
+
+    # -- Main loop ---------------------------------------------------------
+    def sleep(self, seconds):
+        """
+        Wait ``seconds`` (drop-in for ``time.sleep()`` in the main loop),
+        serving control commands, pending reloads and watchdog pings
+        meanwhile. Returns early once ``stop`` was requested.
+        """
+        deadline = self._clock() + seconds
+        while self.running:
+            self.poll()
+            remaining = deadline - self._clock()
+            if remaining <= 0 or not self.running:
+                return
+            wait = min(remaining, self._watchdog or remaining)
+            if self._control is None:
+                time.sleep(wait)
+                continue
+            try:
+                select.select([self._control], [], [], wait)
+            except InterruptedError:
+                pass
+
+    def poll(self):
+        """Serve what is pending without waiting."""
+        if self._reload_pending:
+            self._reload_pending = False
+            self.reload()
+        if self._watchdog and self._clock() - self._last_ping >= self._watchdog:
+            self._last_ping = self._clock()
+            sd_notify("WATCHDOG=1")
+        while self._control is not None:
+            try:
+                conn, _ = self._control.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            with conn:
+                self._serve(conn)
+
+    def reload(self):
+        """Re-read the config and pass it to ``on_reload``. Returns True on success."""
+        sd_notify("RELOADING=1")
+        try:
+            config = load_config(self.config_path)
+            if self.on_reload is not None:
+                self.on_reload(config)
+        except (OSError, ValueError) as exc:
+            # Keep running with the previous config
+            self.reload_error = exc
+            sd_notify("READY=1", f"STATUS=reload failed: {exc}")
+            return False
+        self.config = config
+        self.reload_error = None
+        self.reloads += 1
+        sd_notify("READY=1", "STATUS=" + self._status_line())
+        return True
+
+    # -- Control socket ----------------------------------------------------
+    def _serve(self, conn):
+        import json
+
+        conn.settimeout(1.0)
+        try:
+            command = conn.recv(MAX_COMMAND).decode("utf-8", "replace").strip()
+            handler = self.commands.get(command)
+            reply = handler() if handler else {"error": f"unknown command {command!r}",
+                                               "commands": sorted(self.commands)}
+            conn.sendall(json.dumps(reply).encode() + b"\n")
+        except OSError:
+            pass
+
+    def _status(self):
+        status = {
+            "pid": os.getpid(),
+            "uptime": round(self.uptime(), 3),
+            "startup": None if self.startup is None else round(self.startup, 3),
+            "budget": self.budget,
+            "reloads": self.reloads,
+            "reload_error": None if self.reload_error is None else str(self.reload_error),
+        }
+        if self.status is not None:
+            status.update(self.status())
+        return status
+
+    def _reload_command(self):
+        ok = self.reload()
+        return {"reloaded": ok, "error": None if ok else str(self.reload_error)}
+
+    def _stop_command(self):
+        self.running = False
+        return {"stopping": True}
+
+    def _status_line(self):
+        if self.startup is None:
+            return "starting"
+        verdict = "within" if self.startup <= self.budget else "OVER"
+        return f"ready in {self.startup:.2f}s ({verdict} the {self.budget:g}s budget)"
+
+    # -- Signals -----------------------------------------------------------
+    def _on_sighup(self, signum, frame):
+        # Reloading runs user code: defer it to the main loop
+        self._reload_pending = True
+
+    def _on_sigterm(self, signum, frame):
+        self.running = False
+
+
+def _listen(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, 0o600)
+    sock.listen(4)
+    sock.setblocking(False)
+    return sock
+
+
+def _watchdog_interval():
+    """Half of WatchdogSec= (systemd's recommendation), or None."""
+    usec = os.environ.get("WATCHDOG_USEC")
+    pid = os.environ.get("WATCHDOG_PID")
+    if not usec or (pid and int(pid) != os.getpid()):
+        return None
+    return int(usec) / 2e6
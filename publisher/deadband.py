@@ -0,0 +1,182 @@
+"""
+Change-detection filter.
+========================
+
+The README main loop publishes ``temperature`` and ``humidity`` every 3
+seconds whether they changed or not: 40 data points a minute for a quota of
+30, most of them repeating the previous value. A ChangeFilter sits in front
+of ``publish_or_buffer()`` and only lets a sample through when it carries
+information:
+
+    deadband        publish when the value moved more than
+                    ``max(absolute, relative * |last published|)``
+    heartbeat       publish anyway after ``heartbeat`` seconds of silence,
+                    so dashboards can tell "stable" from "dead"
+    swinging door   keep the points needed to redraw the signal by straight
+                    lines within the band (compresses ramps as well as
+                    plateaus, at the cost of publishing one sample late and
+                    nudging published values by up to the band)
+
+With a deadband the last published value never differs from the sensor by
+more than the band; with the swinging door, the line between two published
+points never differs from any sample between them by more than the band.
+
+Usage:
+    changes = ChangeFilter(Deadband(absolute=0.2), {"humidity": Deadband(absolute=1.0)})
+
+    for feed, value in changes.filter('temperature', temperature):
+        publisher.publish_or_buffer(feed, value)
+"""
+
+import math
+import time
+
+
+# Seconds without a publish after which the current value is sent anyway
+DEFAULT_HEARTBEAT = 300.0
+
+
+class Deadband:
+    """Filter settings for one feed."""
+
+    def __init__(self, absolute=0.0, relative=0.0, heartbeat=DEFAULT_HEARTBEAT,
+                 swinging_door=False):
+        if absolute < 0 or relative < 0:
+            raise ValueError(f"Deadband must be >= 0, got absolute={absolute} relative={relative}")
+        if heartbeat is not None and heartbeat <= 0:
+            raise ValueError(f"heartbeat must be > 0 or None, got {heartbeat}")
+        self.absolute = absolute
+        self.relative = relative
+        self.heartbeat = heartbeat if heartbeat is not None else math.inf
+        self.swinging_door = swinging_door
+
+    def band(self, reference):
+        return max(self.absolute, self.relative * abs(reference))
+
+
+class _FeedState:
+    __slots__ = ("anchor_t", "anchor_v", "held", "upper", "lower", "sent_t")
+
+    def __init__(self, t, value):
+        self.sent_t = t
+        self.reset(t, value)
+
+    def reset(self, t, value):
+        # Last published point; the door pivots on it
+        self.anchor_t = t
+        self.anchor_v = value
+        # Latest sample not published yet (swinging door only)
+        self.held = None
+        self.upper = -math.inf
+        self.lower = math.inf
+
+
+class ChangeFilter:
+    """
+    Per-feed deadband / heartbeat / swinging-door filter.
+
+    ``default`` applies to every feed not listed in ``feeds``. Timestamps
+    come from ``clock`` (wall time by default, so they can be sent as
+    ``created_at`` when a sample is published late).
+    """
+
+    def __init__(self, default=None, feeds=None, clock=time.time):
+        self.default = default if default is not None else Deadband()
+        self.feeds = dict(feeds or {})
+        self._clock = clock
+        self._state = {}
+
+        # Counters
+        self.seen = 0
+        self.passed = 0
+
+    def settings(self, feed):
+        return self.feeds.get(feed, self.default)
+
+    # -- Filtering ---------------------------------------------------------
+    def filter(self, feed, value):
+        """Return the ``(feed, value)`` samples to publish for this reading."""
+        return [(feed, v) for _, v in self.points(feed, value)]
+
+    def points(self, feed, value, now=None):
+        """
+        Return the ``(timestamp, value)`` points to publish for this reading.
+        With the swinging door a point may be an earlier, held sample.
+        """
+        t = self._clock() if now is None else now
+        self.seen += 1
+        state = self._state.get(feed)
+        if state is None:
+            self._state[feed] = _FeedState(t, value)
+            return self._emit([(t, value)])
+
+        cfg = self.settings(feed)
+        if t - state.sent_t >= cfg.heartbeat:
+            # End an open swinging-door segment before restarting from here
+            points = [self._close_segment(state)] if state.held is not None else []
+            state.reset(t, value)
+            state.sent_t = t
+            return self._emit(points + [(t, value)])
+        if cfg.swinging_door:
+            return self._emit(self._swing(state, cfg, t, value))
+        if abs(value - state.anchor_v) > cfg.band(state.anchor_v):
+            state.reset(t, value)
+            state.sent_t = t
+            return self._emit([(t, value)])
+        return []
+
+    def _swing(self, state, cfg, t, value):
+        band = cfg.band(state.anchor_v)
+        dt = max(t - state.anchor_t, 1e-9)
+        upper = max(state.upper, (value - state.anchor_v - band) / dt)
+        lower = min(state.lower, (value - state.anchor_v + band) / dt)
+        if upper <= lower:
+            # Door still closed: a line from the anchor fits every sample
+            state.upper, state.lower = upper, lower
+            state.held = (t, value)
+            return []
+
+        # Door opened: the held sample ends the segment and anchors the next
+        held_t, held_v = self._close_segment(state)
+        band = cfg.band(held_v)
+        dt = max(t - held_t, 1e-9)
+        state.upper = (value - held_v - band) / dt
+        state.lower = (value - held_v + band) / dt
+        state.held = (t, value)
+        return [(held_t, held_v)]
+
+    @staticmethod
+    def _close_segment(state):
+        """
+        Publish the held sample as the end of the current segment. Its value
+        is moved onto the door (by at most the band) if needed, so the line
+        from the anchor stays within the band of every sample in between.
+        """
+        held_t, held_v = state.held
+        dt = held_t - state.anchor_t
+        if dt > 0:
+            slope = min(max((held_v - state.anchor_v) / dt, state.upper), state.lower)
+            held_v = state.anchor_v + slope * dt
+        state.reset(held_t, held_v)
+        state.sent_t = held_t
+        return held_t, held_v
+
+    def flush(self):
+        """
+        Return the ``(feed, value)`` samples held by the swinging door, e.g.
+        before shutting down, so the last segment is not lost.
+        """
+        out = []
+        for feed, state in self._state.items():
+            if state.held is not None:
+                out.append((feed, self._close_segment(state)[1]))
+        self.passed += len(out)
+        return out
+
+    def _emit(self, points):
+        self.passed += len(points)
+        return points
+
+    def reduction(self):
+        """Readings seen per sample published (10.0 means 10x fewer publishes)."""
+        return self.seen / self.passed if self.passed else math.inf
@@ -0,0 +1,139 @@
+"""
+Payload encoders.
+=================
+
+``client.publish(feed, value)`` sends one stringified float per message,
+stamped by Adafruit IO with the time it arrives. An encoder turns a list of
+``(timestamp, value)`` samples of one feed into ``(feed_id, payload)``
+messages, so the wire format can be chosen per path:
+
+    value   ``22.5`` on ``{feed}``; one sample per message, no timestamp
+    json    ``{"value":22.5,"created_at":"..."}`` on ``{feed}/json``; one
+            sample per message, lands at its real time when backfilled
+    batch   JSON array for the REST ``/feeds/{feed}/data/batch`` endpoint;
+            up to ``max_batch`` samples per request, each with created_at
+    csv     ``created_at,value`` lines; the most compact text form, for
+            exporting or archiving a backlog (Adafruit IO has no CSV bulk
+            endpoint)
+
+``feed_id`` is what ``MQTTClient.publish()`` and ``AsyncPublisher.topic()``
+expect: ``temperature/json`` is published to
+``{username}/feeds/temperature/json``. Timestamps are Unix times (seconds);
+``None`` means "now" and leaves ``created_at`` out.
+
+    encoder = get_encoder("json")
+    for feed_id, payload in encoder.encode('temperature', [(ts, 22.5)]):
+        client.publish(feed_id, payload)
+
+``python -m benchmarks.bench_encoding`` compares bytes and CPU per sample.
+"""
+
+import json
+import time
+
+
+MQTT = "mqtt"
+REST = "rest"
+FILE = "file"
+
+# Samples per REST batch request; keeps bodies well under Adafruit IO's 1 MB limit
+DEFAULT_BATCH_SIZE = 1000
+
+
+def iso8601(timestamp):
+    """Unix time to the UTC ISO 8601 form Adafruit IO expects for created_at."""
+    whole = int(timestamp)
+    millis = int(round((timestamp - whole) * 1000))
+    if millis == 1000:
+        whole, millis = whole + 1, 0
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(whole)) + f".{millis:03d}Z"
+
+
+def _point(timestamp, value):
+    if timestamp is None:
+        return {"value": value}
+    return {"value": value, "created_at": iso8601(timestamp)}
+
+
+class ValueEncoder:
+    """The README format: the bare value, one message per sample."""
+
+    name = "value"
+    transport = MQTT
+    max_batch = 1
+    timestamps = False
+
+    def encode(self, feed, samples):
+        return [(feed, str(value)) for _, value in samples]
+
+
+class JSONEncoder:
+    """One ``{feed}/json`` message per sample, with ``created_at``."""
+
+    name = "json"
+    transport = MQTT
+    max_batch = 1
+    timestamps = True
+
+    def __init__(self):
+        self._dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+    def encode(self, feed, samples):
+        topic = f"{feed}/json"
+        return [(topic, self._dumps(_point(ts, value))) for ts, value in samples]
+
+
+class BatchEncoder:
+    """JSON arrays for the REST batch endpoint, ``max_batch`` samples each."""
+
+    name = "batch"
+    transport = REST
+    timestamps = True
+
+    def __init__(self, max_batch=DEFAULT_BATCH_SIZE):
+        if max_batch < 1:
+            raise ValueError(f"max_batch must be >= 1, got {max_batch}")
+        self.max_batch = max_batch
+        self._dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+    def encode(self, feed, samples):
+        samples = list(samples)
+        return [(feed, self._dumps([_point(ts, value) for ts, value in samples[i:i + self.max_batch]]))
+                for i in range(0, len(samples), self.max_batch)]
+
+
+class CSVEncoder:
+    """``created_at,value`` lines (Unix seconds), ``max_batch`` per payload."""
+
+    name = "csv"
+    transport = FILE
+    timestamps = True
+
+    def __init__(self, max_batch=DEFAULT_BATCH_SIZE):
+        if max_batch < 1:
+            raise ValueError(f"max_batch must be >= 1, got {max_batch}")
+        self.max_batch = max_batch
+
+    def encode(self, feed, samples):
+        samples = list(samples)
+        now = time.time()
+        return [(feed, "".join(f"{now if ts is None else ts:.3f},{value}\n"
+                               for ts, value in samples[i:i + self.max_batch]))
+                for i in range(0, len(samples), self.max_batch)]
+
+
+ENCODERS = {
+    "value": ValueEncoder,
+    "json": JSONEncoder,
+    "batch": BatchEncoder,
+    "csv": CSVEncoder,
+}
+
+
+def get_encoder(name, **options):
+    """Build the encoder registered as ``name`` (see ENCODERS)."""
+    try:
+        cls = ENCODERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown encoder {name!r}, expected one of {sorted(ENCODERS)}") from None
+    return cls(**options)
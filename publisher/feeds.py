@@ -0,0 +1,194 @@
+"""
+Feed-key registry.
+==================
+
+Adafruit IO addresses a feed by its KEY (``temperature-sensor``), not by its
+display NAME (``Temperature Sensor``). Publishing to a wrong key is only
+noticed on the server: with MQTT the broker drops the connection, and the
+client goes through a whole disconnect / reconnect cycle for a typo. A
+FeedRegistry fetches the account's feeds once at startup, keeps them in a
+small JSON cache with a TTL, and checks every feed locally before it is
+published:
+
+    key                     ``temperature``           used as is
+    name (any case)         ``Temperature Sensor``    mapped to its key
+    slug of a known feed    ``Temperature_Sensor``    mapped to its key
+    anything else                                     FeedError, with the
+                                                      closest known key
+
+Usage:
+    uploader = RestUploader(ADAFRUIT_IO_USERNAME, ADAFRUIT_IO_KEY)
+    feeds = FeedRegistry(uploader.feeds, account=ADAFRUIT_IO_USERNAME)
+    feeds.load()
+    publisher = BufferedPublisher(client, feeds=feeds)
+
+If the account cannot be reached, a stale cache is used; with no cache at
+all the registry only checks the key syntax and normalizes names the way
+Adafruit IO derives keys (``slugify()``). Resolutions are memoized, so the
+per-publish cost is one dict lookup.
+"""
+
+import difflib
+import json
+import os
+import re
+import time
+
+
+# Lowercase letters, digits and dashes, optionally prefixed by a group key
+FEED_KEY = re.compile(r"^[a-z0-9][a-z0-9-]{0,127}(\.[a-z0-9][a-z0-9-]{0,127})?$")
+
+DEFAULT_CACHE = ".feeds.json"
+# Feeds are rarely created or renamed: refetch once a day
+DEFAULT_TTL = 24 * 3600.0
+CACHE_VERSION = 1
+
+
+class FeedError(ValueError):
+    """The feed is not a valid key, or not one of the account's feeds."""
+
+
+def slugify(name):
+    """The key Adafruit IO derives from a feed name: ``Temp Sensor`` -> ``temp-sensor``."""
+    return re.sub(r"[^a-z0-9.]+", "-", name.strip().lower()).strip("-.")
+
+
+class FeedRegistry:
+    """Account feeds indexed by key, name and slug, cached on disk."""
+
+    def __init__(self, fetch=None, path=DEFAULT_CACHE, ttl=DEFAULT_TTL, account=None,
+                 clock=time.time):
+        if ttl <= 0:
+            raise ValueError(f"ttl must be > 0, got {ttl}")
+        # fetch() returns the account's feeds as dicts with "key" and "name"
+        self.fetch = fetch
+        self.path = path
+        self.ttl = ttl
+        # A cache written for another account is never used
+        self.account = account
+        self._clock = clock
+        self.fetched_at = None
+        self.error = None       # why the last fetch failed, if it did
+        self._feeds = []
+        self._keys = None       # None: no index, syntax checks only
+        self._aliases = {}
+        self._resolved = {}
+
+        # Counters
+        self.fetches = 0
+        self.normalized = 0
+        self.rejected = 0
+
+    @property
+    def known(self):
+        """True when feeds are checked against the account, not only the syntax."""
+        return self._keys is not None
+
+    def keys(self):
+        return sorted(self._keys or ())
+
+    def stale(self):
+        return self.fetched_at is None or self._clock() - self.fetched_at >= self.ttl
+
+    # -- Loading -----------------------------------------------------------
+    def load(self):
+        """
+        Use the cache if it is fresh, else fetch and rewrite it. A failed
+        fetch falls back to the cache, however old. Returns ``self``.
+        """
+        cached = self._read_cache()
+        if cached is not None:
+            self._index(*cached)
+        if self.stale() and self.fetch is not None:
+            self.refresh()
+        return self
+
+    def refresh(self):
+        """Fetch the feeds now. Returns True on success (see ``error`` otherwise)."""
+        from publisher.rest import RestError
+
+        try:
+            feeds = self.fetch()
+        except (OSError, RestError, ValueError) as exc:
+            self.error = exc
+            return False
+        self.fetches += 1
+        self.error = None
+        self._index([{"key": f["key"], "name": f.get("name", f["key"])} for f in feeds],
+                    self._clock())
+        self._write_cache()
+        return True
+
+    def _index(self, feeds, fetched_at):
+        self.fetched_at = fetched_at
+        self._feeds = feeds
+        self._keys = {f["key"] for f in feeds}
+        self._aliases = {}
+        for f in feeds:
+            self._aliases.setdefault(f["name"].casefold(), f["key"])
+            self._aliases.setdefault(slugify(f["name"]), f["key"])
+        self._resolved.clear()
+
+    def _read_cache(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Valid JSON is not a valid cache: anything unexpected counts as unreadable
+        if not isinstance(data, dict):
+            return None
+        if data.get("version") != CACHE_VERSION or data.get("account") != self.account:
+            return None
+        feeds, fetched_at = data.get("feeds"), data.get("fetched_at")
+        if not isinstance(feeds, list) or not isinstance(fetched_at, (int, float)):
+            return None
+        if not all(isinstance(f, dict) and isinstance(f.get("key"), str)
+                   and isinstance(f.get("name"), str) for f in feeds):
+            return None
+        return feeds, fetched_at
+
+    def _write_cache(self):
+        data = {"version": CACHE_VERSION, "account": self.account,
+                "fetched_at": self.fetched_at, "feeds": self._feeds}
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            # A read-only SD card only costs a fetch at the next start
+            pass
+
+    # -- Resolution --------------------------------------------------------
+    def resolve(self, feed):
+        """Return the key to publish ``feed`` to, or raise FeedError."""
+        try:
+            return self._resolved[feed]
+        except KeyError:
+            pass
+        key = self._lookup(feed)
+        if key != feed:
+            self.normalized += 1
+        self._resolved[feed] = key
+        return key
+
+    def _lookup(self, feed):
+        if self._keys is None:
+            if FEED_KEY.match(feed):
+                return feed
+            key = slugify(feed)
+            if FEED_KEY.match(key):
+                return key
+            self.rejected += 1
+            raise FeedError(f"{feed!r} is not a valid feed key")
+
+        if feed in self._keys:
+            return feed
+        key = self._aliases.get(feed.casefold()) or self._aliases.get(slugify(feed))
+        if key is not None:
+            return key
+        self.rejected += 1
+        close = difflib.get_close_matches(slugify(feed), self._keys, n=1)
+        hint = f", did you mean {close[0]!r}?" if close else ""
+        raise FeedError(f"Unknown feed {feed!r}{hint}")
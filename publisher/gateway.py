@@ -0,0 +1,218 @@
+"""
+Fan-in gateway for a fleet of Pis.
+==================================
+
+Every Pi in the README design opens its own ``MQTTClient`` connection with
+the same account. A fleet multiplies TLS handshakes and keepalives and runs
+into Adafruit IO's per-account connection limit, and each Pi spends its own
+copy of a quota that is counted per account anyway.
+
+In gateway mode the devices only send datagrams (UDP or a Unix socket) to a
+collector; the collector publishes everything through one BufferedPublisher,
+i.e. one MQTT connection, one token bucket and one offline buffer. Each
+device gets its own feed namespace: ``pi-07`` sending ``temperature`` is
+published to the ``pi-07.temperature`` feed (feed ``temperature`` in group
+``pi-07`` on Adafruit IO).
+
+Wire format: one reading per line, ``<device> <feed> <value>``, several
+lines per datagram allowed.
+
+Collector (one process, e.g. on the Pi with the best uplink):
+    client = MQTTClient(ADAFRUIT_IO_USERNAME, ADAFRUIT_IO_KEY)
+    publisher = BufferedPublisher(client, bucket=TokenBucket.for_tier("free"))
+    gateway = Gateway(publisher, ("0.0.0.0", DEFAULT_PORT), devices={"pi-01", "pi-02"})
+    client.connect()
+    client.loop_background()
+    gateway.serve_forever()
+
+Device:
+    gateway = GatewayClient("pi-07", ("192.168.1.10", DEFAULT_PORT))
+    gateway.publish('temperature', 22.5)   # same call as MQTTClient.publish
+
+Datagrams are fire-and-forget: a reading lost on the LAN is not retried,
+but once it reaches the collector it is buffered across MQTT outages like
+any other sample.
+
+Threading: the gateway must run on the publisher's owner thread (the one
+that created the BufferedPublisher), since it calls ``publish_or_buffer()``.
+"""
+
+import os
+import re
+import socket
+import time
+
+
+DEFAULT_PORT = 7420
+DEFAULT_ADDRESS = ("127.0.0.1", DEFAULT_PORT)
+
+# Fits in one Ethernet frame; larger datagrams are truncated and rejected
+MAX_DATAGRAM = 1400
+
+# Datagrams handled per poll() before flushing, so a chatty fleet cannot
+# starve the backlog drain
+POLL_BATCH = 256
+
+# Upper bound on one wait in serve_forever(), to notice ``stop`` promptly
+MAX_WAIT = 1.0
+
+# Adafruit IO feed and group keys: lowercase letters, digits and dashes
+KEY_PATTERN = re.compile(r"^[a-z0-9][a-z0-9-]{0,63}$")
+
+
+def feed_key(device, feed):
+    """Namespaced feed key for ``feed`` on ``device``."""
+    return f"{device}.{feed}"
+
+
+def _open_socket(address):
+    """UDP socket for a (host, port) tuple, Unix datagram socket for a path."""
+    if isinstance(address, (str, bytes, os.PathLike)):
+        return socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    return socket.socket(socket.AF_INET6 if ":" in address[0] else socket.AF_INET,
+                         socket.SOCK_DGRAM)
+
+
+# ---------------------------------------------------------------------------
+# Collector
+# ---------------------------------------------------------------------------
+class Gateway:
+    """Receive readings from devices and publish them over one connection."""
+
+    def __init__(self, publisher, address=DEFAULT_ADDRESS, devices=None, clock=time.monotonic):
+        self.publisher = publisher
+        # Allowed device names, None accepts any well-formed name
+        self.devices = set(devices) if devices is not None else None
+        for device in self.devices or ():
+            if not KEY_PATTERN.match(device):
+                raise ValueError(f"Invalid device name {device!r}")
+        self._clock = clock
+
+        self._sock = _open_socket(address)
+        if self._sock.family == socket.AF_UNIX:
+            self._unlink_stale(address)
+        self._sock.bind(address)
+        self.address = self._sock.getsockname()
+
+        # Counters
+        self.received = 0     # readings accepted
+        self.rejected = 0     # malformed lines or unknown devices
+        self.last_seen = {}   # device -> clock() of its latest reading
+
+    @staticmethod
+    def _unlink_stale(path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        path = self.address if self._sock.family == socket.AF_UNIX else None
+        self._sock.close()
+        if path:
+            self._unlink_stale(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- Receiving ---------------------------------------------------------
+    def poll(self, timeout=0.0):
+        """
+        Wait up to ``timeout`` seconds for datagrams, publish or buffer every
+        reading received, then flush the backlog. Returns the number of
+        readings accepted.
+        """
+        accepted = 0
+        self._sock.settimeout(timeout if timeout > 0 else 0.0)
+        for _ in range(POLL_BATCH):
+            try:
+                data = self._sock.recv(MAX_DATAGRAM + 1)
+            except (BlockingIOError, socket.timeout):
+                break
+            accepted += self.handle(data)
+            # Only the first recv waits
+            self._sock.setblocking(False)
+        self.publisher.flush_buffer()
+        return accepted
+
+    def handle(self, data):
+        """Parse one datagram and hand its readings to the publisher."""
+        if len(data) > MAX_DATAGRAM:
+            self.rejected += 1
+            return 0
+        accepted = 0
+        now = self._clock()
+        for line in data.decode("utf-8", "replace").splitlines():
+            reading = self._parse(line)
+            if reading is None:
+                self.rejected += 1
+                continue
+            device, feed, value = reading
+            self.publisher.publish_or_buffer(feed_key(device, feed), value)
+            self.last_seen[device] = now
+            accepted += 1
+        self.received += accepted
+        return accepted
+
+    def _parse(self, line):
+        parts = line.split()
+        if len(parts) != 3:
+            return None
+        device, feed, value = parts
+        if not KEY_PATTERN.match(device) or not KEY_PATTERN.match(feed):
+            return None
+        if self.devices is not None and device not in self.devices:
+            return None
+        try:
+            return device, feed, float(value)
+        except ValueError:
+            return None
+
+    def serve_forever(self, stop=None):
+        """
+        Poll until ``stop()`` returns True (forever by default), waking early
+        whenever the backlog can make progress.
+        """
+        while stop is None or not stop():
+            self.poll(min(MAX_WAIT, self.publisher.next_flush_delay()))
+
+    def stats(self):
+        now = self._clock()
+        return {
+            "received": self.received,
+            "rejected": self.rejected,
+            "backlog": self.publisher.backlog(),
+            "devices": {device: round(now - seen, 1) for device, seen in self.last_seen.items()},
+        }
+
+
+# ---------------------------------------------------------------------------
+# Device side
+# ---------------------------------------------------------------------------
+class GatewayClient:
+    """Send readings to a Gateway instead of opening an MQTT connection."""
+
+    def __init__(self, device, address=DEFAULT_ADDRESS):
+        if not KEY_PATTERN.match(device):
+            raise ValueError(f"Invalid device name {device!r}")
+        self.device = device
+        self.address = address
+        self._sock = _open_socket(address)
+
+    def publish(self, feed_id, value=None, group_id=None, feed_user=None):
+        """Same signature as ``MQTTClient.publish``; group and user are ignored."""
+        self.send([(feed_id, value)])
+
+    def send(self, readings):
+        """Send several ``(feed, value)`` readings in one datagram."""
+        lines = "".join(f"{self.device} {feed} {value}\n" for feed, value in readings)
+        data = lines.encode()
+        if len(data) > MAX_DATAGRAM:
+            raise ValueError(f"{len(data)} bytes of readings exceed MAX_DATAGRAM ({MAX_DATAGRAM})")
+        self._sock.sendto(data, self.address)
+
+    def close(self):
+        self._sock.close()
@@ -0,0 +1,188 @@
+"""
+Adaptive publish intervals.
+===========================
+
+The README main loop sleeps 3 seconds between publications, whatever the
+quota, the number of feeds or the signal. An IntervalController splits the
+account's rate between the feeds and the backlog and recomputes each
+feed's interval as conditions change:
+
+    backlog       while ``backlog > 0``, what clears it in ``drain_time``
+                  seconds is kept for flush_buffer(), at most
+                  ``drain_share`` of the rate; live feeds get the rest
+    feeds         feeds not read for ``max_interval`` seconds stop counting
+    volatility    each feed's share is proportional to its expected band
+                  crossings per second, ``EWMA(|dv/dt|) / resolution``: a
+                  feed that moves fast compared to the change worth
+                  publishing gets more of the quota, a flat one drops
+                  towards ``max_interval``
+
+Every active feed keeps at least one publish per ``max_interval`` (the
+heartbeat) and at most one per ``min_interval``.
+
+Usage:
+    controller = IntervalController(bucket.rate, resolution=0.2, feeds={'humidity': 1.0})
+    while True:
+        for feed, value in read_sensors():
+            controller.observe(feed, value)
+            if controller.due(feed):
+                publisher.publish_or_buffer(feed, value)
+        controller.update(publisher.backlog())
+        publisher.flush_buffer()
+        time.sleep(1)
+
+``metrics.instrument(..., controller=controller)`` exports the intervals,
+volatilities and the live / drain split.
+"""
+
+import math
+import time
+
+
+MIN_INTERVAL = 1.0
+MAX_INTERVAL = 300.0
+# Largest fraction of the rate kept for the backlog while there is one
+DEFAULT_DRAIN_SHARE = 0.5
+# Seconds a backlog is meant to drain in: a short one only takes what it needs
+DEFAULT_DRAIN_TIME = 60.0
+# Weight of the newest sample in the volatility average
+DEFAULT_ALPHA = 0.2
+
+
+class _Feed:
+    __slots__ = ("last_t", "last_v", "volatility", "sent_t")
+
+    def __init__(self, t, value):
+        self.last_t = t
+        self.last_v = value
+        self.volatility = None      # EWMA of |dv/dt|, None until two readings
+        self.sent_t = -math.inf
+
+
+class IntervalController:
+    """Per-feed publish intervals from the rate, backlog and volatility."""
+
+    def __init__(self, rate, resolution=1.0, feeds=None, min_interval=MIN_INTERVAL,
+                 max_interval=MAX_INTERVAL, drain_share=DEFAULT_DRAIN_SHARE,
+                 drain_time=DEFAULT_DRAIN_TIME, alpha=DEFAULT_ALPHA, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError(f"rate must be > 0, got {rate}")
+        if not 0 < min_interval <= max_interval:
+            raise ValueError(f"Need 0 < min_interval <= max_interval, got "
+                             f"{min_interval} and {max_interval}")
+        if not 0 <= drain_share < 1:
+            raise ValueError(f"drain_share must be in [0, 1), got {drain_share}")
+        if drain_time <= 0:
+            raise ValueError(f"drain_time must be > 0, got {drain_time}")
+        if not 0 < alpha <= 1:
+            raise ValueError(f"alpha must be in (0, 1], got {alpha}")
+        # Data points per second for the whole account (e.g. TokenBucket.rate)
+        self.rate = rate
+        # Smallest change worth publishing, per feed
+        self.resolution = resolution
+        self.resolutions = dict(feeds or {})
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.drain_share = drain_share
+        self.drain_time = drain_time
+        self.alpha = alpha
+        self._clock = clock
+        self._feeds = {}
+        self._backlog = 0
+
+        # Latest decision
+        self.intervals = {}
+        self.live_rate = rate
+        self.drain_rate = 0.0
+
+        # Counters
+        self.updates = 0
+
+    # -- Readings ----------------------------------------------------------
+    def observe(self, feed, value, now=None):
+        """Record a reading of ``feed`` (every read, published or not)."""
+        t = self._clock() if now is None else now
+        state = self._feeds.get(feed)
+        if state is None:
+            self._feeds[feed] = _Feed(t, value)
+            if feed not in self.intervals:
+                self.update(now=t)
+            return
+        dt = t - state.last_t
+        if dt > 0:
+            speed = abs(value - state.last_v) / dt
+            if state.volatility is None:
+                state.volatility = speed
+            else:
+                state.volatility += self.alpha * (speed - state.volatility)
+        state.last_t = t
+        state.last_v = value
+
+    def volatility(self, feed):
+        """Expected band crossings per second of ``feed`` (0.0 if unknown)."""
+        state = self._feeds.get(feed)
+        if state is None or state.volatility is None:
+            return 0.0
+        return state.volatility / self.resolutions.get(feed, self.resolution)
+
+    def due(self, feed, now=None):
+        """
+        True if ``feed``'s interval has elapsed since it was last due; the
+        caller is expected to publish it then.
+        """
+        t = self._clock() if now is None else now
+        state = self._feeds.get(feed)
+        if state is None:
+            return False
+        interval = self.intervals.get(feed, self.max_interval)
+        if t - state.sent_t < interval:
+            return False
+        state.sent_t = t
+        return True
+
+    # -- Decision ----------------------------------------------------------
+    def update(self, backlog=None, now=None):
+        """
+        Recompute the intervals for the current ``backlog`` depth (the last
+        one given if None). Returns the ``{feed: seconds}`` mapping, also
+        kept in ``intervals``.
+        """
+        t = self._clock() if now is None else now
+        if backlog is not None:
+            self._backlog = backlog
+        active = [f for f, s in self._feeds.items() if t - s.last_t <= self.max_interval]
+        self.drain_rate = min(self.rate * self.drain_share, self._backlog / self.drain_time)
+        self.live_rate = self.rate - self.drain_rate
+        self.intervals = self._split(active, self.live_rate)
+        self.updates += 1
+        return self.intervals
+
+    def _split(self, feeds, rate):
+        floor = 1.0 / self.max_interval
+        ceiling = 1.0 / self.min_interval
+        known = {f: self.volatility(f) for f in feeds if self._feeds[f].volatility is not None}
+        # A feed read only once gets an average share until its volatility is known
+        default = sum(known.values()) / len(known) if known else 0.0
+        weights = {f: known.get(f, default) for f in feeds}
+        if not any(weights.values()):
+            weights = dict.fromkeys(feeds, 1.0)
+
+        # Heartbeats first, then the spare rate follows the weights; feeds
+        # capped at min_interval hand what they cannot use to the others
+        rates = dict.fromkeys(feeds, floor)
+        spare = max(0.0, rate - floor * len(feeds))
+        uncapped = list(feeds)
+        while uncapped and spare > 1e-12:
+            total = sum(weights[f] for f in uncapped)
+            shares = {f: spare * (weights[f] / total if total else 1.0 / len(uncapped))
+                      for f in uncapped}
+            capped = [f for f in uncapped if rates[f] + shares[f] >= ceiling]
+            if not capped:
+                for f in uncapped:
+                    rates[f] += shares[f]
+                break
+            for f in capped:
+                spare -= ceiling - rates[f]
+                rates[f] = ceiling
+                uncapped.remove(f)
+        return {f: 1.0 / r for f, r in rates.items()}
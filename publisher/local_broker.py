@@ -0,0 +1,329 @@
+"""
+Local MQTT broker stand-in.
+===========================
+
+A loopback-only asyncio broker that speaks enough MQTT 3.1.1 for
+``Adafruit_IO.MQTTClient`` and AsyncPublisher, so publishing throughput can
+be measured without touching io.adafruit.com. Faults can be injected:
+
+    latency       seconds before each CONNACK / PUBACK / SUBACK is sent
+    drop_rate     probability that a PUBLISH is silently discarded
+    rate_limit    publishes per minute per username; extra publishes are
+                  rejected and reported on ``{username}/throttle`` like
+                  Adafruit IO does
+
+Usage (asyncio):
+    broker = LocalBroker(rate_limit=30)
+    port = await broker.start()
+    ...
+    await broker.stop()
+
+Usage (threads, e.g. with Adafruit_IO.MQTTClient):
+    broker = LocalBroker()
+    port = broker.start_in_thread()
+    client = MQTTClient('student', 'key', service_host='127.0.0.1', secure=False)
+    client._service_port = port     # private: the constructor has no port argument
+    ...
+    broker.stop_thread()
+
+LocalRestServer does the same for the REST endpoints used by publisher.rest
+(batch upload and feed list), with HTTP/1.1 keep-alive, latency, key checks
+(401) and a requests-per-minute limit (429 with Retry-After):
+    server = LocalRestServer(accounts={'student': 'key'})
+    url = server.start()            # http://127.0.0.1:<port>
+    uploader = RestUploader('student', 'key', base_url=url)
+    ...
+    server.stop()
+"""
+
+import asyncio
+import collections
+import http.server
+import ipaddress
+import json
+import random
+import re
+import threading
+import time
+
+from publisher import mqtt_packets as mqtt
+from publisher.feeds import slugify
+
+
+LOOPBACK = "127.0.0.1"
+
+_BATCH_PATH = re.compile(r"^/api/v2/(?P<username>[^/]+)/feeds/(?P<feed>[^/]+)/data/batch$")
+_FEEDS_PATH = re.compile(r"^/api/v2/(?P<username>[^/]+)/feeds$")
+
+
+def _check_loopback(host):
+    if not ipaddress.ip_address(host).is_loopback:
+        raise ValueError(f"Local stand-ins only bind to loopback addresses, got {host}")
+
+
+class LocalBroker:
+    """In-process MQTT broker for tests and benchmarks."""
+
+    def __init__(self, host=LOOPBACK, port=0, latency=0.0, drop_rate=0.0, rate_limit=None,
+                 accounts=None, seed=None):
+        _check_loopback(host)
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.rate_limit = rate_limit
+        self.accounts = accounts      # username -> key, None accepts anyone
+        self._rng = random.Random(seed)
+
+        self.messages = []            # (receive time, topic, payload)
+        self.received = 0
+        self.dropped = 0
+        self.throttled = 0
+        self.connections = 0
+
+        self._server = None
+        self._writers = set()
+        self._subscriptions = {}      # writer -> set of topic filters
+        self._windows = collections.defaultdict(collections.deque)  # username -> publish times
+        self._thread = None
+        self._loop = None
+
+    # -- Lifecycle (asyncio) -----------------------------------------------
+    async def start(self):
+        """Start listening. Returns the bound port."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        self.kick()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def kick(self):
+        """Drop every client connection (simulates a broker-side disconnect)."""
+        for writer in list(self._writers):
+            writer.close()
+
+    # -- Lifecycle (thread) ------------------------------------------------
+    def start_in_thread(self):
+        """Run the broker on its own event loop thread. Returns the port."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="local-broker", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.port
+
+    def stop_thread(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    # -- Protocol ----------------------------------------------------------
+    async def _respond(self, writer, packet):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        writer.write(packet)
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            packet_type, _, body = await mqtt.read_packet(reader)
+            if packet_type != mqtt.CONNECT:
+                return
+            info = mqtt.parse_connect(body)
+            username = info["username"]
+            if self.accounts is not None and self.accounts.get(username) != info["password"]:
+                await self._respond(writer, mqtt.connack(4))
+                return
+            await self._respond(writer, mqtt.connack())
+
+            while True:
+                packet_type, flags, body = await mqtt.read_packet(reader)
+                if packet_type == mqtt.PUBLISH:
+                    await self._on_publish(writer, username, flags, body)
+                elif packet_type == mqtt.SUBSCRIBE:
+                    packet_id, topics = mqtt.parse_subscribe(body)
+                    self._subscriptions.setdefault(writer, set()).update(t for t, _ in topics)
+                    await self._respond(writer, mqtt.suback(packet_id, [min(q, 1) for _, q in topics]))
+                elif packet_type == mqtt.PINGREQ:
+                    writer.write(mqtt.pingresp())
+                elif packet_type == mqtt.DISCONNECT:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError, mqtt.MQTTProtocolError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            self._subscriptions.pop(writer, None)
+            writer.close()
+
+    async def _on_publish(self, writer, username, flags, body):
+        topic, payload, qos, packet_id, _ = mqtt.parse_publish(flags, body)
+        now = time.perf_counter()
+        self.received += 1
+
+        if self.drop_rate and self._rng.random() < self.drop_rate:
+            self.dropped += 1
+            return
+
+        if self.rate_limit is not None:
+            window = self._windows[username]
+            while window and window[0] <= now - 60:
+                window.popleft()
+            if len(window) >= self.rate_limit:
+                self.throttled += 1
+                self._deliver(f"{username}/throttle",
+                              f"{username} data rate limit reached, {len(window)} of {self.rate_limit}")
+                return
+            window.append(now)
+
+        self.messages.append((now, topic, payload))
+        self._deliver(topic, payload)
+        if qos and self.latency:
+            # Like a network round trip: acks are delayed, not serialized
+            asyncio.get_running_loop().call_later(self.latency, self._write, writer,
+                                                  mqtt.puback(packet_id))
+        elif qos:
+            writer.write(mqtt.puback(packet_id))
+
+    @staticmethod
+    def _write(writer, packet):
+        if not writer.is_closing():
+            writer.write(packet)
+
+    def _deliver(self, topic, payload):
+        for writer, filters in self._subscriptions.items():
+            if any(_matches(f, topic) for f in filters):
+                writer.write(mqtt.publish(topic, payload))
+
+
+def _matches(topic_filter, topic):
+    """MQTT topic filter match with ``+`` and ``#`` wildcards."""
+    filter_levels = topic_filter.split("/")
+    levels = topic.split("/")
+    for i, part in enumerate(filter_levels):
+        if part == "#":
+            return True
+        if i >= len(levels) or (part != "+" and part != levels[i]):
+            return False
+    return len(filter_levels) == len(levels)
+
+
+# ---------------------------------------------------------------------------
+# REST stand-in
+# ---------------------------------------------------------------------------
+class LocalRestServer:
+    """In-process stand-in for the Adafruit IO REST batch endpoint."""
+
+    def __init__(self, host=LOOPBACK, port=0, latency=0.0, rate_limit=None, accounts=None,
+                 feeds=()):
+        _check_loopback(host)
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.rate_limit = rate_limit  # requests per minute per username
+        self.accounts = accounts      # username -> key, None accepts anyone
+        self.feeds = list(feeds)      # feed names served by GET .../feeds
+
+        self.batches = []             # (feed, [points])
+        self.requests = 0
+        self.rejected = 0
+        self.connections = 0
+
+        self._lock = threading.Lock()
+        self._windows = collections.defaultdict(collections.deque)
+        self._server = None
+        self._thread = None
+
+    @property
+    def points(self):
+        """Every stored data point as ``(feed, value, created_at)``."""
+        with self._lock:
+            return [(feed, p["value"], p.get("created_at")) for feed, batch in self.batches
+                    for p in batch]
+
+    def start(self):
+        """Serve from a background thread. Returns the base URL."""
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._reply(*server._on_request("POST", self.path, self.headers, body))
+
+            def do_GET(self):
+                self._reply(*server._on_request("GET", self.path, self.headers, b""))
+
+            def _reply(self, status, payload, headers):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,),
+                                        name="local-rest", daemon=True)
+        self._thread.start()
+        return f"http://{self.host}:{self.port}"
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _on_request(self, method, path, headers, body):
+        if self.latency:
+            time.sleep(self.latency)
+        match = (_BATCH_PATH if method == "POST" else _FEEDS_PATH).match(path)
+        if match is None:
+            return 404, {"error": "not found"}, {}
+        username = match["username"]
+        with self._lock:
+            self.requests += 1
+            if self.accounts is not None and self.accounts.get(username) != headers.get("X-AIO-Key"):
+                self.rejected += 1
+                return 401, {"error": "invalid API key"}, {}
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                window = self._windows[username]
+                while window and window[0] <= now - 60:
+                    window.popleft()
+                if len(window) >= self.rate_limit:
+                    self.rejected += 1
+                    retry_after = max(1, int(window[0] + 60 - now) + 1)
+                    return 429, {"error": "request rate limit reached"}, {"Retry-After": str(retry_after)}
+                window.append(now)
+            if method == "GET":
+                return 200, [{"name": name, "key": slugify(name)} for name in self.feeds], {}
+            feed = match["feed"]
+            points = json.loads(body)
+            self.batches.append((feed, points))
+        return 200, [dict(p, feed_key=feed) for p in points], {}
@@ -0,0 +1,301 @@
+"""
+Publisher metrics.
+==================
+
+Counters, gauges and histograms in the Prometheus text format, exported to
+a file (for node_exporter's textfile collector) or served over HTTP, so a
+fleet can be watched from one dashboard:
+
+    registry = Registry(labels={"device": "pi-07"})
+    instrument(registry, publisher, supervisor)
+    registry.serve(port=9108)                       # GET /metrics
+    # or, from the main loop every minute:
+    registry.write_textfile("/var/lib/node_exporter/textfile/f5.prom")
+
+The hot path stays cheap. Most values (samples buffered/dropped, buffer
+depth, local rate-limit refusals, reconnects) are counters the components already
+keep; they are registered as callbacks and only read when exporting. The
+only per-publish cost is one ``perf_counter()`` pair and a ``bisect`` into
+preallocated histogram buckets.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+
+# Seconds; MQTT QoS 0 publishes on a Pi return in well under a millisecond
+# unless the socket buffer is full
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+DEFAULT_PORT = 9108
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in sorted(labels.items())) + "}"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# ---------------------------------------------------------------------------
+# Metric types
+# ---------------------------------------------------------------------------
+class Counter:
+    """Monotonic count. Either ``inc()``-ed or read from ``fn()`` on export."""
+
+    kind = "counter"
+    __slots__ = ("name", "help", "value", "fn")
+
+    def __init__(self, name, help, fn=None):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self.fn = fn
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        yield "", (self.fn() if self.fn is not None else self.value)
+
+
+class Gauge(Counter):
+    """Value that goes up and down. Either ``set()`` or read from ``fn()``."""
+
+    kind = "gauge"
+    __slots__ = ()
+
+    def set(self, value):
+        self.value = value
+
+
+class GaugeFamily:
+    """Gauges told apart by one label, read as a ``{label value: value}`` dict from ``fn()``."""
+
+    kind = "gauge"
+    __slots__ = ("name", "help", "label", "fn")
+
+    def __init__(self, name, help, label, fn):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.fn = fn
+
+    def samples(self):
+        for key, value in sorted(self.fn().items()):
+            yield f'{{{self.label}="{_escape(str(key))}"}}', value
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count over preallocated buckets."""
+
+    kind = "histogram"
+    __slots__ = ("name", "help", "bounds", "counts", "sum", "count")
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self, fn, *args):
+        """Call ``fn(*args)`` and observe how long it took."""
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile (inf if past the last)."""
+        if not self.count:
+            return float("nan")
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def samples(self):
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            yield f'_bucket{{le="{bound:g}"}}', seen
+        yield '_bucket{le="+Inf"}', self.count
+        yield "_sum", self.sum
+        yield "_count", self.count
+
+
+# ---------------------------------------------------------------------------
+# Registry and export
+# ---------------------------------------------------------------------------
+class Registry:
+    """A set of metrics sharing constant ``labels`` (e.g. the device name)."""
+
+    def __init__(self, labels=None, prefix="f5_"):
+        self.labels = dict(labels or {})
+        self.prefix = prefix
+        self._metrics = {}
+        self._server = None
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, fn=None):
+        return self._add(Counter(self.prefix + name, help, fn))
+
+    def gauge(self, name, help, fn=None):
+        return self._add(Gauge(self.prefix + name, help, fn))
+
+    def gauge_family(self, name, help, label, fn):
+        return self._add(GaugeFamily(self.prefix + name, help, label, fn))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(self.prefix + name, help, buckets))
+
+    def get(self, name):
+        return self._metrics[self.prefix + name]
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, value in metric.samples():
+                lines.append(self._series(metric.name, suffix) + f" {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+    def _series(self, name, suffix):
+        labels = _format_labels(self.labels)
+        if suffix.endswith("}"):
+            # Histogram bucket or family member: merge its label with the constant labels
+            base, own = suffix[:-1].split("{", 1)
+            merged = (labels[:-1] + "," if labels else "{") + own + "}"
+            return name + base + merged
+        return name + suffix + labels
+
+    def write_textfile(self, path):
+        """Write the metrics atomically (node_exporter textfile collector)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Serve ``GET /metrics`` from a background thread. Returns the port."""
+        # Imported here: most devices only write the text file
+        import http.server
+
+        registry = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                data = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, args=(0.1,), name="metrics",
+                         daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# ---------------------------------------------------------------------------
+# Wiring
+# ---------------------------------------------------------------------------
+def instrument(registry, publisher, supervisor=None, controller=None):
+    """
+    Register the standard metrics of a BufferedPublisher (and its buffer and
+    bucket) and, if given, of its ReconnectSupervisor and IntervalController.
+    Wraps ``publisher.client.publish`` to time each call.
+    """
+    buffer = publisher.buffer
+    latency = registry.histogram("publish_latency_seconds", "Time spent in client.publish()")
+    sent = registry.counter("messages_sent_total", "Messages handed to the MQTT client")
+
+    publish = publisher.client.publish
+    perf_counter = time.perf_counter
+
+    # Same signature as MQTTClient.publish, so no per-call *args/**kwargs packing
+    def timed_publish(feed_id, value=None, group_id=None, feed_user=None):
+        started = perf_counter()
+        try:
+            if group_id is None and feed_user is None:
+                return publish(feed_id, value)
+            return publish(feed_id, value, group_id, feed_user)
+        finally:
+            latency.observe(perf_counter() - started)
+            sent.value += 1
+
+    publisher.client.publish = timed_publish
+
+    registry.counter("samples_buffered_total", "Samples written to the offline buffer",
+                     lambda: buffer.appended)
+    registry.counter("samples_dropped_total", "Samples lost to the buffer overflow policy",
+                     lambda: getattr(buffer, "dropped", 0))
+    registry.gauge("buffer_depth", "Messages waiting to be published", publisher.backlog)
+    registry.gauge("connected", "1 while the MQTT link is up", lambda: int(publisher.is_connected))
+    registry.counter("disconnected_seconds_total", "Time spent with the MQTT link down",
+                     publisher.downtime)
+    if publisher.bucket is not None:
+        # Local refusals only: the broker's own {username}/throttle notices
+        # are not subscribed to, so they do not show up here
+        registry.counter("rate_limit_local_refusals_total",
+                         "Publishes refused locally by the token bucket",
+                         lambda: publisher.bucket.refused)
+    if publisher.rest is not None:
+        registry.counter("rest_uploaded_total", "Samples uploaded through REST",
+                         lambda: publisher.rest.uploaded)
+    if supervisor is not None:
+        registry.counter("reconnects_total", "Successful MQTT connections",
+                         lambda: supervisor.connects)
+        registry.counter("connect_attempts_total", "MQTT connection attempts",
+                         lambda: supervisor.total_attempts)
+    if controller is not None:
+        registry.gauge_family("publish_interval_seconds", "Publish interval chosen per feed",
+                              "feed", lambda: controller.intervals)
+        registry.gauge_family("feed_volatility", "Expected band crossings per second per feed",
+                              "feed", lambda: {f: controller.volatility(f)
+                                               for f in controller.intervals})
+        registry.gauge("live_rate", "Data points per second given to live feeds",
+                       lambda: controller.live_rate)
+        registry.gauge("drain_rate", "Data points per second kept for the backlog",
+                       lambda: controller.drain_rate)
+        registry.counter("interval_updates_total", "Interval recomputations",
+                         lambda: controller.updates)
+    return registry
@@ -0,0 +1,222 @@
+"""
+Minimal MQTT 3.1.1 packet codec.
+================================
+
+Just enough of the protocol for a publisher talking to Adafruit IO (and for
+the local broker stand-in used by the tests and benchmarks): CONNECT,
+CONNACK, PUBLISH, PUBACK, SUBSCRIBE, SUBACK, PINGREQ, PINGRESP, DISCONNECT.
+
+Packets are built as ``bytes`` and read from an ``asyncio.StreamReader``
+with ``read_packet()``, which returns ``(packet_type, flags, body)``.
+"""
+
+import struct
+
+
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+SUBSCRIBE = 8
+SUBACK = 9
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+PROTOCOL_NAME = b"MQTT"
+PROTOCOL_LEVEL = 4  # 3.1.1
+
+# CONNACK return codes
+CONNACK_ACCEPTED = 0
+CONNACK_REASONS = {
+    1: "unacceptable protocol version",
+    2: "identifier rejected",
+    3: "server unavailable",
+    4: "bad user name or password",
+    5: "not authorized",
+}
+
+MAX_REMAINING_LENGTH = 268435455
+
+_U16 = struct.Struct("!H")
+
+
+class MQTTProtocolError(Exception):
+    """Raised on a malformed or unexpected packet."""
+
+
+# ---------------------------------------------------------------------------
+# Encoding helpers
+# ---------------------------------------------------------------------------
+def _remaining_length(n):
+    if n > MAX_REMAINING_LENGTH:
+        raise MQTTProtocolError(f"Packet too large ({n} bytes)")
+    out = bytearray()
+    while True:
+        byte = n % 128
+        n //= 128
+        if n:
+            byte |= 0x80
+        out.append(byte)
+        if not n:
+            return bytes(out)
+
+
+def _string(value):
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return _U16.pack(len(value)) + value
+
+
+def _packet(packet_type, flags, body):
+    return bytes([(packet_type << 4) | flags]) + _remaining_length(len(body)) + body
+
+
+# ---------------------------------------------------------------------------
+# Packet builders
+# ---------------------------------------------------------------------------
+def connect(client_id, username=None, password=None, keepalive=60, clean_session=True):
+    flags = 0x02 if clean_session else 0
+    payload = _string(client_id)
+    if username is not None:
+        flags |= 0x80
+        payload += _string(username)
+    if password is not None:
+        flags |= 0x40
+        payload += _string(password)
+    header = _string(PROTOCOL_NAME) + bytes([PROTOCOL_LEVEL, flags]) + _U16.pack(keepalive)
+    return _packet(CONNECT, 0, header + payload)
+
+
+def connack(return_code=CONNACK_ACCEPTED, session_present=False):
+    return _packet(CONNACK, 0, bytes([1 if session_present else 0, return_code]))
+
+
+def publish(topic, payload, qos=0, packet_id=None, dup=False, retain=False):
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    flags = (0x08 if dup else 0) | (qos << 1) | (0x01 if retain else 0)
+    body = _string(topic)
+    if qos:
+        if packet_id is None:
+            raise MQTTProtocolError("QoS > 0 PUBLISH needs a packet id")
+        body += _U16.pack(packet_id)
+    return _packet(PUBLISH, flags, body + payload)
+
+
+def puback(packet_id):
+    return _packet(PUBACK, 0, _U16.pack(packet_id))
+
+
+def subscribe(packet_id, topics):
+    """``topics`` is a list of ``(topic_filter, qos)``."""
+    body = _U16.pack(packet_id)
+    for topic, qos in topics:
+        body += _string(topic) + bytes([qos])
+    return _packet(SUBSCRIBE, 0x02, body)
+
+
+def suback(packet_id, granted):
+    return _packet(SUBACK, 0, _U16.pack(packet_id) + bytes(granted))
+
+
+def pingreq():
+    return _packet(PINGREQ, 0, b"")
+
+
+def pingresp():
+    return _packet(PINGRESP, 0, b"")
+
+
+def disconnect():
+    return _packet(DISCONNECT, 0, b"")
+
+
+# ---------------------------------------------------------------------------
+# Reading and parsing
+# ---------------------------------------------------------------------------
+async def read_packet(reader):
+    """Read one packet. Returns ``(packet_type, flags, body)``."""
+    first = await reader.readexactly(1)
+    length = 0
+    multiplier = 1
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length += (byte & 0x7F) * multiplier
+        if not byte & 0x80:
+            break
+        multiplier *= 128
+        if multiplier > 128 ** 3:
+            raise MQTTProtocolError("Malformed remaining length")
+    body = await reader.readexactly(length) if length else b""
+    return first[0] >> 4, first[0] & 0x0F, body
+
+
+def _read_string(body, pos):
+    (size,) = _U16.unpack_from(body, pos)
+    start = pos + _U16.size
+    return bytes(body[start:start + size]), start + size
+
+
+def parse_connect(body):
+    """Return a dict with client_id, username, password, keepalive."""
+    name, pos = _read_string(body, 0)
+    if name != PROTOCOL_NAME:
+        raise MQTTProtocolError(f"Unsupported protocol name {name!r}")
+    level, flags = body[pos], body[pos + 1]
+    (keepalive,) = _U16.unpack_from(body, pos + 2)
+    pos += 4
+    client_id, pos = _read_string(body, pos)
+    if flags & 0x04:  # will topic + will message
+        _, pos = _read_string(body, pos)
+        _, pos = _read_string(body, pos)
+    username = password = None
+    if flags & 0x80:
+        raw, pos = _read_string(body, pos)
+        username = raw.decode("utf-8")
+    if flags & 0x40:
+        raw, pos = _read_string(body, pos)
+        password = raw.decode("utf-8")
+    return {
+        "level": level,
+        "client_id": client_id.decode("utf-8"),
+        "username": username,
+        "password": password,
+        "keepalive": keepalive,
+        "clean_session": bool(flags & 0x02),
+    }
+
+
+def parse_connack(body):
+    """Return ``(session_present, return_code)``."""
+    if len(body) != 2:
+        raise MQTTProtocolError("Malformed CONNACK")
+    return bool(body[0] & 0x01), body[1]
+
+
+def parse_publish(flags, body):
+    """Return ``(topic, payload, qos, packet_id, dup)``."""
+    qos = (flags >> 1) & 0x03
+    raw_topic, pos = _read_string(body, 0)
+    packet_id = None
+    if qos:
+        (packet_id,) = _U16.unpack_from(body, pos)
+        pos += _U16.size
+    return raw_topic.decode("utf-8"), bytes(body[pos:]), qos, packet_id, bool(flags & 0x08)
+
+
+def parse_packet_id(body):
+    """Packet id of a PUBACK / SUBACK."""
+    return _U16.unpack_from(body, 0)[0]
+
+
+def parse_subscribe(body):
+    """Return ``(packet_id, [(topic_filter, qos), ...])``."""
+    (packet_id,) = _U16.unpack_from(body, 0)
+    pos = _U16.size
+    topics = []
+    while pos < len(body):
+        raw, pos = _read_string(body, pos)
+        topics.append((raw.decode("utf-8"), body[pos]))
+        pos += 1
+    return packet_id, topics
@@ -0,0 +1,384 @@
+"""
+Disk-backed persistent outbox.
+==============================
+
+The in-memory buffer is lost when the Pi reboots during an outage. Outbox is
+an append-only log of fixed-size, memory-mapped segment files that
+``publish_or_buffer()`` writes to and ``flush_buffer()`` replays from:
+
+    .outbox/
+        00000000000000000000.seg    oldest segment still holding unacked data
+        00000000000001048576.seg    active segment (appends go here)
+        cursor                      offset of the first unacknowledged record
+
+Every record is ``length | crc32 | payload`` so a torn write at power loss is
+detected and discarded on the next start. Offsets are logical byte positions
+across the whole log (segment base + position in the segment).
+
+SD cards wear out with small writes, so durability is batched (group commit):
+appends only touch the page cache, and ``commit()`` syncs the dirty range and
+the cursor once every ``sync_every`` records or ``sync_interval`` seconds,
+whichever comes first. A crash loses at most one commit window, and a cursor
+that lags behind after a crash only causes re-delivery (at-least-once).
+
+Fully acknowledged segments are deleted (compaction) as the cursor advances.
+
+Records carry both the monotonic and the wall-clock time the sample was
+taken. ``head_stamped()`` derives the wall time from the monotonic one for
+records written by this process (right even if NTP set the clock after the
+sample was taken) and falls back to the stored wall time for records from a
+previous run.
+"""
+
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+
+from publisher.ring_buffer import wall_time
+
+
+SEGMENT_MAGIC = b"F5OB"
+FORMAT_VERSION = 1
+
+DEFAULT_SEGMENT_SIZE = 1 << 20   # 1 MiB, ~40k samples
+DEFAULT_SYNC_EVERY = 64          # records per group commit
+DEFAULT_SYNC_INTERVAL = 5.0      # seconds
+
+_SEGMENT_HEADER = struct.Struct("<4sB3x")
+_RECORD_HEADER = struct.Struct("<II")    # payload length, crc32(payload)
+_PAYLOAD = struct.Struct("<dddH")        # value, monotonic, wall time, key length (key follows)
+_SEGMENT_SUFFIX = ".seg"
+_CURSOR_NAME = "cursor"
+
+
+class OutboxError(Exception):
+    """Raised when the on-disk log cannot be used."""
+
+
+def _encode(feed, value, stamp, wall):
+    key = feed.encode("utf-8")
+    payload = _PAYLOAD.pack(value, stamp, wall, len(key)) + key
+    return _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _decode(payload):
+    """Return ``(feed, value, monotonic, wall)``."""
+    value, stamp, wall, key_len = _PAYLOAD.unpack_from(payload)
+    start = _PAYLOAD.size
+    return bytes(payload[start:start + key_len]).decode("utf-8"), value, stamp, wall
+
+
+# ---------------------------------------------------------------------------
+# Outbox
+# ---------------------------------------------------------------------------
+class Outbox:
+    """Append-only segment log with an acknowledged-offset cursor."""
+
+    def __init__(self, path, segment_size=DEFAULT_SEGMENT_SIZE, sync_every=DEFAULT_SYNC_EVERY,
+                 sync_interval=DEFAULT_SYNC_INTERVAL, clock=time.monotonic, wall_clock=time.time):
+        if segment_size < _SEGMENT_HEADER.size + _RECORD_HEADER.size + _PAYLOAD.size + 256:
+            raise ValueError(f"segment_size too small: {segment_size}")
+
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._clock = clock
+        self._wall_clock = wall_clock
+
+        self._maps = {}            # segment base -> (file object, mmap)
+        self._unsynced = 0         # appends + acks since the last commit
+        self._dirty_from = None    # first unsynced byte in the active segment
+        self._cursor_dirty = False
+        self._last_sync = clock()
+
+        # Counters
+        self.appended = 0
+        self.commits = 0
+
+        bases = self._segment_bases()
+        if not bases:
+            self._create_segment(0)
+            bases = [0]
+        self._write_base = bases[-1]
+        self._write_pos = self._recover(self._write_base)
+        # Monotonic stamps are only meaningful for records written from here on
+        self._session_start = self.end
+
+        first = bases[0] + _SEGMENT_HEADER.size
+        self._cursor = max(self._load_cursor(first), first)
+        self._count = sum(1 for _ in self.replay())
+
+    # -- Introspection -----------------------------------------------------
+    def __len__(self):
+        """Number of unacknowledged records."""
+        return self._count
+
+    @property
+    def cursor(self):
+        return self._cursor
+
+    @property
+    def end(self):
+        """Logical offset one past the last appended record."""
+        return self._write_base + self._write_pos
+
+    def stats(self):
+        return {
+            "size": self._count,
+            "appended": self.appended,
+            "commits": self.commits,
+            "segments": len(self._segment_bases()),
+            "backlog_bytes": self.end - self._cursor,
+        }
+
+    # -- Producer side -----------------------------------------------------
+    def append(self, feed, value, stamp=None):
+        """
+        Append one sample taken at monotonic time ``stamp`` (default: now).
+        Durable after the next commit.
+        """
+        if stamp is None:
+            stamp = self._clock()
+        record = _encode(feed, value, stamp, wall_time(stamp, self._clock, self._wall_clock))
+        if _SEGMENT_HEADER.size + len(record) > self.segment_size:
+            raise ValueError(f"A {len(record)}-byte record does not fit in a "
+                             f"{self.segment_size}-byte segment; use a shorter feed key")
+        if self._write_pos + len(record) > self.segment_size:
+            self._rotate()
+
+        mm = self._map(self._write_base)
+        mm[self._write_pos:self._write_pos + len(record)] = record
+        if self._dirty_from is None:
+            self._dirty_from = self._write_pos
+        self._write_pos += len(record)
+
+        self._count += 1
+        self.appended += 1
+        self._note_write()
+        return True
+
+    # -- Consumer side -----------------------------------------------------
+    def peek(self):
+        """Return the oldest unacknowledged sample."""
+        record = self._read(self._cursor)
+        if record is None:
+            raise IndexError("peek from an empty Outbox")
+        return record[2]
+
+    def popleft(self):
+        """Acknowledge and return the oldest unacknowledged sample."""
+        record = self._read(self._cursor)
+        if record is None:
+            raise IndexError("popleft from an empty Outbox")
+        self._advance(record[1], 1)
+        return record[2]
+
+    def replay(self, limit=None):
+        """
+        Yield ``(position, feed, value)`` for unacknowledged records.
+
+        ``position`` is the cursor value just after the record: pass it to
+        ``ack()`` once the sample has been delivered. Replay does not move
+        the cursor by itself.
+        """
+        offset = self._cursor
+        count = 0
+        while limit is None or count < limit:
+            record = self._read(offset)
+            if record is None:
+                return
+            _, offset, (feed, value), _ = record
+            yield offset, feed, value
+            count += 1
+
+    def ack(self, position):
+        """Acknowledge every record before ``position``."""
+        if position <= self._cursor:
+            return
+        if position > self.end:
+            raise ValueError(f"Cannot ack past the end of the log ({position} > {self.end})")
+        acked = 0
+        offset = self._cursor
+        while offset < position:
+            record = self._read(offset)
+            if record is None:
+                break
+            offset = record[1]
+            acked += 1
+        self._advance(offset, acked)
+
+    def head(self, n):
+        """Return up to ``n`` of the oldest unacknowledged samples."""
+        return [(feed, value) for _, feed, value in self.replay(limit=n)]
+
+    def head_stamped(self, n):
+        """
+        Return up to ``n`` of the oldest unacknowledged samples as
+        ``(time, feed, value)``.
+        """
+        out = []
+        offset = self._cursor
+        while len(out) < n:
+            record = self._read(offset)
+            if record is None:
+                break
+            start, offset, (feed, value), (stamp, wall) = record
+            if start >= self._session_start:
+                wall = wall_time(stamp, self._clock, self._wall_clock)
+            out.append((wall, feed, value))
+        return out
+
+    def discard(self, n):
+        """Acknowledge up to ``n`` of the oldest records."""
+        position = None
+        for position, _, _ in self.replay(limit=n):
+            pass
+        if position is not None:
+            self.ack(position)
+
+    # -- Durability --------------------------------------------------------
+    def commit(self):
+        """Sync pending appends and the cursor to disk (one group commit)."""
+        if self._dirty_from is not None:
+            page = self._dirty_from - self._dirty_from % mmap.ALLOCATIONGRANULARITY
+            self._map(self._write_base).flush(page, self._write_pos - page)
+            self._dirty_from = None
+        if self._cursor_dirty:
+            self._store_cursor()
+            self._cursor_dirty = False
+        self._unsynced = 0
+        self._last_sync = self._clock()
+        self.commits += 1
+
+    def compact(self):
+        """Delete segments whose records have all been acknowledged."""
+        for base in self._segment_bases():
+            if base == self._write_base or base + self.segment_size > self._cursor:
+                break
+            self._close_map(base)
+            self._segment_path(base).unlink()
+
+    def close(self):
+        self.commit()
+        for base in list(self._maps):
+            self._close_map(base)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- Internals ---------------------------------------------------------
+    def _note_write(self):
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or self._clock() - self._last_sync >= self.sync_interval:
+            self.commit()
+
+    def _advance(self, offset, acked):
+        old_segment = self._cursor - self._cursor % self.segment_size
+        self._cursor = offset
+        self._count -= acked
+        self._cursor_dirty = True
+        if offset - offset % self.segment_size != old_segment:
+            self.compact()
+        self._note_write()
+
+    def _read(self, offset):
+        """
+        Return ``(offset, end, (feed, value), (monotonic, wall))`` of the
+        record at ``offset``, or None.
+        """
+        while offset < self.end:
+            base = offset - offset % self.segment_size
+            pos = offset - base
+            if pos < _SEGMENT_HEADER.size:
+                offset = base + _SEGMENT_HEADER.size
+                continue
+            mm = self._map(base)
+            if pos + _RECORD_HEADER.size <= self.segment_size:
+                length, crc = _RECORD_HEADER.unpack_from(mm, pos)
+                if length:
+                    start = pos + _RECORD_HEADER.size
+                    payload = mm[start:start + length]
+                    if zlib.crc32(payload) != crc:
+                        raise OutboxError(f"Corrupt record at offset {offset}")
+                    feed, value, stamp, wall = _decode(payload)
+                    return offset, base + start + length, (feed, value), (stamp, wall)
+            # Unused tail of a rotated segment: continue in the next one
+            offset = base + self.segment_size
+        return None
+
+    def _recover(self, base):
+        """Find the write position of ``base``, discarding a torn last record."""
+        mm = self._map(base)
+        magic, version = _SEGMENT_HEADER.unpack_from(mm, 0)
+        if magic != SEGMENT_MAGIC or version != FORMAT_VERSION:
+            raise OutboxError(f"{self._segment_path(base)} is not an outbox segment (v{FORMAT_VERSION})")
+
+        pos = _SEGMENT_HEADER.size
+        while pos + _RECORD_HEADER.size <= self.segment_size:
+            length, crc = _RECORD_HEADER.unpack_from(mm, pos)
+            start = pos + _RECORD_HEADER.size
+            if not length or start + length > self.segment_size:
+                break
+            if zlib.crc32(mm[start:start + length]) != crc:
+                break
+            pos = start + length
+
+        if pos + _RECORD_HEADER.size <= self.segment_size and any(mm[pos:pos + _RECORD_HEADER.size]):
+            # Torn write: clear it so later appends are not followed by garbage
+            mm[pos:] = bytes(self.segment_size - pos)
+            mm.flush()
+        return pos
+
+    def _rotate(self):
+        self.commit()
+        self._close_map(self._write_base)
+        self._write_base += self.segment_size
+        self._create_segment(self._write_base)
+        self._write_pos = _SEGMENT_HEADER.size
+
+    def _create_segment(self, base):
+        with open(self._segment_path(base), "wb") as f:
+            f.write(_SEGMENT_HEADER.pack(SEGMENT_MAGIC, FORMAT_VERSION))
+            f.truncate(self.segment_size)
+
+    def _segment_path(self, base):
+        return self.path / f"{base:020d}{_SEGMENT_SUFFIX}"
+
+    def _segment_bases(self):
+        return sorted(int(p.stem) for p in self.path.glob(f"*{_SEGMENT_SUFFIX}"))
+
+    def _map(self, base):
+        entry = self._maps.get(base)
+        if entry is None:
+            f = open(self._segment_path(base), "r+b")
+            entry = (f, mmap.mmap(f.fileno(), self.segment_size))
+            self._maps[base] = entry
+        return entry[1]
+
+    def _close_map(self, base):
+        entry = self._maps.pop(base, None)
+        if entry is not None:
+            entry[1].close()
+            entry[0].close()
+
+    def _load_cursor(self, default):
+        try:
+            return int((self.path / _CURSOR_NAME).read_text())
+        except (FileNotFoundError, ValueError):
+            return default
+
+    def _store_cursor(self):
+        tmp = self.path / (_CURSOR_NAME + ".tmp")
+        with open(tmp, "w") as f:
+            f.write(str(self._cursor))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path / _CURSOR_NAME)
@@ -0,0 +1,101 @@
+"""
+Publish rate limiting.
+======================
+
+Adafruit IO counts every data point against a per-minute quota and throttles
+(then disconnects) clients that exceed it. A TokenBucket refills at the
+account's rate and is shared by live publishing and backlog drain, so a
+reconnect never bursts the whole backlog at once.
+
+    bucket = TokenBucket.for_tier("free")   # 30 data points/minute
+    if bucket.try_acquire():
+        client.publish(feed, value)
+"""
+
+import math
+import time
+
+
+# Data points per minute per account tier
+TIERS = {
+    "free": 30,
+    "plus": 60,
+}
+
+# Stay slightly under the quota: the server counts over a sliding minute
+DEFAULT_HEADROOM = 0.9
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, at most ``burst`` stored."""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError(f"rate must be > 0, got {rate}")
+        if burst < 1:
+            raise ValueError(f"burst must be >= 1, got {burst}")
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._stamp = clock()
+
+        # Counters
+        self.granted = 0
+        self.refused = 0
+
+    @classmethod
+    def for_tier(cls, tier, headroom=DEFAULT_HEADROOM, clock=time.monotonic):
+        """
+        Build a bucket for an Adafruit IO account tier (see TIERS).
+
+        The burst is the headroom left by the refill rate, so burst plus a
+        minute of refill never exceeds the quota in any sliding minute.
+        """
+        try:
+            per_minute = TIERS[tier]
+        except KeyError:
+            raise ValueError(f"Unknown tier {tier!r}, expected one of {sorted(TIERS)}") from None
+        burst = max(1, round(per_minute * (1 - headroom)))
+        return cls(per_minute * headroom / 60.0, burst=burst, clock=clock)
+
+    @property
+    def tokens(self):
+        """Tokens currently available (refilled up to now)."""
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, n=1):
+        """Take ``n`` tokens if available. Never blocks."""
+        self._refill()
+        if self._tokens >= n:
+            self._tokens -= n
+            self.granted += n
+            return True
+        self.refused += n
+        return False
+
+    def wait_time(self, n=1):
+        """Seconds until ``n`` tokens will be available."""
+        self._refill()
+        missing = n - self._tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def time_for(self, count, reserved_rate=0.0):
+        """
+        Seconds needed to spend ``count`` tokens when ``reserved_rate``
+        tokens/second are already taken by other traffic.
+        """
+        available = self.rate - reserved_rate
+        if count <= 0:
+            return 0.0
+        if available <= 0:
+            return math.inf
+        return max(0.0, count - self.tokens) / available
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self._stamp
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._stamp = now
@@ -0,0 +1,211 @@
+"""
+Non-blocking reconnect supervisor.
+==================================
+
+``reconnect_with_backoff()`` in the README sleeps in a loop until connected.
+Called from ``disconnected()`` it stalls the MQTT network thread for up to
+``MAX_DELAY`` seconds per attempt. ReconnectSupervisor schedules attempts on
+a timer instead and returns immediately, so sampling and buffering go on.
+
+    IDLE --start()--> CONNECTING --connection_made()--> CONNECTED
+                        ^   |                               |
+                        |   v  connect() raised             | connection_lost()
+                        WAITING <---------------------------+
+
+Retry delays use exponential backoff with full jitter: attempt ``n`` waits a
+random delay in ``[0, min(MAX_DELAY, MIN_DELAY * 2**(n-1))]`` so a fleet of
+Pis does not reconnect in lockstep after a broker outage. The attempt counter
+resets once a connection has stayed up for ``stable_after`` seconds.
+
+The scheduler is anything with ``time()`` and ``call_later(delay, callback)``
+returning a cancellable handle: an asyncio event loop, or ThreadScheduler
+for scripts using ``loop_background()``.
+
+Usage:
+    client = MQTTClient(ADAFRUIT_IO_USERNAME, ADAFRUIT_IO_KEY)
+    publisher = BufferedPublisher(client)
+    supervisor = ReconnectSupervisor(client.connect)
+    supervisor.attach(client)
+    supervisor.start()
+    client.loop_background()
+"""
+
+import random
+import threading
+import time
+
+
+# Backoff constants
+MIN_DELAY = 1
+MAX_DELAY = 120
+STABLE_AFTER = 60      # seconds connected before the backoff resets
+CONNECT_TIMEOUT = 30   # seconds to wait for on_connect after connect()
+
+IDLE = "idle"
+CONNECTING = "connecting"
+CONNECTED = "connected"
+WAITING = "waiting"
+STOPPED = "stopped"
+
+
+def full_jitter(attempt, min_delay=MIN_DELAY, max_delay=MAX_DELAY, rng=random):
+    """Delay before retry number ``attempt`` (1-based), with full jitter."""
+    cap = min(max_delay, min_delay * 2 ** max(0, attempt - 1))
+    return rng.uniform(0, cap)
+
+
+# ---------------------------------------------------------------------------
+# Schedulers
+# ---------------------------------------------------------------------------
+class ThreadScheduler:
+    """call_later() on daemon timer threads, for loop_background() scripts."""
+
+    def time(self):
+        return time.monotonic()
+
+    def call_later(self, delay, callback):
+        timer = threading.Timer(delay, callback)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+
+# ---------------------------------------------------------------------------
+# Supervisor
+# ---------------------------------------------------------------------------
+class ReconnectSupervisor:
+    """Drive reconnection attempts from a timer, never blocking the caller."""
+
+    def __init__(self, connect, scheduler=None, min_delay=MIN_DELAY, max_delay=MAX_DELAY,
+                 stable_after=STABLE_AFTER, connect_timeout=CONNECT_TIMEOUT, rng=None):
+        self._connect = connect
+        self.scheduler = scheduler if scheduler is not None else ThreadScheduler()
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.connect_timeout = connect_timeout
+        self._rng = rng if rng is not None else random.Random()
+        self._lock = threading.Lock()
+        self._timer = None
+
+        # Observable state
+        self.state = IDLE
+        self.attempts = 0          # consecutive attempts since the last stable connection
+        self.next_retry_at = None
+        self.last_error = None
+        self.connects = 0
+        self.total_attempts = 0
+
+    # -- Control -----------------------------------------------------------
+    def start(self):
+        """Make the first attempt as soon as possible."""
+        with self._lock:
+            if self.state in (IDLE, STOPPED):
+                self._schedule(0.0, self._attempt)
+
+    def stop(self):
+        with self._lock:
+            self._cancel()
+            self.state = STOPPED
+            self.next_retry_at = None
+
+    def attach(self, client):
+        """Chain into ``client.on_connect`` / ``client.on_disconnect``."""
+        on_connect, on_disconnect = client.on_connect, client.on_disconnect
+
+        def connected(c, *args):
+            self.connection_made()
+            if on_connect is not None:
+                on_connect(c, *args)
+
+        def disconnected(c, *args):
+            if on_disconnect is not None:
+                on_disconnect(c, *args)
+            self.connection_lost()
+
+        client.on_connect = connected
+        client.on_disconnect = disconnected
+
+    # -- Events ------------------------------------------------------------
+    def connection_made(self):
+        with self._lock:
+            if self.state == STOPPED:
+                return
+            self._cancel()
+            self.state = CONNECTED
+            self.connects += 1
+            self.next_retry_at = None
+            self._schedule(self.stable_after, self._stable)
+
+    def connection_lost(self, error=None):
+        with self._lock:
+            if self.state == STOPPED:
+                return
+            if error is not None:
+                self.last_error = error
+            self._cancel()
+            self._retry_later()
+
+    def status(self):
+        """Snapshot of the state machine, safe to log or export."""
+        with self._lock:
+            now = self.scheduler.time()
+            return {
+                "state": self.state,
+                "attempts": self.attempts,
+                "total_attempts": self.total_attempts,
+                "connects": self.connects,
+                "next_retry_at": self.next_retry_at,
+                "next_retry_in": None if self.next_retry_at is None else max(0.0, self.next_retry_at - now),
+                "last_error": None if self.last_error is None else repr(self.last_error),
+            }
+
+    # -- Internals (called with the lock held, or from timers) -------------
+    def _attempt(self):
+        with self._lock:
+            if self.state in (CONNECTED, STOPPED):
+                return
+            self._timer = None
+            self.state = CONNECTING
+            self.next_retry_at = None
+            self.attempts += 1
+            self.total_attempts += 1
+        # Outside the lock: connect() may block and may call connection_made()
+        try:
+            self._connect()
+        except Exception as e:
+            with self._lock:
+                self.last_error = e
+                if self.state == CONNECTING:
+                    self._retry_later()
+            return
+        with self._lock:
+            if self.state == CONNECTING:
+                self._schedule(self.connect_timeout, self._timed_out)
+
+    def _timed_out(self):
+        with self._lock:
+            if self.state == CONNECTING:
+                self.last_error = TimeoutError(f"No on_connect within {self.connect_timeout}s")
+                self._retry_later()
+
+    def _stable(self):
+        with self._lock:
+            if self.state == CONNECTED:
+                self.attempts = 0
+
+    def _retry_later(self):
+        delay = full_jitter(max(1, self.attempts), self.min_delay, self.max_delay, self._rng)
+        self.state = WAITING
+        self._schedule(delay, self._attempt)
+
+    def _schedule(self, delay, callback):
+        self._cancel()
+        if callback == self._attempt:
+            self.next_retry_at = self.scheduler.time() + delay
+        self._timer = self.scheduler.call_later(delay, callback)
+
+    def _cancel(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -0,0 +1,146 @@
+"""
+REST bulk upload.
+=================
+
+MQTT moves one sample per message. When the broker throttles us, or the
+MQTT port is blocked while HTTPS still works, the backlog can instead be
+posted to Adafruit IO's batch endpoint, hundreds of samples per request:
+
+    POST /api/v2/{username}/feeds/{feed}/data/batch
+    X-AIO-Key: {key}
+    [{"value": 21.5, "created_at": "..."}, ...]
+
+This is the endpoint ``Adafruit_IO.Client.send_batch_data()`` calls, with
+the same URL and headers, but the library opens a new TCP + TLS connection
+for every call (``requests.post()``). RestUploader keeps one HTTP/1.1
+keep-alive connection per uploader and reopens it only when the server
+closes it, which is most of the cost of a small request on a Pi.
+
+    uploader = RestUploader(ADAFRUIT_IO_USERNAME, ADAFRUIT_IO_KEY)
+    publisher = BufferedPublisher(client, rest=uploader, rest_threshold=500)
+
+BufferedPublisher then drains through REST while MQTT is down or while the
+backlog is above ``rest_threshold`` samples. Use ``publisher.local_broker``'s
+LocalRestServer to test without an account.
+"""
+
+import http.client
+import json
+from urllib.parse import urlsplit
+
+from publisher.encoding import BatchEncoder
+
+
+ADAFRUIT_IO_URL = "https://io.adafruit.com"
+
+DEFAULT_TIMEOUT = 10
+
+
+class RestError(Exception):
+    """The server answered with an error status."""
+
+    def __init__(self, status, reason, retry_after=None):
+        super().__init__(f"HTTP {status} {reason}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RestUploader:
+    """Talk to the Adafruit IO REST API over one keep-alive connection."""
+
+    def __init__(self, username, key, base_url=ADAFRUIT_IO_URL, timeout=DEFAULT_TIMEOUT,
+                 batch_size=None):
+        url = urlsplit(base_url)
+        if url.scheme not in ("http", "https"):
+            raise ValueError(f"base_url must be http:// or https://, got {base_url!r}")
+        self.username = username
+        self.key = key
+        self.timeout = timeout
+        self.encoder = BatchEncoder() if batch_size is None else BatchEncoder(batch_size)
+        self._secure = url.scheme == "https"
+        self._host = url.hostname
+        self._port = url.port
+        self._prefix = url.path.rstrip("/")
+        self._conn = None
+
+        # Counters
+        self.requests = 0
+        self.uploaded = 0
+        self.connections = 0
+
+    @property
+    def batch_size(self):
+        return self.encoder.max_batch
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- Upload ------------------------------------------------------------
+    def send_batch(self, feed, samples):
+        """
+        Upload ``(timestamp, value)`` samples of one feed, in batches of
+        ``batch_size``. Returns the number of samples sent; raises RestError,
+        OSError, http.client.HTTPException or ValueError (unreadable body),
+        in which case earlier batches of this call may have been stored
+        already.
+        """
+        samples = list(samples)
+        path = f"{self._prefix}/api/v2/{self.username}/feeds/{feed}/data/batch"
+        for start in range(0, len(samples), self.batch_size):
+            chunk = samples[start:start + self.batch_size]
+            [(_, body)] = self.encoder.encode(feed, chunk)
+            self._request("POST", path, body.encode())
+            self.uploaded += len(chunk)
+        return len(samples)
+
+    def feeds(self):
+        """Return the account's feeds (``GET /api/v2/{username}/feeds``)."""
+        return self._request("GET", f"{self._prefix}/api/v2/{self.username}/feeds")
+
+    def _request(self, method, path, body=None):
+        headers = {
+            "X-AIO-Key": self.key,
+            "Connection": "keep-alive",
+        }
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # The server closed the idle keep-alive connection: reopen once
+                self.close()
+                if attempt == 2:
+                    raise
+                continue
+            except BaseException:
+                # Timeout or other failure mid-request: the connection still
+                # holds a request without its response, start over next time
+                self.close()
+                raise
+            self.requests += 1
+            if response.will_close:
+                self.close()
+            if response.status >= 400:
+                retry_after = response.getheader("Retry-After")
+                raise RestError(response.status, response.reason,
+                                float(retry_after) if retry_after else None)
+            return json.loads(payload) if payload else None
+
+    def _connection(self):
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self._secure else http.client.HTTPConnection
+            self._conn = cls(self._host, self._port, timeout=self.timeout)
+            self.connections += 1
+        return self._conn
@@ -0,0 +1,263 @@
+"""
+Bounded offline buffer for the publisher.
+=========================================
+
+The README design appends ``(feed, value)`` tuples to a plain list while the
+client is disconnected. Each tuple costs ~100 bytes of Python objects and the
+list never stops growing, so a long outage ends with the process OOM-killed.
+
+RingBuffer stores samples in preallocated ``array`` storage (8 bytes per value,
+8 per timestamp and 2 per feed id) and applies an overflow policy once it is
+full:
+
+    drop-oldest   Overwrite the oldest sample (default, keeps recent data)
+    drop-newest   Refuse the incoming sample (keeps the start of the outage)
+    downsample    Merge pairs of samples of the same feed into their mean,
+                  halving the resolution of what is already buffered
+
+Memory use is fixed at construction time whatever the outage length.
+
+Each sample keeps the monotonic time it was taken at. ``head_stamped()``
+turns it into wall-clock time when the sample is read, with the clock offset
+of that moment: a Pi without an RTC often buffers before NTP has set the
+date, and the stamps are still right once it has.
+"""
+
+import time
+from array import array
+from itertools import islice
+
+
+DROP_OLDEST = "drop-oldest"
+DROP_NEWEST = "drop-newest"
+DOWNSAMPLE = "downsample"
+
+POLICIES = (DROP_OLDEST, DROP_NEWEST, DOWNSAMPLE)
+
+MAX_FEEDS = 0xFFFF
+
+
+def wall_time(stamp, clock=time.monotonic, wall_clock=time.time):
+    """Wall-clock (Unix) time of the monotonic time ``stamp``."""
+    return wall_clock() - (clock() - stamp)
+
+
+# ---------------------------------------------------------------------------
+# Feed interning
+# ---------------------------------------------------------------------------
+class FeedTable:
+    """Map feed keys to small integer ids so samples can live in an array."""
+
+    def __init__(self):
+        self._ids = {}
+        self._keys = []
+
+    def id_for(self, feed):
+        """Return the id of ``feed``, registering it on first use."""
+        feed_id = self._ids.get(feed)
+        if feed_id is None:
+            feed_id = len(self._keys)
+            if feed_id >= MAX_FEEDS:
+                raise ValueError(f"Too many distinct feeds (max {MAX_FEEDS})")
+            self._ids[feed] = feed_id
+            self._keys.append(feed)
+        return feed_id
+
+    def key(self, feed_id):
+        """Return the feed key registered under ``feed_id``."""
+        return self._keys[feed_id]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, feed):
+        return feed in self._ids
+
+
+# ---------------------------------------------------------------------------
+# Ring buffer
+# ---------------------------------------------------------------------------
+class RingBuffer:
+    """Fixed-capacity FIFO of ``(feed, value)`` samples."""
+
+    def __init__(self, capacity, policy=DROP_OLDEST, clock=time.monotonic, wall_clock=time.time):
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {POLICIES}")
+
+        self.capacity = capacity
+        self.policy = policy
+        self.feeds = FeedTable()
+        self._clock = clock
+        self._wall_clock = wall_clock
+
+        self._values = array("d", bytes(8 * capacity))
+        self._stamps = array("d", bytes(8 * capacity))
+        self._feed_ids = array("H", bytes(2 * capacity))
+        # Only downsampling needs to know how many raw samples a slot stands for
+        self._weights = array("I", bytes(4 * capacity)) if policy == DOWNSAMPLE else None
+
+        self._head = 0
+        self._size = 0
+
+        # Counters
+        self.appended = 0
+        self.dropped = 0
+        self.downsampled = 0
+
+    # -- Introspection -----------------------------------------------------
+    def __len__(self):
+        return self._size
+
+    @property
+    def full(self):
+        return self._size == self.capacity
+
+    @property
+    def nbytes(self):
+        """Bytes used by the sample storage (independent of the fill level)."""
+        total = self._values.itemsize * len(self._values)
+        total += self._stamps.itemsize * len(self._stamps)
+        total += self._feed_ids.itemsize * len(self._feed_ids)
+        if self._weights is not None:
+            total += self._weights.itemsize * len(self._weights)
+        return total
+
+    def stats(self):
+        """Return the buffer counters as a dict."""
+        return {
+            "size": self._size,
+            "capacity": self.capacity,
+            "appended": self.appended,
+            "dropped": self.dropped,
+            "downsampled": self.downsampled,
+        }
+
+    # -- Producer side -----------------------------------------------------
+    def append(self, feed, value, stamp=None):
+        """
+        Buffer one sample taken at monotonic time ``stamp`` (default: now).
+
+        Returns False when the sample was refused (drop-newest policy on a
+        full buffer), True otherwise.
+        """
+        feed_id = self.feeds.id_for(feed)
+
+        if self._size == self.capacity:
+            if self.policy == DROP_NEWEST:
+                self.dropped += 1
+                return False
+            if self.policy == DOWNSAMPLE:
+                self._downsample()
+            if self._size == self.capacity:
+                # drop-oldest, or downsampling found nothing to merge
+                self._head = (self._head + 1) % self.capacity
+                self._size -= 1
+                self.dropped += 1
+
+        slot = (self._head + self._size) % self.capacity
+        self._values[slot] = value
+        self._stamps[slot] = self._clock() if stamp is None else stamp
+        self._feed_ids[slot] = feed_id
+        if self._weights is not None:
+            self._weights[slot] = 1
+        self._size += 1
+        self.appended += 1
+        return True
+
+    # -- Consumer side -----------------------------------------------------
+    def peek(self):
+        """Return the oldest sample without removing it."""
+        if not self._size:
+            raise IndexError("peek from an empty RingBuffer")
+        head = self._head
+        return self.feeds.key(self._feed_ids[head]), self._values[head]
+
+    def popleft(self):
+        """Remove and return the oldest sample."""
+        sample = self.peek()
+        self._head = (self._head + 1) % self.capacity
+        self._size -= 1
+        return sample
+
+    def drain(self, limit=None):
+        """Yield and remove samples oldest first, at most ``limit`` of them."""
+        count = self._size if limit is None else min(limit, self._size)
+        for _ in range(count):
+            yield self.popleft()
+
+    def head(self, n):
+        """Return up to ``n`` of the oldest samples without removing them."""
+        return list(islice(self, n))
+
+    def head_stamped(self, n):
+        """
+        Return up to ``n`` of the oldest samples as ``(time, feed, value)``,
+        ``time`` being the wall-clock time the sample was taken.
+        """
+        offset = self._wall_clock() - self._clock()
+        out = []
+        for i in range(min(n, self._size)):
+            slot = (self._head + i) % self.capacity
+            out.append((self._stamps[slot] + offset, self.feeds.key(self._feed_ids[slot]),
+                        self._values[slot]))
+        return out
+
+    def discard(self, n):
+        """Remove up to ``n`` of the oldest samples."""
+        n = min(n, self._size)
+        self._head = (self._head + n) % self.capacity
+        self._size -= n
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+    def __iter__(self):
+        """Iterate over buffered samples oldest first without removing them."""
+        for i in range(self._size):
+            slot = (self._head + i) % self.capacity
+            yield self.feeds.key(self._feed_ids[slot]), self._values[slot]
+
+    # -- Overflow handling -------------------------------------------------
+    def _downsample(self):
+        """
+        Halve the resolution of the buffered data in place.
+
+        Consecutive samples of the same feed are merged pairwise into their
+        weighted mean (value and timestamp), so the order of samples within a feed is preserved
+        and the mean over any merged span is unchanged.
+        """
+        values, stamps, feed_ids, weights = self._values, self._stamps, self._feed_ids, self._weights
+        capacity = self.capacity
+
+        # Linearize so the compaction below can write from index 0
+        order = [(self._head + i) % capacity for i in range(self._size)]
+        lin_values = [values[s] for s in order]
+        lin_stamps = [stamps[s] for s in order]
+        lin_ids = [feed_ids[s] for s in order]
+        lin_weights = [weights[s] for s in order]
+
+        out = 0
+        open_slot = {}  # feed id -> output index waiting for a partner
+        merged = 0
+        for value, stamp, feed_id, weight in zip(lin_values, lin_stamps, lin_ids, lin_weights):
+            target = open_slot.pop(feed_id, None)
+            if target is not None:
+                total = weights[target] + weight
+                values[target] = (values[target] * weights[target] + value * weight) / total
+                stamps[target] = (stamps[target] * weights[target] + stamp * weight) / total
+                weights[target] = total
+                merged += 1
+                continue
+            values[out] = value
+            stamps[out] = stamp
+            feed_ids[out] = feed_id
+            weights[out] = weight
+            open_slot[feed_id] = out
+            out += 1
+
+        self._head = 0
+        self._size = out
+        self.downsampled += merged
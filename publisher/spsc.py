@@ -0,0 +1,76 @@
+"""
+Single-producer / single-consumer hand-off queue.
+=================================================
+
+A fixed-capacity ring of preallocated slots shared by exactly two threads:
+one producer that only calls ``push()`` and one consumer that only calls
+``pop()`` / ``drain()``. No lock is taken on either side.
+
+Hand-off protocol:
+
+    producer                              consumer
+    --------                              --------
+    1. read head (owned by consumer)      1. read tail (owned by producer)
+    2. full if tail - head == capacity    2. empty if head == tail
+    3. write the item into slot[tail]     3. read the item from slot[head]
+    4. publish: tail = tail + 1           4. clear slot[head]
+                                          5. release: head = head + 1
+
+``head`` and ``tail`` are ever-increasing counters, each written by one
+thread only. A slot is written before ``tail`` makes it visible and read
+before ``head`` gives it back, so an item is never seen twice or
+overwritten before it is consumed. This relies on CPython executing each
+attribute store atomically and in program order, which the GIL guarantees.
+
+Using the same queue from a second producer or consumer breaks the
+protocol: guard that side with a lock or give each thread its own queue.
+"""
+
+
+class SPSCQueue:
+    """Lock-free bounded FIFO for one producer thread and one consumer thread."""
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._head = 0  # items consumed, written by the consumer only
+        self._tail = 0  # items produced, written by the producer only
+
+        # Producer-side counter
+        self.rejected = 0
+
+    def __len__(self):
+        """Items currently queued (a snapshot when read from either side)."""
+        return self._tail - self._head
+
+    # -- Producer side -----------------------------------------------------
+    def push(self, item):
+        """Queue ``item``. Returns False, without blocking, if the queue is full."""
+        tail = self._tail
+        if tail - self._head >= self.capacity:
+            self.rejected += 1
+            return False
+        self._slots[tail % self.capacity] = item
+        self._tail = tail + 1
+        return True
+
+    # -- Consumer side -----------------------------------------------------
+    def pop(self):
+        """Remove and return the oldest item. Raises IndexError if empty."""
+        head = self._head
+        if head == self._tail:
+            raise IndexError("pop from an empty SPSCQueue")
+        index = head % self.capacity
+        item = self._slots[index]
+        self._slots[index] = None
+        self._head = head + 1
+        return item
+
+    def drain(self, limit=None):
+        """Pop and yield the items visible now, at most ``limit`` of them."""
+        available = self._tail - self._head
+        count = available if limit is None else min(limit, available)
+        for _ in range(count):
+            yield self.pop()
@@ -0,0 +1,330 @@
+"""
+Static analysis index for mqtt_publisher.py
+===========================================
+
+The milestone tests and ``validate_pi.py`` all ask questions about the same
+script: does it import Adafruit IO, which feeds does it publish to, is a
+backoff constant defined, is ``on_disconnect`` assigned... Instead of each
+check re-reading the file and scanning its text (where ``"buffer" in
+content.lower()`` also matches a comment or a print message), the script is
+parsed once into a ScriptIndex:
+
+    imports      modules imported (``Adafruit_IO``, ``os``, ...) and the
+                 names imported from them
+    calls        every call, with its dotted name (``client.publish``),
+                 literal arguments, line, enclosing function and whether it
+                 runs inside a loop
+    constants    names assigned a literal (``MIN_DELAY = 1``)
+    instances    names assigned a call's result (``client = MQTTClient(...)``)
+    callbacks    ``x.on_* = handler`` assignments (``on_connect``, ...)
+    functions    names of the functions defined
+    identifiers  every name, attribute, function and argument name
+    strings      every string literal
+
+Indexes are cached by the SHA-256 of the script, so the three milestone
+suites, ``validate_pi.py`` and the bulk grader parse each distinct script
+once per process; an unchanged file is not even re-read (its size and
+mtime are checked first).
+
+Usage:
+    from script_analysis import analyze
+
+    index = analyze(REPO_ROOT / "mqtt_publisher.py")   # None if missing
+    if index.syntax_error is None and index.has_call("publish"):
+        feeds = index.literal_args("publish")
+"""
+
+import ast
+import hashlib
+import os
+from collections import OrderedDict, namedtuple
+
+from secret_scan import find_secrets
+
+
+# Distinct scripts (and file stats) kept in memory (a cohort is a few hundred)
+CACHE_SIZE = 1024
+
+
+class _NonLiteral:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "NON_LITERAL"
+
+
+# Placeholder for an argument that is not a literal
+NON_LITERAL = _NonLiteral()
+
+Call = namedtuple("Call", "name attr args keywords lineno function in_loop")
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+class ScriptIndex:
+    """Everything the checks need to know about one script, from one parse."""
+
+    def __init__(self, source, path=None, sha256=None):
+        self.path = path
+        self.source = source
+        self.sha256 = sha256 or _sha256(source)
+        self.syntax_error = None        # (lineno, message) if the script does not parse
+        self.imports = set()            # dotted module names
+        self.imported_names = {}        # local name -> "module.name"
+        self.calls = []
+        self.constants = {}
+        self.instances = {}             # "client" -> "MQTTClient", also for self.client
+        self.callbacks = {}             # "on_connect" -> handler name
+        self.functions = set()
+        self.identifiers = set()
+        self.strings = set()
+        # Secrets anywhere in the text, comments included (masked, see secret_scan)
+        self.hardcoded_keys = [secret for _, _, secret in find_secrets(source)]
+
+        try:
+            tree = ast.parse(source, filename=str(path or "<script>"))
+        except SyntaxError as e:
+            self.syntax_error = (e.lineno, e.msg)
+        except ValueError as e:
+            # Null bytes in the source
+            self.syntax_error = (None, str(e))
+        else:
+            _Indexer(self).visit(tree)
+        self._by_attr = {}
+        for call in self.calls:
+            self._by_attr.setdefault(call.attr, []).append(call)
+        # Joined once so each mentions() is a single substring search
+        self._text = {"identifiers": "\n".join(sorted(self.identifiers)),
+                      "strings": "\n".join(sorted(self.strings))}
+        self._lower = {k: v.lower() for k, v in self._text.items()}
+
+    # -- Queries -----------------------------------------------------------
+    def imports_module(self, module, ignore_case=False):
+        """True if ``module`` or one of its submodules is imported."""
+        if ignore_case:
+            module = module.lower()
+        for name in self.imports:
+            name = name.lower() if ignore_case else name
+            if name == module or name.startswith(module + "."):
+                return True
+        return False
+
+    def calls_to(self, attr):
+        """Calls whose function's last name part is ``attr`` (``x.publish``, ``publish``)."""
+        return self._by_attr.get(attr, [])
+
+    def has_call(self, attr):
+        return attr in self._by_attr
+
+    def literal_args(self, attr, position=0, keyword=None):
+        """Literal values passed as argument ``position`` (or ``keyword``) to ``attr`` calls."""
+        values = []
+        for call in self.calls_to(attr):
+            if position < len(call.args):
+                value = call.args[position]
+            else:
+                value = call.keywords.get(keyword, NON_LITERAL) if keyword else NON_LITERAL
+            if value is not NON_LITERAL:
+                values.append(value)
+        return values
+
+    def mentions(self, text, ignore_case=False, strings=True):
+        """
+        True if ``text`` appears in an identifier or, with ``strings``, in a
+        string literal. Comments never count.
+        """
+        texts = self._lower if ignore_case else self._text
+        if ignore_case:
+            text = text.lower()
+        return text in texts["identifiers"] or (strings and text in texts["strings"])
+
+    def numeric_constants(self, suffix=""):
+        """``{name: value}`` of the int/float constants whose name ends with ``suffix``."""
+        return {name: value for name, value in self.constants.items()
+                if name.endswith(suffix) and isinstance(value, (int, float))
+                and not isinstance(value, bool)}
+
+
+class _Indexer(ast.NodeVisitor):
+    """Fills a ScriptIndex in one walk of the tree."""
+
+    def __init__(self, index):
+        self.index = index
+        self.function = None
+        self.loops = 0
+
+    # Imports
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.index.imports.add(alias.name)
+            self.index.identifiers.add(alias.asname or alias.name)
+
+    def visit_ImportFrom(self, node):
+        module = node.module or ""
+        self.index.imports.add(module)
+        for alias in node.names:
+            local = alias.asname or alias.name
+            self.index.imported_names[local] = f"{module}.{alias.name}"
+            self.index.identifiers.add(local)
+
+    # Definitions
+    def visit_FunctionDef(self, node):
+        self.index.functions.add(node.name)
+        self.index.identifiers.add(node.name)
+        for arg in ast.walk(node.args):
+            if isinstance(arg, ast.arg):
+                self.index.identifiers.add(arg.arg)
+        outer, outer_loops = self.function, self.loops
+        # A function defined in a loop does not run in it
+        self.function, self.loops = node.name, 0
+        self.generic_visit(node)
+        self.function, self.loops = outer, outer_loops
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self.index.identifiers.add(node.name)
+        self.generic_visit(node)
+
+    # Loops
+    def _loop(self, node):
+        self.loops += 1
+        self.generic_visit(node)
+        self.loops -= 1
+
+    visit_For = visit_AsyncFor = visit_While = _loop
+
+    # Assignments
+    def visit_Assign(self, node):
+        for target in node.targets:
+            self._assign(target, node.value)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        if node.value is not None:
+            self._assign(node.target, node.value)
+        self.generic_visit(node)
+
+    def _assign(self, target, value):
+        if isinstance(value, ast.Call) and isinstance(target, (ast.Name, ast.Attribute)):
+            name = target.id if isinstance(target, ast.Name) else target.attr
+            self.index.instances[name] = _dotted(value.func) or type(value.func).__name__.lower()
+        if isinstance(target, ast.Name):
+            literal = _literal(value)
+            if literal is not NON_LITERAL:
+                self.index.constants[target.id] = literal
+        elif isinstance(target, ast.Attribute) and target.attr.startswith("on_"):
+            self.index.callbacks[target.attr] = _dotted(value) or type(value).__name__.lower()
+
+    # Expressions
+    def visit_Call(self, node):
+        name = _dotted(node.func)
+        attr = name.rpartition(".")[2] if name else getattr(node.func, "attr", "")
+        self.index.calls.append(Call(
+            name=name,
+            attr=attr,
+            args=tuple(_literal(arg) for arg in node.args),
+            keywords={kw.arg: _literal(kw.value) for kw in node.keywords if kw.arg},
+            lineno=node.lineno,
+            function=self.function,
+            in_loop=self.loops > 0,
+        ))
+        self.generic_visit(node)
+
+    def visit_Name(self, node):
+        self.index.identifiers.add(node.id)
+
+    def visit_Attribute(self, node):
+        self.index.identifiers.add(node.attr)
+        self.generic_visit(node)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, str):
+            self.index.strings.add(node.value)
+
+
+def _sha256(source):
+    return hashlib.sha256(source.encode("utf-8", "surrogateescape")).hexdigest()
+
+
+def _dotted(node):
+    """``client.publish`` for an attribute chain of names, else None."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def _literal(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float, bool, type(None))):
+        return node.value
+    if (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub)
+            and isinstance(node.operand, ast.Constant)
+            and isinstance(node.operand.value, (int, float))):
+        return -node.operand.value
+    return NON_LITERAL
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+_by_stat = OrderedDict()    # (path, size, mtime_ns) -> sha256, least recently used first
+_by_hash = OrderedDict()    # sha256 -> ScriptIndex, least recently used first
+_stats = {"hits": 0, "misses": 0}
+
+
+def analyze_source(source, path=None):
+    """Index ``source``, reusing the index of an identical script."""
+    sha = _sha256(source)
+    return _cached(sha, lambda: ScriptIndex(source, path, sha))
+
+
+def analyze(path):
+    """Index the script at ``path``, or return None if it does not exist."""
+    path = os.fspath(path)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    sha = _by_stat.get(key)
+    if sha is not None and sha in _by_hash:
+        _by_stat.move_to_end(key)
+        return _cached(sha, None)
+    with open(path, "rb") as f:
+        raw = f.read()
+    sha = hashlib.sha256(raw).hexdigest()
+    _by_stat[key] = sha
+    _by_stat.move_to_end(key)
+    if len(_by_stat) > CACHE_SIZE:
+        _by_stat.popitem(last=False)
+    return _cached(sha, lambda: ScriptIndex(raw.decode("utf-8", "surrogateescape"), path, sha))
+
+
+def _cached(sha, build):
+    index = _by_hash.get(sha)
+    if index is not None:
+        _by_hash.move_to_end(sha)
+        _stats["hits"] += 1
+        return index
+    _stats["misses"] += 1
+    index = _by_hash[sha] = build()
+    if len(_by_hash) > CACHE_SIZE:
+        _by_hash.popitem(last=False)
+    return index
+
+
+def cache_info():
+    """``{"hits", "misses", "size"}`` of the in-memory index cache."""
+    return dict(_stats, size=len(_by_hash))
+
+
+def clear_cache():
+    _by_stat.clear()
+    _by_hash.clear()
+    _stats.update(hits=0, misses=0)
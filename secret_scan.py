@@ -0,0 +1,351 @@
+"""
+Repository-wide secret scanner
+==============================
+
+Checking only mqtt_publisher.py for an ``aio_...`` string misses a key
+pasted in another file, in a ``.env`` that was committed, or in a commit
+that was later "fixed": the key stays in the history of a public repository.
+This scanner looks at what a push can publish:
+
+    working tree   every file in the index, as it is on disk, read through
+                   mmap
+    index          the staged version of those files
+    history        every blob reachable from a ref (``git rev-list --all
+                   --objects``), loose or packed, streamed by
+                   ``git cat-file --batch``
+
+Untracked files and unreachable objects (a reset commit, a dropped stash)
+are never pushed and are not scanned.
+
+All rules are compiled into a single regular expression, so each file is
+read and matched once whatever the number of rules. Binary content (a NUL
+byte in the first 8000 bytes, git's own heuristic) is skipped. Results are
+cached per git blob id (the SHA-1 of ``"blob <size>\\0" + content``, computed
+for working-tree files too): a file unchanged since its last commit is
+matched once, and the cache is kept in ``.git/secret_scan_cache.json`` so a
+later run only reads the blobs added since. Forks sharing the template's
+history share the in-memory cache within one process (grade_cohort.py).
+
+Usage:
+    python secret_scan.py                # this repository
+    python secret_scan.py path/to/repo --no-history
+
+    from secret_scan import scan
+    for finding in scan(REPO_ROOT):
+        print(finding.path, finding.line, finding.rule, finding.secret)
+
+As a git hook (.git/hooks/pre-push):
+    #!/bin/sh
+    exec python3 secret_scan.py
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+
+
+RULES = {
+    # Adafruit IO keys in a string literal: "aio_" followed by the key
+    "adafruit_io_key": rb"(?<=[\"'])aio_[A-Za-z0-9]{20,}(?=[\"'])",
+    "github_token": rb"\bgh[pousr]_[A-Za-z0-9]{36,}",
+    "aws_access_key": rb"\bAKIA[0-9A-Z]{16}\b",
+    "private_key": rb"-----BEGIN (?:[A-Z]+ )*PRIVATE KEY-----",
+}
+
+# One pass over the data for all the rules
+PATTERN = re.compile(b"|".join(b"(?P<%s>%s)" % (name.encode(), rule)
+                               for name, rule in RULES.items()))
+
+# Cache entries are only valid for the rules they were computed with
+RULES_VERSION = hashlib.sha1(PATTERN.pattern).hexdigest()[:12]
+
+CACHE_NAME = "secret_scan_cache.json"
+
+# Bytes looked at to decide a file is binary
+BINARY_SNIFF = 8000
+
+# Larger files and blobs are skipped (datasets, wheels...)
+MAX_SIZE = 16 * 1024 * 1024
+
+# Characters of a secret shown in reports
+SHOWN = 8
+
+Finding = namedtuple("Finding", "rule path line secret where")
+
+
+# ---------------------------------------------------------------------------
+# Matching
+# ---------------------------------------------------------------------------
+def find_secrets(data):
+    """
+    ``[(rule, line, secret)]`` for the secrets in ``data`` (bytes, str or
+    mmap), secrets masked after their first characters; binary data has none.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8", "surrogateescape")
+    if b"\0" in data[:BINARY_SNIFF]:
+        return []
+    found = []
+    line, last = 1, 0
+    for match in PATTERN.finditer(data):
+        # Sliced: mmap has no count()
+        line += data[last:match.start()].count(b"\n")
+        last = match.start()
+        found.append((match.lastgroup, line, _mask(match.group())))
+    return found
+
+
+def _mask(secret):
+    return secret[:SHOWN].decode("ascii", "replace") + "..."
+
+
+def blob_id(data):
+    """The git blob id of ``data`` (what ``git hash-object`` prints)."""
+    sha = hashlib.sha1(b"blob %d\0" % len(data))
+    sha.update(data)
+    return sha.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+_blobs = {}                 # blob id -> [(rule, line, secret)], shared by all repositories
+_stats = {"matched": 0, "cached": 0, "skipped": 0}
+
+
+def _lookup(blob, data=None):
+    """Findings of ``blob``, matching ``data`` on a cache miss."""
+    found = _blobs.get(blob)
+    if found is not None:
+        _stats["cached"] += 1
+        return found
+    if data is None:
+        return None
+    _stats["matched"] += 1
+    found = _blobs[blob] = find_secrets(data)
+    return found
+
+
+def _load_cache(git_dir):
+    try:
+        with open(os.path.join(git_dir, CACHE_NAME)) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if cache.get("rules") != RULES_VERSION:
+        return set()
+    for blob, found in cache["blobs"].items():
+        _blobs.setdefault(blob, [tuple(item) for item in found])
+    return set(cache["blobs"])
+
+
+def _save_cache(git_dir, blobs):
+    path = os.path.join(git_dir, CACHE_NAME)
+    cache = {"rules": RULES_VERSION, "blobs": {blob: _blobs[blob] for blob in blobs}}
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(cache, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except OSError:
+        # A read-only checkout still gets scanned, just not cached
+        pass
+
+
+def cache_info():
+    """``{"matched", "cached", "skipped", "size"}`` of the blob cache."""
+    return dict(_stats, size=len(_blobs))
+
+
+def clear_cache():
+    _blobs.clear()
+    _stats.update(matched=0, cached=0, skipped=0)
+
+
+# ---------------------------------------------------------------------------
+# Scanning
+# ---------------------------------------------------------------------------
+def scan(root, history=True):
+    """
+    Secrets in the working tree of ``root`` and, if it is a git repository
+    and ``history`` is set, in its index and reachable history. A blob found
+    in several places is reported once, from the working tree first.
+    """
+    root = os.fspath(root)
+    git_dir = _git_dir(root)
+    known = _load_cache(git_dir) if git_dir else set()
+
+    findings = []
+    tree_blobs = set()
+    for path in _tree_files(root, git_dir):
+        blob, found = _scan_file(os.path.join(root, path))
+        if blob is None:
+            continue
+        tree_blobs.add(blob)
+        findings += [Finding(rule, path, line, secret, "worktree") for rule, line, secret in found]
+
+    history_blobs = _history_blobs(root) if git_dir and history else {}
+    for blob, (path, where) in history_blobs.items():
+        if blob in tree_blobs:
+            continue
+        for rule, line, secret in _blobs.get(blob) or ():
+            findings.append(Finding(rule, path, line, secret, where))
+
+    seen = tree_blobs.union(history_blobs)
+    if git_dir and not seen <= known:
+        _save_cache(git_dir, seen)
+    return findings
+
+
+def _scan_file(path):
+    """``(blob id, findings)`` of a working-tree file, ``(None, [])`` if skipped."""
+    try:
+        size = os.path.getsize(path)
+        if size == 0 or size > MAX_SIZE or not os.path.isfile(path):
+            return None, []
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if b"\0" in data[:BINARY_SNIFF]:
+                _stats["skipped"] += 1
+                return None, []
+            blob = blob_id(data)
+            return blob, _lookup(blob, data)
+    except (OSError, ValueError):
+        return None, []
+
+
+def _tree_files(root, git_dir):
+    """Paths in the index, or every file outside .git without git."""
+    if git_dir:
+        listed = _git(root, "ls-files", "-z", "--cached")
+        if listed is not None:
+            return sorted(set(listed.decode("utf-8", "surrogateescape").split("\0")) - {""})
+    paths = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d != ".git"]
+        paths += [os.path.relpath(os.path.join(directory, name), root) for name in files]
+    return sorted(paths)
+
+
+def _history_blobs(root):
+    """
+    ``{blob id: (path, where)}`` of the text-sized blobs in the index and
+    reachable from a ref, matched against the rules if not cached yet.
+    """
+    candidates = {}
+    listed = _git(root, "rev-list", "--all", "--objects")
+    for entry in (listed or b"").decode("utf-8", "surrogateescape").splitlines():
+        obj, _, path = entry.partition(" ")
+        if path:
+            # Trees have paths too: cat-file tells them apart below
+            candidates.setdefault(obj, (path, "history"))
+    # Staged but not committed yet (a committed blob keeps "history": the
+    # key is already out and must be revoked)
+    listed = _git(root, "ls-files", "-z", "--stage")
+    for entry in (listed or b"").decode("utf-8", "surrogateescape").split("\0"):
+        info, _, path = entry.partition("\t")
+        if not path:
+            continue
+        mode, obj = info.split()[:2]
+        # 160000: a submodule's commit, not an object of this repository
+        if mode != "160000":
+            candidates.setdefault(obj, (path, "index"))
+    if not candidates:
+        return {}
+
+    listed = _git_input(root, "".join(obj + "\n" for obj in candidates).encode(),
+                        "cat-file", "--batch-check=%(objecttype) %(objectname) %(objectsize)")
+    blobs, missing = {}, []
+    for entry in (listed or b"").decode().splitlines():
+        fields = entry.split()
+        if len(fields) != 3:
+            # "<id> missing": nothing to read
+            continue
+        kind, blob, size = fields
+        if kind != "blob":
+            continue
+        if int(size) > MAX_SIZE:
+            _stats["skipped"] += 1
+            continue
+        blobs[blob] = candidates[blob]
+        if _lookup(blob) is None:
+            missing.append(blob)
+    if missing:
+        _read_blobs(root, missing)
+    return blobs
+
+
+def _read_blobs(root, blobs):
+    """Stream ``blobs`` out of git (loose or packed) and match them."""
+    process = subprocess.Popen(["git", "-C", root, "cat-file", "--batch"],
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL)
+
+    def feed():
+        # Written from a thread so git never blocks on a full stdout pipe
+        with process.stdin:
+            process.stdin.write("".join(blob + "\n" for blob in blobs).encode())
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    out = process.stdout
+    for blob in blobs:
+        header = out.readline().split()
+        if len(header) != 3:
+            # "<id> missing": nothing follows
+            continue
+        data = out.read(int(header[2]))
+        out.read(1)
+        _lookup(blob, data)
+    writer.join()
+    process.wait()
+
+
+def _git_dir(root):
+    found = _git(root, "rev-parse", "--absolute-git-dir")
+    return found.decode().strip() if found else None
+
+
+def _git(root, *args):
+    return _git_input(root, None, *args)
+
+
+def _git_input(root, data, *args):
+    try:
+        result = subprocess.run(["git", "-C", root, *args], input=data, capture_output=True)
+    except OSError:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("root", nargs="?", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="repository to scan (default: this one)")
+    parser.add_argument("--no-history", action="store_true", help="scan the working tree only")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    findings = scan(args.root, history=not args.no_history)
+    elapsed = time.perf_counter() - started
+
+    places = {"worktree": "in working tree", "index": "staged", "history": "in git history"}
+    for finding in findings:
+        print(f"{finding.path}:{finding.line}: {finding.rule} {finding.secret} "
+              f"({places[finding.where]})")
+    stats = cache_info()
+    print(f"{len(findings)} secret(s) found in {elapsed:.2f} s "
+          f"({stats['matched']} blobs matched, {stats['cached']} cached, "
+          f"{stats['skipped']} skipped)")
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
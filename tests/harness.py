@@ -0,0 +1,209 @@
+"""
+Deterministic simulation harness.
+=================================
+
+A virtual clock and a scripted stand-in for ``Adafruit_IO.MQTTClient`` so
+outage / reconnect / drain scenarios spanning hours run in milliseconds.
+RecordingClient is the always-connected client for tests that only look at
+what was published.
+
+    clock = VirtualClock()
+    client = FakeMQTTClient(clock, connect_latency=0.2)
+    client.schedule_outage(start=600, duration=7200)
+
+    # Components take the clock wherever they take a time source:
+    #   TokenBucket(..., clock=clock), Outbox(..., clock=clock),
+    #   ReconnectSupervisor(..., scheduler=clock)
+
+    clock.every(3.0, lambda: publisher.publish_or_buffer('temperature', 21.0))
+    clock.run_until(4 * 3600)
+
+Nothing here sleeps or starts a thread: timers fire in time order when the
+test advances the clock, and ties fire in the order they were scheduled.
+"""
+
+import heapq
+import json
+
+
+# ---------------------------------------------------------------------------
+# Virtual clock
+# ---------------------------------------------------------------------------
+class TimerHandle:
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class VirtualClock:
+    """
+    Time source and scheduler. Calling the clock returns the current time, so
+    it can be passed as ``clock=`` to TokenBucket and Outbox, and it provides
+    ``time()`` / ``call_later()`` for ReconnectSupervisor.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+        self._timers = []
+        self._seq = 0
+
+    def __call__(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def call_at(self, when, callback):
+        handle = TimerHandle()
+        self._seq += 1
+        heapq.heappush(self._timers, (max(when, self.now), self._seq, handle, callback))
+        return handle
+
+    def call_later(self, delay, callback):
+        return self.call_at(self.now + delay, callback)
+
+    def every(self, interval, callback, start=None):
+        """Call ``callback`` every ``interval`` seconds. Returns the first handle."""
+        def tick():
+            callback()
+            self.call_later(interval, tick)
+        return self.call_at(self.now if start is None else start, tick)
+
+    def pending(self):
+        return sum(1 for _, _, handle, _ in self._timers if not handle.cancelled)
+
+    def run_next(self):
+        """Fire the next timer. Returns False when none is left."""
+        while self._timers:
+            when, _, handle, callback = heapq.heappop(self._timers)
+            if handle.cancelled:
+                continue
+            self.now = when
+            callback()
+            return True
+        return False
+
+    def run_until(self, when):
+        """Fire every timer due up to ``when``, then set the clock to ``when``."""
+        while self._timers and self._timers[0][0] <= when:
+            self.run_next()
+        self.now = max(self.now, when)
+
+    def advance(self, seconds):
+        self.run_until(self.now + seconds)
+
+    sleep = advance
+
+
+# ---------------------------------------------------------------------------
+# Fake MQTT clients
+# ---------------------------------------------------------------------------
+class RecordingClient:
+    """Minimal stand-in for Adafruit_IO.MQTTClient: always up, records publishes."""
+
+    def __init__(self):
+        self.published = []
+        self.on_connect = None
+        self.on_disconnect = None
+
+    def publish(self, feed, value):
+        self.published.append((feed, value))
+
+
+class FakeMQTTClient:
+    """
+    Scripted stand-in for ``Adafruit_IO.MQTTClient`` on a VirtualClock.
+
+    ``connect()`` raises while the broker is down or a scripted failure is
+    pending; otherwise ``on_connect`` fires ``connect_latency`` seconds later.
+    Outages drop the link (``on_disconnect``) and refuse connections until
+    they end. Publishes are recorded in ``delivered`` with their virtual time,
+    or in ``lost`` if the link was down. Like Adafruit IO, a ``{feed}/json``
+    payload is recorded as its feed and value, its ``created_at`` going to
+    the ``created_at`` list (None for plain publishes).
+    """
+
+    def __init__(self, clock, username="student", key="key", connect_latency=0.0,
+                 publish_latency=0.0):
+        self.clock = clock
+        self.username = username
+        self.key = key
+        self.connect_latency = connect_latency
+        self.publish_latency = publish_latency
+
+        self.on_connect = None
+        self.on_disconnect = None
+
+        self.delivered = []       # (time, feed, value)
+        self.created_at = []      # created_at of each delivered publish, or None
+        self.lost = []            # (time, feed, value) published while down
+        self.connect_calls = []   # times connect() was called
+        self.connects = 0
+        self.disconnects = 0
+
+        self._connected = False
+        self._fail_next = 0
+        self._outages = []        # (start, end)
+
+    # -- Scripting ---------------------------------------------------------
+    def fail_connects(self, count):
+        """Make the next ``count`` calls to connect() raise."""
+        self._fail_next += count
+
+    def schedule_outage(self, start, duration):
+        """Drop the link at ``start`` and refuse connections for ``duration`` seconds."""
+        self._outages.append((start, start + duration))
+        self.clock.call_at(start, self._drop)
+
+    def broker_up(self):
+        now = self.clock.now
+        return not any(start <= now < end for start, end in self._outages)
+
+    # -- MQTTClient API ----------------------------------------------------
+    def connect(self, **kwargs):
+        self.connect_calls.append(self.clock.now)
+        if self._fail_next:
+            self._fail_next -= 1
+            raise ConnectionRefusedError("scripted connect failure")
+        if not self.broker_up():
+            raise ConnectionRefusedError("broker unreachable")
+        self.clock.call_later(self.connect_latency, self._connack)
+
+    def disconnect(self):
+        if self._connected:
+            self._connected = False
+            self.disconnects += 1
+            if self.on_disconnect is not None:
+                self.on_disconnect(self)
+
+    def is_connected(self):
+        return self._connected
+
+    def loop_background(self, stop=None):
+        pass
+
+    def publish(self, feed_id, value=None, group_id=None, feed_user=None):
+        created_at = None
+        if feed_id.endswith("/json"):
+            data = json.loads(value)
+            feed_id, value, created_at = feed_id[:-len("/json")], data["value"], data.get("created_at")
+        record = (self.clock.now + self.publish_latency, feed_id, value)
+        if self._connected:
+            self.delivered.append(record)
+            self.created_at.append(created_at)
+        else:
+            self.lost.append(record)
+
+    # -- Internals ---------------------------------------------------------
+    def _connack(self):
+        if not self.broker_up():
+            return
+        self._connected = True
+        self.connects += 1
+        if self.on_connect is not None:
+            self.on_connect(self)
+
+    def _drop(self):
+        self.disconnect()
@@ -0,0 +1,81 @@
+"""
+Backlog aggregation: publisher.aggregate
+========================================
+
+These tests verify that:
+1. Each aggregation mode reduces windows per feed correctly
+2. A large backlog drains in far fewer publishes
+3. A chunk interrupted by a disconnect is not lost
+"""
+
+import pytest
+
+from publisher.aggregate import Aggregator
+from publisher.buffered import BufferedPublisher
+from tests.harness import RecordingClient
+
+
+SAMPLES = [("temperature", 1.0), ("humidity", 40.0), ("temperature", 3.0),
+           ("humidity", 60.0), ("temperature", 2.0)]
+
+
+# ---------------------------------------------------------------------------
+# Test: Modes
+# ---------------------------------------------------------------------------
+@pytest.mark.parametrize("mode, expected", [
+    ("mean", [("temperature", 2.0), ("humidity", 50.0), ("temperature", 2.0)]),
+    ("min", [("temperature", 1.0), ("humidity", 40.0), ("temperature", 2.0)]),
+    ("max", [("temperature", 3.0), ("humidity", 60.0), ("temperature", 2.0)]),
+    ("last", [("temperature", 3.0), ("humidity", 60.0), ("temperature", 2.0)]),
+])
+def test_modes(mode, expected):
+    """Windows close per feed; the incomplete tail window is still emitted."""
+    assert list(Aggregator(mode, window=2).reduce(SAMPLES)) == expected
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        Aggregator("median")
+    with pytest.raises(ValueError):
+        Aggregator(window=0)
+
+
+# ---------------------------------------------------------------------------
+# Test: BufferedPublisher integration
+# ---------------------------------------------------------------------------
+def test_backlog_collapses_into_fewer_publishes():
+    """1000 buffered samples over 2 feeds drain as 100 windowed means."""
+    client = RecordingClient()
+    publisher = BufferedPublisher(client, capacity=2000, aggregator=Aggregator("mean", window=10))
+    for i in range(500):
+        publisher.publish_or_buffer("temperature", float(i))
+        publisher.publish_or_buffer("humidity", 50.0)
+    assert publisher.backlog() == 100
+
+    publisher.connected(client)
+
+    assert len(client.published) == 100
+    temps = [v for feed, v in client.published if feed == "temperature"]
+    assert temps == [i * 10 + 4.5 for i in range(50)]
+    assert len(publisher.buffer) == 0
+
+
+def test_interrupted_chunk_is_resent():
+    """A disconnect mid-chunk keeps the raw chunk in the buffer."""
+    client = RecordingClient()
+    publisher = BufferedPublisher(client, capacity=100, aggregator=Aggregator("last", window=2))
+    for i in range(8):
+        publisher.publish_or_buffer("temperature", float(i))
+
+    class DroppingClient:
+        def publish(self, feed, value):
+            publisher.disconnected(self)
+
+    publisher.client = DroppingClient()
+    publisher.connected(publisher.client)
+    assert len(publisher.buffer) == 8
+
+    publisher.client = client
+    publisher.connected(client)
+    assert client.published == [("temperature", 1.0), ("temperature", 3.0),
+                                ("temperature", 5.0), ("temperature", 7.0)]
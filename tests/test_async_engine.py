@@ -0,0 +1,166 @@
+"""
+Asyncio publisher: publisher.async_engine and publisher.mqtt_packets
+====================================================================
+
+These tests verify that the asyncio publisher:
+1. Connects and publishes to {username}/feeds/{feed} topics
+2. Applies backpressure when its queue is full
+3. Runs sensor reads as tasks on the event loop
+4. Reconnects after the broker drops the connection
+5. Keeps QoS 1 publishes in flight until their PUBACK, and resends them
+   after a reconnect
+"""
+
+import asyncio
+
+from publisher import mqtt_packets as mqtt
+from publisher.async_engine import AsyncPublisher
+from publisher.local_broker import LocalBroker
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+async def wait_for(predicate):
+    while not predicate():
+        await asyncio.sleep(0.005)
+
+
+# ---------------------------------------------------------------------------
+# Test: Codec round trip
+# ---------------------------------------------------------------------------
+def test_publish_packet_round_trip():
+    """A QoS 1 PUBLISH parses back to the same topic, payload and id."""
+    async def scenario():
+        reader = asyncio.StreamReader()
+        reader.feed_data(mqtt.publish("student/feeds/temperature", "22.5", qos=1, packet_id=7))
+        packet_type, flags, body = await mqtt.read_packet(reader)
+        return packet_type, mqtt.parse_publish(flags, body)
+
+    packet_type, parsed = run(scenario())
+    assert packet_type == mqtt.PUBLISH
+    assert parsed == ("student/feeds/temperature", b"22.5", 1, 7, False)
+
+
+# ---------------------------------------------------------------------------
+# Test: Publishing
+# ---------------------------------------------------------------------------
+def test_publish_reaches_feed_topics():
+    async def scenario():
+        broker = LocalBroker(accounts={"student": "key"})
+        port = await broker.start()
+        publisher = AsyncPublisher("student", "key", host="127.0.0.1", port=port, secure=False)
+        await publisher.start()
+        await publisher.publish("temperature", 22.5)
+        await publisher.publish("humidity", 45.0)
+        await publisher.drain()
+        await wait_for(lambda: len(broker.messages) == 2)
+        await publisher.close()
+        await broker.stop()
+        return [(topic, payload) for _, topic, payload in broker.messages]
+
+    assert run(scenario()) == [("student/feeds/temperature", b"22.5"), ("student/feeds/humidity", b"45.0")]
+
+
+def test_backpressure_when_disconnected():
+    """publish() waits once the queue is full and no broker is reachable."""
+    async def scenario():
+        publisher = AsyncPublisher("student", "key", host="127.0.0.1", port=1, secure=False,
+                                   queue_size=2, min_delay=0.01)
+        await publisher.start()
+        await publisher.publish("temperature", 1.0)
+        await publisher.publish("temperature", 2.0)
+        try:
+            await asyncio.wait_for(publisher.publish("temperature", 3.0), 0.1)
+            blocked = False
+        except asyncio.TimeoutError:
+            blocked = True
+        await publisher.close()
+        return blocked, publisher.backlog()
+
+    assert run(scenario()) == (True, 2)
+
+
+def test_sensor_tasks_and_reconnect():
+    """Sensor tasks keep sampling across a broker hang-up; nothing queued is lost."""
+    async def scenario():
+        broker = LocalBroker()
+        port = await broker.start()
+        publisher = AsyncPublisher("student", "key", host="127.0.0.1", port=port, secure=False,
+                                   min_delay=0.01)
+        await publisher.start()
+
+        readings = iter(range(100))
+
+        def read_dht():
+            value = next(readings)
+            return float(value), float(value) + 0.5
+
+        publisher.add_sensor(read_dht, ("temperature", "humidity"), interval=0.01)
+        await wait_for(lambda: len(broker.messages) >= 3)
+        broker.kick()
+        await wait_for(lambda: len(broker.messages) >= 10)
+        await publisher.close()
+        await broker.stop()
+        return broker, publisher
+
+    broker, publisher = run(scenario())
+    assert broker.connections >= 2
+    assert publisher.connects >= 2
+    temps = [float(payload) for _, topic, payload in broker.messages if topic.endswith("/temperature")]
+    assert temps[:2] == [0.0, 1.0]
+
+
+# ---------------------------------------------------------------------------
+# Test: QoS 1
+# ---------------------------------------------------------------------------
+def test_qos1_pipelines_up_to_the_window():
+    """Acks arrive late, yet up to ``inflight`` publishes are outstanding at once."""
+    async def scenario():
+        broker = LocalBroker(latency=0.05)
+        port = await broker.start()
+        publisher = AsyncPublisher("student", "key", host="127.0.0.1", port=port, secure=False,
+                                   qos=1, inflight=8)
+        await publisher.start()
+        for i in range(40):
+            await publisher.publish("temperature", float(i))
+        peak = 0
+        drained = asyncio.ensure_future(publisher.drain())
+        while not drained.done():
+            peak = max(peak, publisher.unacked())
+            await asyncio.sleep(0.005)
+        await publisher.close()
+        await broker.stop()
+        return broker, publisher, peak
+
+    broker, publisher, peak = run(scenario())
+    assert peak == 8
+    assert publisher.acked == 40
+    assert publisher.backlog() == 0
+    assert [float(payload) for _, _, payload in broker.messages] == [float(i) for i in range(40)]
+
+
+def test_qos1_retransmits_unacked_on_reconnect():
+    """Publishes the broker never acked are sent again after a reconnect."""
+    async def scenario():
+        broker = LocalBroker(drop_rate=0.3, seed=1)
+        port = await broker.start()
+        publisher = AsyncPublisher("student", "key", host="127.0.0.1", port=port, secure=False,
+                                   qos=1, inflight=4, min_delay=0.01, max_delay=0.02)
+        await publisher.start()
+        for i in range(30):
+            await publisher.publish("temperature", float(i))
+        while publisher.backlog():
+            await asyncio.sleep(0.02)
+            broker.kick()
+        await publisher.close()
+        await broker.stop()
+        return broker, publisher
+
+    broker, publisher = run(scenario())
+    assert broker.dropped > 0
+    assert publisher.retransmitted >= broker.dropped
+    assert publisher.acked == 30
+    received = {float(payload) for _, _, payload in broker.messages}
+    assert received == {float(i) for i in range(30)}
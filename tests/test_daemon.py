@@ -0,0 +1,133 @@
+"""
+Daemon mode: publisher.daemon
+=============================
+
+These tests verify that the daemon helpers:
+1. Send READY / STATUS / STOPPING notifications to NOTIFY_SOCKET
+2. Measure the startup time against the budget
+3. Answer status, reload and stop on the control socket
+4. Keep the previous config when a reload fails
+5. Do not import the REST client with BufferedPublisher
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from publisher.daemon import Daemon, sd_notify
+from tests.harness import VirtualClock
+
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+@pytest.fixture
+def notify(tmp_path, monkeypatch):
+    path = str(tmp_path / "notify")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(path)
+    sock.settimeout(1.0)
+    monkeypatch.setenv("NOTIFY_SOCKET", path)
+    yield lambda: sock.recv(4096).decode().split("\n")
+    sock.close()
+
+
+def command(path, text):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(2.0)
+        sock.connect(path)
+        sock.sendall(text.encode() + b"\n")
+        return json.loads(sock.makefile().readline())
+
+
+def ask(daemon, text):
+    """Send a control command while the daemon serves it from sleep()."""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(command(daemon.control_path, text)))
+    thread.start()
+    while thread.is_alive():
+        daemon.sleep(0.01)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Test: Readiness
+# ---------------------------------------------------------------------------
+def test_ready_reports_startup_against_budget(notify, monkeypatch):
+    clock = VirtualClock(100.0)
+    monkeypatch.setattr("publisher.daemon.process_uptime", lambda: 0.25)
+    daemon = Daemon(budget=1.0, handle_signals=False, clock=clock)
+    clock.advance(0.5)
+
+    assert daemon.ready()
+    assert daemon.startup == pytest.approx(0.75)
+    assert notify() == ["READY=1", "STATUS=ready in 0.75s (within the 1s budget)"]
+
+    daemon.close()
+    assert notify() == ["STOPPING=1"]
+
+    monkeypatch.setattr("publisher.daemon.process_uptime", lambda: 2.0)
+    assert not Daemon(budget=1.0, handle_signals=False, clock=clock).ready()
+    assert notify()[-1] == "STATUS=ready in 2.00s (OVER the 1s budget)"
+
+
+def test_sd_notify_without_systemd(monkeypatch):
+    monkeypatch.delenv("NOTIFY_SOCKET", raising=False)
+    assert not sd_notify("READY=1")
+
+
+# ---------------------------------------------------------------------------
+# Test: Control socket
+# ---------------------------------------------------------------------------
+def test_control_socket_status_reload_stop(tmp_path):
+    config = tmp_path / "f5.json"
+    config.write_text(json.dumps({"interval": 3}))
+    applied = []
+    with Daemon(config_path=str(config), control_path=str(tmp_path / "control.sock"),
+                handle_signals=False) as daemon:
+        daemon.on_reload = applied.append
+        daemon.status = lambda: {"backlog": 12}
+        daemon.ready()
+
+        status = ask(daemon, "status")
+        assert status["backlog"] == 12
+        assert status["startup"] == pytest.approx(daemon.startup, abs=1e-3)
+
+        config.write_text(json.dumps({"interval": 10}))
+        assert ask(daemon, "reload") == {"reloaded": True, "error": None}
+        assert applied == [{"interval": 10}]
+        assert daemon.config == {"interval": 10}
+
+        assert "commands" in ask(daemon, "restart")
+        assert ask(daemon, "stop") == {"stopping": True}
+        assert not daemon.running
+    assert not os.path.exists(tmp_path / "control.sock")
+
+
+def test_failed_reload_keeps_config(tmp_path):
+    config = tmp_path / "f5.json"
+    config.write_text(json.dumps({"interval": 3}))
+    daemon = Daemon(config_path=str(config), handle_signals=False)
+    config.write_text("{not json")
+
+    assert not daemon.reload()
+    assert daemon.config == {"interval": 3}
+    assert isinstance(daemon.reload_error, ValueError)
+    assert daemon.reloads == 0
+
+
+# ---------------------------------------------------------------------------
+# Test: Lazy imports
+# ---------------------------------------------------------------------------
+def test_buffered_publisher_does_not_import_rest():
+    code = ("import sys, publisher.buffered, publisher.feeds, publisher.metrics, publisher.daemon\n"
+            "print(sorted(m for m in ('http.client', 'http.server', 'publisher.rest')"
+            " if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(__file__)), check=True)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,77 @@
+"""
+Change-detection filter: publisher.deadband
+===========================================
+
+These tests verify that the filter:
+1. Publishes only values that leave the absolute / relative deadband
+2. Sends a heartbeat after the maximum silence
+3. Compresses with the swinging door within the configured error bound
+4. Cuts publish volume by an order of magnitude on a stable sensor
+"""
+
+import math
+import random
+
+import pytest
+
+from publisher.deadband import ChangeFilter, Deadband
+
+
+def feed_series(changes, feed, values, interval=3.0):
+    """Run ``values`` through the filter; returns the published (t, value) points."""
+    out = []
+    for i, value in enumerate(values):
+        out.extend(changes.points(feed, value, now=i * interval))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Test: Deadband
+# ---------------------------------------------------------------------------
+def test_absolute_and_relative_band():
+    changes = ChangeFilter(Deadband(absolute=0.5), {"humidity": Deadband(relative=0.1)})
+    assert changes.filter("temperature", 20.0) == [("temperature", 20.0)]
+    assert changes.filter("temperature", 20.4) == []
+    assert changes.filter("temperature", 20.6) == [("temperature", 20.6)]
+
+    assert changes.filter("humidity", 50.0) == [("humidity", 50.0)]
+    assert changes.filter("humidity", 54.0) == []
+    assert changes.filter("humidity", 44.0) == [("humidity", 44.0)]
+
+
+def test_heartbeat_after_max_silence():
+    changes = ChangeFilter(Deadband(absolute=1.0, heartbeat=60))
+    published = feed_series(changes, "temperature", [20.0] * 50, interval=3.0)
+    assert [t for t, _ in published] == [0.0, 60.0, 120.0]
+
+
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        Deadband(absolute=-1)
+    with pytest.raises(ValueError):
+        Deadband(heartbeat=0)
+
+
+# ---------------------------------------------------------------------------
+# Test: Swinging door
+# ---------------------------------------------------------------------------
+def test_swinging_door_error_bound():
+    rng = random.Random(5)
+    values = [20 + 3 * math.sin(i / 40) + rng.uniform(-0.05, 0.05) for i in range(1000)]
+    changes = ChangeFilter(Deadband(absolute=0.2, heartbeat=None, swinging_door=True))
+    published = feed_series(changes, "temperature", values, interval=1.0)
+    published += [(len(values) - 1.0, v) for _, v in changes.flush()]
+
+    assert len(published) < len(values) / 10
+    for (t0, v0), (t1, v1) in zip(published, published[1:]):
+        for t in range(int(t0), int(t1) + 1):
+            line = v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+            assert abs(values[t] - line) <= 0.2 + 1e-9
+
+
+def test_order_of_magnitude_on_stable_sensor():
+    rng = random.Random(1)
+    changes = ChangeFilter(Deadband(absolute=0.3))
+    for i in range(1200):  # one hour at 3 s
+        changes.points("temperature", 21.0 + rng.gauss(0, 0.05), now=i * 3.0)
+    assert changes.reduction() >= 10
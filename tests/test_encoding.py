@@ -0,0 +1,73 @@
+"""
+Payload encoders: publisher.encoding
+====================================
+
+These tests verify that the encoders:
+1. Keep the README format for plain values
+2. Add created_at to JSON payloads on the {feed}/json topic
+3. Split REST batches and CSV exports at max_batch samples
+4. Plug into BufferedPublisher for single MQTT messages only
+"""
+
+import json
+
+import pytest
+
+from publisher.buffered import BufferedPublisher
+from publisher.encoding import (
+    BatchEncoder, CSVEncoder, JSONEncoder, ValueEncoder, get_encoder, iso8601,
+)
+from tests.harness import VirtualClock, FakeMQTTClient
+
+
+# 2026-03-01 12:00:00.250 UTC
+TS = 1772366400.25
+
+
+# ---------------------------------------------------------------------------
+# Test: Formats
+# ---------------------------------------------------------------------------
+def test_value_encoder_matches_readme():
+    assert ValueEncoder().encode("temperature", [(TS, 22.5), (None, 23.0)]) == [
+        ("temperature", "22.5"), ("temperature", "23.0")]
+
+
+def test_json_encoder_created_at():
+    [(feed_id, payload)] = JSONEncoder().encode("temperature", [(TS, 22.5)])
+    assert feed_id == "temperature/json"
+    assert json.loads(payload) == {"value": 22.5, "created_at": "2026-03-01T12:00:00.250Z"}
+    assert iso8601(TS + 0.9996) == "2026-03-01T12:00:01.250Z"
+
+
+def test_batches_split_at_max_batch():
+    samples = [(TS + i, float(i)) for i in range(5)]
+    batches = BatchEncoder(max_batch=2).encode("humidity", samples)
+    assert [len(json.loads(body)) for _, body in batches] == [2, 2, 1]
+    assert json.loads(batches[2][1]) == [{"value": 4.0, "created_at": "2026-03-01T12:00:04.250Z"}]
+
+    [(_, text)] = CSVEncoder().encode("humidity", samples[:2])
+    assert text == f"{TS:.3f},0.0\n{TS + 1:.3f},1.0\n"
+
+
+def test_registry():
+    assert get_encoder("batch", max_batch=10).max_batch == 10
+    with pytest.raises(ValueError):
+        get_encoder("protobuf")
+
+
+# ---------------------------------------------------------------------------
+# Test: BufferedPublisher
+# ---------------------------------------------------------------------------
+def test_buffered_publisher_uses_encoder():
+    clock = VirtualClock()
+    client = FakeMQTTClient(clock)
+    publisher = BufferedPublisher(client, encoder=JSONEncoder())
+    client.connect()
+    clock.run_until(0)
+    publisher.publish_or_buffer("temperature", 21.5)
+
+    # FakeMQTTClient decodes {feed}/json publishes like Adafruit IO does
+    assert [(feed, value) for _, feed, value in client.delivered] == [("temperature", 21.5)]
+    assert client.created_at == [None]
+    with pytest.raises(ValueError):
+        BufferedPublisher(client, encoder=BatchEncoder())
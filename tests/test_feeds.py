@@ -0,0 +1,141 @@
+"""
+Feed-key registry: publisher.feeds
+==================================
+
+These tests verify that the FeedRegistry:
+1. Maps keys, display names and slugs to the account's keys
+2. Rejects unknown feeds with the closest key as a hint
+3. Serves a fresh cache without fetching, refetches once it is stale
+4. Falls back to a stale cache, or to syntax checks, when the fetch fails
+   or the cache file is malformed
+5. Makes BufferedPublisher fail fast on a bad feed
+"""
+
+import pytest
+
+from publisher.buffered import BufferedPublisher
+from publisher.feeds import FeedError, FeedRegistry, slugify
+from publisher.local_broker import LocalRestServer
+from publisher.rest import RestUploader
+from tests.harness import VirtualClock, FakeMQTTClient
+
+
+FEEDS = [{"key": "temperature", "name": "Temperature"},
+         {"key": "humidity-sensor", "name": "Humidity Sensor"}]
+
+
+class Fetcher:
+    def __init__(self, feeds=FEEDS):
+        self.feeds = feeds
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if isinstance(self.feeds, Exception):
+            raise self.feeds
+        return self.feeds
+
+
+# ---------------------------------------------------------------------------
+# Test: Resolution
+# ---------------------------------------------------------------------------
+def test_resolves_keys_names_and_slugs(tmp_path):
+    feeds = FeedRegistry(Fetcher(), path=tmp_path / "feeds.json").load()
+
+    assert feeds.resolve("temperature") == "temperature"
+    assert feeds.resolve("Temperature") == "temperature"
+    assert feeds.resolve("Humidity Sensor") == "humidity-sensor"
+    assert feeds.resolve("humidity_sensor") == "humidity-sensor"
+    assert feeds.normalized == 3
+    assert slugify("  Temp Sensor #2 ") == "temp-sensor-2"
+
+
+def test_unknown_feed_suggests_closest_key(tmp_path):
+    feeds = FeedRegistry(Fetcher(), path=tmp_path / "feeds.json").load()
+
+    with pytest.raises(FeedError, match="did you mean 'temperature'"):
+        feeds.resolve("temperatur")
+    assert feeds.rejected == 1
+
+
+# ---------------------------------------------------------------------------
+# Test: Cache
+# ---------------------------------------------------------------------------
+def test_cache_is_used_until_the_ttl(tmp_path):
+    clock = VirtualClock(1000.0)
+    path = tmp_path / "feeds.json"
+    FeedRegistry(Fetcher(), path=path, clock=clock).load()
+
+    fetch = Fetcher([])
+    feeds = FeedRegistry(fetch, path=path, ttl=3600, clock=clock).load()
+    assert fetch.calls == 0
+    assert feeds.resolve("Temperature") == "temperature"
+
+    clock.advance(3600)
+    feeds = FeedRegistry(fetch, path=path, ttl=3600, clock=clock).load()
+    assert fetch.calls == 1
+    assert feeds.keys() == []
+
+    # A cache written for another account is ignored
+    other = FeedRegistry(Fetcher(OSError("offline")), path=path, account="someone")
+    assert not other.load().known
+
+
+def test_fetch_failure_falls_back(tmp_path):
+    clock = VirtualClock(1000.0)
+    path = tmp_path / "feeds.json"
+    FeedRegistry(Fetcher(), path=path, ttl=60, clock=clock).load()
+    clock.advance(3600)
+
+    stale = FeedRegistry(Fetcher(OSError("offline")), path=path, ttl=60, clock=clock).load()
+    assert isinstance(stale.error, OSError)
+    assert stale.resolve("Humidity Sensor") == "humidity-sensor"
+
+    # No cache at all: only the syntax is checked
+    syntax = FeedRegistry(Fetcher(OSError("offline")), path=tmp_path / "none.json").load()
+    assert not syntax.known
+    assert syntax.resolve("Anything Goes") == "anything-goes"
+    with pytest.raises(FeedError):
+        syntax.resolve("!!!")
+
+
+@pytest.mark.parametrize("content", [
+    '[]',
+    '{"version": 1}',
+    '{"version": 1, "account": null, "feeds": "temperature", "fetched_at": 0}',
+    '{"version": 1, "account": null, "feeds": [{"name": "Temperature"}], "fetched_at": 0}',
+])
+def test_malformed_cache_is_ignored(tmp_path, content):
+    path = tmp_path / "feeds.json"
+    path.write_text(content)
+
+    feeds = FeedRegistry(Fetcher(OSError("offline")), path=path).load()
+    assert not feeds.known
+    assert FeedRegistry(Fetcher(), path=path).load().resolve("Temperature") == "temperature"
+
+
+# ---------------------------------------------------------------------------
+# Test: Wiring
+# ---------------------------------------------------------------------------
+def test_publisher_fails_fast_on_bad_feed(tmp_path):
+    server = LocalRestServer(accounts={"student": "key"}, feeds=["Temperature", "Humidity"])
+    url = server.start()
+    try:
+        with RestUploader("student", "key", base_url=url) as uploader:
+            feeds = FeedRegistry(uploader.feeds, path=tmp_path / "feeds.json",
+                                 account="student").load()
+    finally:
+        server.stop()
+    assert feeds.keys() == ["humidity", "temperature"]
+
+    clock = VirtualClock()
+    client = FakeMQTTClient(clock)
+    publisher = BufferedPublisher(client, feeds=feeds, clock=clock)
+    client.connect()
+    clock.run_until(clock.now)
+
+    publisher.publish_or_buffer("Temperature", 22.5)
+    with pytest.raises(FeedError):
+        publisher.publish_or_buffer("temprature", 22.5)
+    assert [feed for _, feed, _ in client.delivered] == ["temperature"]
+    assert client.connects == 1
@@ -0,0 +1,102 @@
+"""
+Fan-in gateway: publisher.gateway
+=================================
+
+These tests verify that the gateway:
+1. Publishes readings from devices under per-device feed namespaces
+2. Accepts UDP and Unix datagram sockets, several readings per datagram
+3. Rejects malformed lines and devices outside the allow list
+4. Shares one offline buffer and one token bucket across all devices
+"""
+
+import pytest
+
+from publisher.buffered import BufferedPublisher
+from publisher.gateway import Gateway, GatewayClient
+from publisher.rate_limit import TokenBucket
+from tests.harness import VirtualClock, FakeMQTTClient
+
+
+def make_gateway(address=("127.0.0.1", 0), rate=None, devices=None):
+    clock = VirtualClock()
+    client = FakeMQTTClient(clock)
+    bucket = TokenBucket(rate, burst=2, clock=clock) if rate else None
+    publisher = BufferedPublisher(client, capacity=100, bucket=bucket)
+    client.connect()
+    clock.run_until(0)
+    return clock, client, Gateway(publisher, address, devices=devices, clock=clock)
+
+
+def poll_until(gateway, count):
+    while gateway.received + gateway.rejected < count:
+        assert gateway.poll(timeout=2.0) or gateway.rejected, "no datagram within 2 s"
+
+
+# ---------------------------------------------------------------------------
+# Test: Fan-in
+# ---------------------------------------------------------------------------
+def test_udp_readings_use_device_namespaces():
+    _, client, gateway = make_gateway()
+    with gateway:
+        for device in ("pi-01", "pi-02"):
+            GatewayClient(device, gateway.address).publish("temperature", 21.5)
+        poll_until(gateway, 2)
+
+    assert sorted(feed for _, feed, _ in client.delivered) == [
+        "pi-01.temperature", "pi-02.temperature"]
+    assert set(gateway.stats()["devices"]) == {"pi-01", "pi-02"}
+
+
+def test_unix_socket_batch(tmp_path):
+    _, client, gateway = make_gateway(str(tmp_path / "gateway.sock"))
+    with gateway:
+        device = GatewayClient("pi-03", gateway.address)
+        device.send([("temperature", 22.0), ("humidity", 40.0)])
+        poll_until(gateway, 2)
+
+    assert [(feed, value) for _, feed, value in client.delivered] == [
+        ("pi-03.temperature", 22.0), ("pi-03.humidity", 40.0)]
+    assert not (tmp_path / "gateway.sock").exists()
+
+
+def test_rejects_malformed_and_unknown_devices():
+    _, client, gateway = make_gateway(devices={"pi-01"})
+    with gateway:
+        gateway.handle(b"pi-01 temperature 21.0\n"
+                       b"pi-99 temperature 21.0\n"
+                       b"pi-01 temperature hot\n"
+                       b"PI-01 Temperature 21.0\n"
+                       b"pi-01 temperature\n")
+
+    assert gateway.received == 1
+    assert gateway.rejected == 4
+    assert len(client.delivered) == 1
+
+
+def test_invalid_device_name():
+    with pytest.raises(ValueError):
+        GatewayClient("Pi 7")
+
+
+# ---------------------------------------------------------------------------
+# Test: Shared buffer and quota
+# ---------------------------------------------------------------------------
+def test_shared_buffer_and_bucket():
+    """Readings from every device queue in one buffer and drain at one rate."""
+    clock, client, gateway = make_gateway(rate=1.0)
+    with gateway:
+        client.disconnect()
+        for i, device in enumerate(("pi-01", "pi-02", "pi-03")):
+            gateway.handle(f"{device} temperature {i}\n".encode())
+        assert len(gateway.publisher.buffer) == 3
+
+        client.connect()
+        clock.run_until(clock.now)
+        while gateway.publisher.backlog():
+            clock.advance(1)
+            gateway.poll()
+
+    assert [feed for _, feed, _ in client.delivered] == [
+        "pi-01.temperature", "pi-02.temperature", "pi-03.temperature"]
+    times = [t for t, _, _ in client.delivered]
+    assert all(b - a >= 1 for a, b in zip(times, times[1:]))
@@ -0,0 +1,154 @@
+"""
+Bulk grading: grade_cohort
+==========================
+
+These tests verify that the cohort grader:
+1. Scores complete, missing and broken submissions like the workflow, one
+   milestone at a time
+2. Fails milestone 1 when a committed marker was made for another script
+3. Gives the same table over a process pool as in-process
+4. Writes the JSON and CSV score tables
+"""
+
+import csv
+import hashlib
+import json
+
+import pytest
+
+from grade_cohort import FAILED, PASSED, SKIPPED, find_submissions, grade, main, max_score
+from tests import test_milestone_01
+
+
+SCRIPT = '''
+import os
+import time
+from Adafruit_IO import MQTTClient
+
+ADAFRUIT_IO_KEY = os.environ.get("ADAFRUIT_IO_KEY")
+INITIAL_DELAY = 1
+MAX_DELAY = 120
+data_buffer = []
+
+
+def reconnect_with_backoff(client):
+    delay = INITIAL_DELAY
+    while True:
+        try:
+            client.connect()
+            return
+        except Exception:
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_DELAY)
+
+
+client = MQTTClient(os.environ.get("ADAFRUIT_IO_USERNAME"), ADAFRUIT_IO_KEY)
+client.on_disconnect = reconnect_with_backoff
+client.loop_background()
+while True:
+    client.publish("temperature", 21.5)
+    client.publish("humidity", 40)
+    time.sleep(3)
+'''
+
+# Feed names in a dict: test_feed_key_format has no literal to check and skips
+LOOP_SCRIPT = SCRIPT.replace('''    client.publish("temperature", 21.5)
+    client.publish("humidity", 40)
+''', '''    for feed, value in FEEDS.items():
+        client.publish(feed, value)
+''').replace("data_buffer = []", 'data_buffer = []\nFEEDS = {"temperature": 21.5, "humidity": 40}')
+
+
+@pytest.fixture
+def cohort(tmp_path):
+    (tmp_path / "alice").mkdir()
+    (tmp_path / "alice" / "mqtt_publisher.py").write_text(SCRIPT)
+    (tmp_path / "bob").mkdir()
+    (tmp_path / "carol").mkdir()
+    (tmp_path / "carol" / "mqtt_publisher.py").write_text("if True\n")
+    (tmp_path / "dave").mkdir()
+    (tmp_path / "dave" / "mqtt_publisher.py").write_text(LOOP_SCRIPT)
+    (tmp_path / ".git").mkdir()
+    return tmp_path
+
+
+# ---------------------------------------------------------------------------
+# Test: Scores
+# ---------------------------------------------------------------------------
+def test_scores_follow_the_workflow(cohort):
+    repos = find_submissions(cohort)
+    assert [r.rsplit("/", 1)[1] for r in repos] == ["alice", "bob", "carol", "dave"]
+    alice, bob, carol, dave = grade(repos, jobs=1)
+
+    assert max_score() == 100
+    assert alice["score"] == 100
+    # No validation markers committed: the only check that cannot run
+    assert [name for name, test in alice["tests"].items() if test["outcome"] != PASSED] == \
+        ["test_validation_markers_current"]
+
+    # Missing script: only milestone 1 fails, the others are skipped
+    assert bob["milestones"] == {1: False, 2: True, 3: True}
+    assert bob["tests"]["test_mqtt_script_exists"]["outcome"] == FAILED
+    assert bob["tests"]["test_publish_function"]["outcome"] == SKIPPED
+    assert bob["score"] == 35 + 40
+
+    # Syntax error: every test reading the script fails, so does every milestone
+    assert carol["tests"]["test_mqtt_script_syntax"]["message"] == "Expected: Valid Python syntax"
+    assert carol["tests"]["test_publish_function"]["outcome"] == FAILED
+    assert carol["milestones"] == {1: False, 2: False, 3: False}
+    assert carol["score"] == 0
+
+    # A skipped test does not cost its milestone any points
+    assert dave["tests"]["test_feed_key_format"]["outcome"] == SKIPPED
+    assert dave["milestones"] == {1: True, 2: True, 3: True}
+    assert dave["score"] == 100
+
+    # The milestone suites still check this repository afterwards
+    assert test_milestone_01.REPO_ROOT == test_milestone_01.get_repo_root()
+
+
+def test_stale_validation_marker(cohort):
+    alice = cohort / "alice"
+    markers = alice / ".test_markers"
+    markers.mkdir()
+    marker = markers / "mqtt_script_verified.txt"
+
+    marker.write_text("Verified: 2026-03-02T10:00:00\nscript_sha256: " + "0" * 64 + "\n")
+    row, = grade([str(alice)], jobs=1)
+    assert row["tests"]["test_validation_markers_current"]["outcome"] == FAILED
+    assert row["milestones"][1] is False
+    assert row["score"] == 35 + 40
+
+    marker.write_text("script_sha256: " + hashlib.sha256(SCRIPT.encode()).hexdigest() + "\n")
+    row, = grade([str(alice)], jobs=1)
+    assert row["tests"]["test_validation_markers_current"]["outcome"] == PASSED
+    assert row["score"] == 100
+
+
+def test_pool_matches_in_process(cohort):
+    repos = find_submissions(cohort) * 4
+    strip = lambda rows: [{k: v for k, v in row.items() if k != "seconds"} for row in rows]
+
+    assert strip(grade(repos, jobs=2)) == strip(grade(repos, jobs=1))
+
+
+# ---------------------------------------------------------------------------
+# Test: Output
+# ---------------------------------------------------------------------------
+def test_json_and_csv_tables(cohort, tmp_path, capsys):
+    out = tmp_path / "out"
+    out.mkdir()
+    assert main([str(cohort), "--jobs", "1", "--json", str(out / "s.json"),
+                 "--csv", str(out / "s.csv")]) == 0
+    assert "submissions graded" in capsys.readouterr().out
+
+    table = json.loads((out / "s.json").read_text())
+    assert table["max_score"] == 100
+    assert [row["repo"] for row in table["submissions"]] == ["alice", "bob", "carol", "dave", "out"]
+
+    with open(out / "s.csv", newline="") as f:
+        rows = {row["repo"]: row for row in csv.DictReader(f)}
+    assert rows["alice"]["score"] == "100"
+    assert rows["bob"]["milestone_1"] == "FAIL"
+    assert rows["bob"]["failed"] == "test_mqtt_script_exists"
+    assert float(rows["carol"]["seconds"]) >= 0
@@ -0,0 +1,131 @@
+"""
+Adaptive publish intervals: publisher.interval
+==============================================
+
+These tests verify that the IntervalController:
+1. Splits the account rate evenly between feeds with the same volatility
+2. Gives more of the quota to the feed that changes faster
+3. Keeps what the backlog needs, at most drain_share of the rate, while
+   there is one, including when a new feed shows up
+4. Caps feeds at min_interval and drops feeds that stopped reporting
+5. Exposes its decisions as metrics
+"""
+
+import pytest
+
+from publisher.buffered import BufferedPublisher
+from publisher.interval import IntervalController
+from publisher.metrics import Registry, instrument
+from tests.harness import VirtualClock, FakeMQTTClient
+
+
+RATE = 0.45     # 27 data points/minute, the free tier with headroom
+
+
+def feed_readings(controller, clock, steps, **slopes):
+    for i in range(steps):
+        clock.advance(1)
+        for feed, slope in slopes.items():
+            controller.observe(feed, 20.0 + slope * i)
+    return controller.update()
+
+
+# ---------------------------------------------------------------------------
+# Test: Split
+# ---------------------------------------------------------------------------
+def test_even_split_for_equal_feeds():
+    clock = VirtualClock()
+    controller = IntervalController(RATE, clock=clock)
+    intervals = feed_readings(controller, clock, 10, temperature=0.1, humidity=0.1)
+
+    assert intervals["temperature"] == pytest.approx(2 / RATE)
+    assert intervals["humidity"] == pytest.approx(2 / RATE)
+    assert controller.live_rate == RATE
+
+
+def test_volatile_feed_gets_more_quota():
+    clock = VirtualClock()
+    controller = IntervalController(RATE, resolution=0.5, feeds={"humidity": 1.0}, clock=clock)
+    intervals = feed_readings(controller, clock, 30, temperature=0.3, humidity=0.1)
+
+    # Crossings/s: temperature 0.3/0.5 = 0.6, humidity 0.1/1.0 = 0.1 -> 6:1
+    spare = RATE - 2 / controller.max_interval
+    assert intervals["temperature"] == pytest.approx(1 / (1 / 300 + spare * 6 / 7))
+    assert intervals["humidity"] == pytest.approx(1 / (1 / 300 + spare / 7))
+
+    # A flat feed only keeps its heartbeat
+    intervals = feed_readings(controller, clock, 60, temperature=0.3, humidity=0.0)
+    assert intervals["humidity"] > 100
+    assert 1 / intervals["temperature"] + 1 / intervals["humidity"] == pytest.approx(RATE)
+
+
+def test_backlog_takes_its_share():
+    clock = VirtualClock()
+    controller = IntervalController(RATE, drain_share=0.5, clock=clock)
+    calm = feed_readings(controller, clock, 10, temperature=0.1)["temperature"]
+
+    busy = controller.update(backlog=500)["temperature"]
+    assert controller.drain_rate == pytest.approx(RATE / 2)
+    assert busy == pytest.approx(2 * calm)
+    assert controller.update(backlog=0)["temperature"] == pytest.approx(calm)
+
+
+def test_short_backlog_takes_what_it_needs():
+    clock = VirtualClock()
+    controller = IntervalController(RATE, drain_share=0.5, drain_time=60, clock=clock)
+    feed_readings(controller, clock, 10, temperature=0.1)
+
+    controller.update(backlog=6)
+    assert controller.drain_rate == pytest.approx(6 / 60)
+    assert controller.live_rate == pytest.approx(RATE - 6 / 60)
+
+    # A feed seen for the first time mid-drain does not reset the backlog
+    controller.observe("humidity", 40.0)
+    assert controller.drain_rate == pytest.approx(6 / 60)
+
+
+def test_caps_and_inactive_feeds():
+    clock = VirtualClock()
+    controller = IntervalController(2.0, min_interval=1.0, clock=clock)
+    intervals = feed_readings(controller, clock, 10, temperature=5.0, humidity=0.1)
+
+    # temperature would get more than 1/s: capped, the rest goes to humidity
+    assert intervals["temperature"] == 1.0
+    assert intervals["humidity"] == pytest.approx(1.0)
+
+    clock.advance(controller.max_interval + 1)
+    controller.observe("temperature", 20.0)
+    assert set(controller.update()) == {"temperature"}
+
+
+def test_due_follows_the_interval():
+    clock = VirtualClock()
+    controller = IntervalController(RATE, clock=clock)
+    controller.observe("temperature", 20.0)
+    interval = controller.intervals["temperature"]
+
+    assert controller.due("temperature")
+    assert not controller.due("temperature")
+    clock.advance(interval)
+    assert controller.due("temperature")
+    assert not controller.due("unknown")
+
+
+# ---------------------------------------------------------------------------
+# Test: Metrics
+# ---------------------------------------------------------------------------
+def test_decisions_are_exported():
+    clock = VirtualClock()
+    controller = IntervalController(RATE, clock=clock)
+    feed_readings(controller, clock, 5, temperature=0.1, humidity=0.1)
+    controller.update(backlog=500)
+
+    registry = Registry(labels={"device": "pi-07"})
+    instrument(registry, BufferedPublisher(FakeMQTTClient(clock), clock=clock),
+               controller=controller)
+    text = registry.render()
+
+    interval = 2 / (RATE / 2)
+    assert f'f5_publish_interval_seconds{{device="pi-07",feed="humidity"}} {interval:g}' in text
+    assert 'f5_feed_volatility{device="pi-07",feed="temperature"} 0.1' in text
+    assert f'f5_drain_rate{{device="pi-07"}} {RATE / 2:g}' in text
@@ -0,0 +1,126 @@
+"""
+Local broker: publisher.local_broker
+====================================
+
+These tests verify that the loopback broker stand-in:
+1. Refuses to bind to anything but a loopback address
+2. Checks credentials and answers CONNACK 4 on a bad key
+3. Acknowledges QoS 1 publishes after the configured latency
+4. Drops and throttles publishes, reporting throttles on {username}/throttle
+5. Delivers publishes to matching wildcard subscriptions
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from publisher import mqtt_packets as mqtt
+from publisher.local_broker import LocalBroker, _matches
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+async def open_client(port, username="student", key="key"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(mqtt.connect("test", username, key, 60))
+    _, _, body = await mqtt.read_packet(reader)
+    return reader, writer, mqtt.parse_connack(body)[1]
+
+
+# ---------------------------------------------------------------------------
+# Test: Configuration
+# ---------------------------------------------------------------------------
+def test_refuses_non_loopback_host():
+    with pytest.raises(ValueError):
+        LocalBroker(host="0.0.0.0")
+
+
+def test_topic_filter_wildcards():
+    assert _matches("student/feeds/+", "student/feeds/temperature")
+    assert _matches("student/#", "student/throttle")
+    assert not _matches("student/feeds/+", "student/feeds/a/b")
+    assert not _matches("student/errors", "student/throttle")
+
+
+# ---------------------------------------------------------------------------
+# Test: Protocol
+# ---------------------------------------------------------------------------
+def test_bad_key_gets_connack_4():
+    async def scenario():
+        broker = LocalBroker(accounts={"student": "key"})
+        port = await broker.start()
+        _, writer, good = await open_client(port)
+        writer.close()
+        _, writer, bad = await open_client(port, key="wrong")
+        writer.close()
+        await broker.stop()
+        return good, bad
+
+    assert run(scenario()) == (mqtt.CONNACK_ACCEPTED, 4)
+
+
+def test_qos1_puback_after_latency():
+    async def scenario():
+        broker = LocalBroker(latency=0.05)
+        port = await broker.start()
+        reader, writer, _ = await open_client(port)
+        started = time.perf_counter()
+        writer.write(mqtt.publish("student/feeds/temperature", "21.0", qos=1, packet_id=9))
+        packet_type, _, body = await mqtt.read_packet(reader)
+        elapsed = time.perf_counter() - started
+        writer.close()
+        await broker.stop()
+        return packet_type, mqtt.parse_packet_id(body), elapsed
+
+    packet_type, packet_id, elapsed = run(scenario())
+    assert (packet_type, packet_id) == (mqtt.PUBACK, 9)
+    assert elapsed >= 0.05
+
+
+# ---------------------------------------------------------------------------
+# Test: Fault injection
+# ---------------------------------------------------------------------------
+def test_drops_and_throttles():
+    async def scenario():
+        broker = LocalBroker(drop_rate=0.5, rate_limit=10, seed=1)
+        port = await broker.start()
+        reader, writer, _ = await open_client(port)
+        writer.write(mqtt.subscribe(1, [("student/throttle", 0)]))
+        await mqtt.read_packet(reader)  # SUBACK
+        for i in range(40):
+            writer.write(mqtt.publish("student/feeds/temperature", str(i)))
+        await writer.drain()
+        packet_type, flags, body = await mqtt.read_packet(reader)
+        while broker.received < 40:
+            await asyncio.sleep(0.005)
+        writer.close()
+        await broker.stop()
+        return broker, mqtt.parse_publish(flags, body)
+
+    broker, (topic, payload, _, _, _) = run(scenario())
+    assert broker.dropped > 0
+    assert len(broker.messages) == 10
+    assert broker.dropped + broker.throttled + len(broker.messages) == 40
+    assert topic == "student/throttle"
+    assert b"rate limit" in payload
+
+
+def test_subscribers_receive_feed_publishes():
+    async def scenario():
+        broker = LocalBroker()
+        port = await broker.start()
+        sub_reader, sub_writer, _ = await open_client(port, username="dashboard")
+        sub_writer.write(mqtt.subscribe(1, [("student/feeds/+", 0)]))
+        await mqtt.read_packet(sub_reader)
+        _, pub_writer, _ = await open_client(port)
+        pub_writer.write(mqtt.publish("student/feeds/humidity", "45.0"))
+        _, flags, body = await mqtt.read_packet(sub_reader)
+        sub_writer.close()
+        pub_writer.close()
+        await broker.stop()
+        return mqtt.parse_publish(flags, body)[:2]
+
+    assert run(scenario()) == ("student/feeds/humidity", b"45.0")
@@ -0,0 +1,118 @@
+"""
+Metrics: publisher.metrics
+==========================
+
+These tests verify that the metrics module:
+1. Renders counters, gauges and histograms in the Prometheus text format
+2. Reports sent/buffered samples, link state and downtime of a publisher
+3. Exports to a text file and over HTTP
+4. Does not allocate on the hot path
+"""
+
+import tracemalloc
+import urllib.request
+
+from publisher.buffered import BufferedPublisher
+from publisher.metrics import Registry, instrument
+from publisher.rate_limit import TokenBucket
+from publisher.reconnect import ReconnectSupervisor
+from tests.harness import VirtualClock, FakeMQTTClient
+
+
+# ---------------------------------------------------------------------------
+# Test: Exposition format
+# ---------------------------------------------------------------------------
+def test_render_text_format():
+    registry = Registry(labels={"device": "pi-07"})
+    registry.counter("sent_total", "Messages sent").inc(3)
+    registry.gauge("depth", "Buffer depth", lambda: 12)
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        latency.observe(value)
+
+    assert registry.render() == (
+        '# HELP f5_sent_total Messages sent\n'
+        '# TYPE f5_sent_total counter\n'
+        'f5_sent_total{device="pi-07"} 3\n'
+        '# HELP f5_depth Buffer depth\n'
+        '# TYPE f5_depth gauge\n'
+        'f5_depth{device="pi-07"} 12\n'
+        '# HELP f5_latency_seconds Latency\n'
+        '# TYPE f5_latency_seconds histogram\n'
+        'f5_latency_seconds_bucket{device="pi-07",le="0.1"} 1\n'
+        'f5_latency_seconds_bucket{device="pi-07",le="1"} 2\n'
+        'f5_latency_seconds_bucket{device="pi-07",le="+Inf"} 3\n'
+        'f5_latency_seconds_sum{device="pi-07"} 2.55\n'
+        'f5_latency_seconds_count{device="pi-07"} 3\n'
+    )
+    assert latency.quantile(0.5) == 1.0
+
+
+# ---------------------------------------------------------------------------
+# Test: Publisher wiring
+# ---------------------------------------------------------------------------
+def test_instrumented_publisher_through_an_outage():
+    clock = VirtualClock()
+    client = FakeMQTTClient(clock)
+    publisher = BufferedPublisher(client, bucket=TokenBucket(10.0, burst=5, clock=clock),
+                                  clock=clock)
+    supervisor = ReconnectSupervisor(client.connect, scheduler=clock)
+    supervisor.attach(client)
+    registry = instrument(Registry(), publisher, supervisor)
+    client.schedule_outage(start=10, duration=100)
+    clock.every(1, lambda: publisher.publish_or_buffer("temperature", 21.0))
+    clock.every(0.5, publisher.flush_buffer)
+
+    supervisor.start()
+    clock.run_until(300)
+
+    def value(name):
+        return dict(registry.get(name).samples())[""]
+
+    assert value("connected") == 1
+    assert 100 <= value("disconnected_seconds_total") <= 100 + 120
+    assert value("samples_buffered_total") >= 100
+    assert value("messages_sent_total") == len(client.delivered)
+    assert registry.get("publish_latency_seconds").count == len(client.delivered)
+    assert value("reconnects_total") == 2
+    assert value("buffer_depth") == 0
+    assert value("rate_limit_local_refusals_total") == publisher.bucket.refused
+
+
+# ---------------------------------------------------------------------------
+# Test: Export
+# ---------------------------------------------------------------------------
+def test_textfile_and_http(tmp_path):
+    registry = Registry()
+    registry.counter("sent_total", "Messages sent").inc()
+
+    path = tmp_path / "f5.prom"
+    registry.write_textfile(path)
+    assert "f5_sent_total 1" in path.read_text()
+
+    port = registry.serve(port=0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert "f5_sent_total 1" in response.read().decode()
+    finally:
+        registry.close()
+
+
+# ---------------------------------------------------------------------------
+# Test: Hot path
+# ---------------------------------------------------------------------------
+def test_observe_does_not_allocate():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency")
+    counter = registry.counter("sent_total", "Messages sent")
+    latency.observe(0.001)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for _ in range(10_000):
+        latency.observe(0.002)
+        counter.inc()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert after - before < 1024
@@ -8,16 +8,16 @@ This milestone verifies that the student has:
 3. Handled disconnections with buffering
 4. Used non-blocking loop
 
-These tests verify code patterns for robust MQTT handling.
+These tests verify code patterns for robust MQTT handling (one shared parse,
+see script_analysis.py).
 """
 
-import os
-import ast
-import re
 from pathlib import Path
 
 import pytest
 
+from script_analysis import analyze
+
 
 # ---------------------------------------------------------------------------
 # Helper: Get repository root
@@ -33,6 +33,20 @@ def get_repo_root():
 REPO_ROOT = get_repo_root()
 
 
+def script_index():
+    """
+    The parsed mqtt_publisher.py, shared by every test (see script_analysis).
+    Skips if the script does not exist, fails if it does not parse (the
+    details are in test_mqtt_script_syntax).
+    """
+    index = analyze(REPO_ROOT / "mqtt_publisher.py")
+    if index is None:
+        pytest.skip("mqtt_publisher.py not found")
+    if index.syntax_error is not None:
+        pytest.fail("mqtt_publisher.py has a syntax error, see test_mqtt_script_syntax")
+    return index
+
+
 # ---------------------------------------------------------------------------
 # Test 3.1: Reconnection Pattern (15 points)
 # ---------------------------------------------------------------------------
@@ -51,18 +65,15 @@ def test_reconnection_pattern():
             print("Deconnecte - tentative de reconnexion...")
             reconnect_with_backoff(client)
     """
-    script_path = REPO_ROOT / "mqtt_publisher.py"
-
-    if not script_path.exists():
-        pytest.skip("mqtt_publisher.py not found")
-
-    content = script_path.read_text()
+    index = script_index()
 
+    # Names only: a "reconnecting..." print message does not reconnect
     has_reconnect = any([
-        "reconnect" in content.lower(),
-        "on_disconnect" in content,
-        "backoff" in content.lower(),
-        "retry" in content.lower() and "connect" in content.lower(),
+        index.mentions("reconnect", ignore_case=True, strings=False),
+        index.mentions("on_disconnect", strings=False),
+        index.mentions("backoff", ignore_case=True, strings=False),
+        index.mentions("retry", ignore_case=True, strings=False)
+        and index.mentions("connect", ignore_case=True, strings=False),
     ])
 
     if not has_reconnect:
@@ -95,19 +106,14 @@ def test_delay_constants():
         MIN_DELAY = 1    # 1 second initial delay
         MAX_DELAY = 120  # 2 minutes max delay
     """
-    script_path = REPO_ROOT / "mqtt_publisher.py"
-
-    if not script_path.exists():
-        pytest.skip("mqtt_publisher.py not found")
-
-    content = script_path.read_text()
+    index = script_index()
 
+    # MIN_DELAY = 1, MAX_DELAY = 120, INITIAL_DELAY = 1, RETRY_DELAY = 5...
     has_delay_constants = any([
-        re.search(r'MIN_DELAY\s*=\s*\d+', content),
-        re.search(r'MAX_DELAY\s*=\s*\d+', content),
-        re.search(r'INITIAL_DELAY\s*=\s*\d+', content),
-        re.search(r'DELAY\s*=\s*\d+', content),
-        "backoff" in content.lower() and ("delay" in content.lower() or "interval" in content.lower()),
+        index.numeric_constants("DELAY"),
+        index.mentions("backoff", ignore_case=True, strings=False)
+        and (index.mentions("delay", ignore_case=True, strings=False)
+             or index.mentions("interval", ignore_case=True, strings=False)),
     ])
 
     if not has_delay_constants:
@@ -141,19 +147,13 @@ def test_buffer_pattern():
             client.publish(feed, value)
         buffer.clear()
     """
-    script_path = REPO_ROOT / "mqtt_publisher.py"
+    index = script_index()
 
-    if not script_path.exists():
-        pytest.skip("mqtt_publisher.py not found")
-
-    content = script_path.read_text()
-
-    has_buffer = any([
-        "buffer" in content.lower(),
-        "queue" in content.lower(),
-        "pending" in content.lower(),
-        "cache" in content.lower(),
-    ])
+    # Variable, function or module names, not comments or messages
+    has_buffer = any(
+        index.mentions(word, ignore_case=True, strings=False)
+        for word in ("buffer", "queue", "pending", "cache")
+    )
 
     if not has_buffer:
         pytest.fail(
@@ -186,21 +186,19 @@ def test_non_blocking_loop():
     Suggestion: Use non-blocking loop:
         client.loop_background()
     """
-    script_path = REPO_ROOT / "mqtt_publisher.py"
-
-    if not script_path.exists():
-        pytest.skip("mqtt_publisher.py not found")
-
-    content = script_path.read_text()
+    index = script_index()
 
     has_nonblocking = any([
-        "loop_background" in content,
-        "loop_start" in content,
-        "threading" in content and "loop" in content.lower(),
+        index.has_call("loop_background"),
+        index.has_call("loop_start"),
+        index.imports_module("threading") and index.mentions("loop", ignore_case=True, strings=False),
     ])
 
     # Also check for blocking loop (which would be wrong)
-    has_blocking = "loop_blocking" in content or ".loop()" in content
+    has_blocking = index.has_call("loop_blocking") or any(
+        not call.args and not call.keywords and call.name != call.attr
+        for call in index.calls_to("loop")
+    )
 
     if has_blocking and not has_nonblocking:
         pytest.fail(
@@ -0,0 +1,148 @@
+"""
+Persistent outbox: publisher.outbox
+===================================
+
+These tests verify that the outbox:
+1. Replays unacknowledged samples after a restart
+2. Resumes from the acknowledged-offset cursor
+3. Rotates and compacts segments, and refuses a record no segment can hold
+4. Groups disk syncs instead of syncing every sample
+5. Discards a torn record left by a power loss
+6. Keeps sample timestamps across restarts
+"""
+
+import pytest
+
+from publisher.outbox import Outbox
+from publisher.buffered import BufferedPublisher
+
+
+SMALL_SEGMENT = 4096
+
+
+# ---------------------------------------------------------------------------
+# Test: Restart and cursor
+# ---------------------------------------------------------------------------
+def test_samples_survive_restart(tmp_path):
+    """Samples appended before close() are replayed by a new Outbox."""
+    with Outbox(tmp_path) as outbox:
+        for i in range(10):
+            outbox.append("temperature", float(i))
+
+    with Outbox(tmp_path) as outbox:
+        assert len(outbox) == 10
+        assert [v for _, _, v in outbox.replay()] == [float(i) for i in range(10)]
+
+
+def test_ack_cursor_persists(tmp_path):
+    """Acknowledged samples are not replayed again after a restart."""
+    with Outbox(tmp_path) as outbox:
+        for i in range(10):
+            outbox.append("humidity", float(i))
+        positions = [position for position, _, _ in outbox.replay(limit=4)]
+        outbox.ack(positions[-1])
+        assert len(outbox) == 6
+
+    with Outbox(tmp_path) as outbox:
+        assert outbox.peek() == ("humidity", 4.0)
+        assert len(outbox) == 6
+
+
+# ---------------------------------------------------------------------------
+# Test: Segments
+# ---------------------------------------------------------------------------
+def test_rotation_and_compaction(tmp_path):
+    """Writes span several segments; fully acked segments are deleted."""
+    with Outbox(tmp_path, segment_size=SMALL_SEGMENT) as outbox:
+        for i in range(1000):
+            outbox.append("temperature", float(i))
+        assert outbox.stats()["segments"] > 3
+
+        drained = [outbox.popleft()[1] for _ in range(999)]
+        assert drained == [float(i) for i in range(999)]
+        assert outbox.stats()["segments"] == 1
+        assert outbox.popleft() == ("temperature", 999.0)
+        assert len(outbox) == 0
+
+
+def test_oversized_record_is_refused(tmp_path):
+    """A record larger than a segment raises ValueError without rotating."""
+    with Outbox(tmp_path, segment_size=512) as outbox:
+        outbox.append("temperature", 21.0)
+        with pytest.raises(ValueError, match="does not fit"):
+            outbox.append("k" * 600, 1.0)
+        assert outbox.stats()["segments"] == 1
+        assert len(outbox) == 1
+        outbox.append("temperature", 22.0)
+        assert [v for _, _, v in outbox.replay()] == [21.0, 22.0]
+
+
+# ---------------------------------------------------------------------------
+# Test: Group commit
+# ---------------------------------------------------------------------------
+def test_group_commit(tmp_path):
+    """Disk syncs happen once per batch, not once per sample."""
+    now = [0.0]
+    outbox = Outbox(tmp_path, sync_every=50, sync_interval=60.0, clock=lambda: now[0])
+    for i in range(200):
+        outbox.append("temperature", float(i))
+    assert outbox.commits == 4
+
+    outbox.append("temperature", 0.0)
+    now[0] = 61.0
+    outbox.append("temperature", 0.0)
+    assert outbox.commits == 5
+    outbox.close()
+
+
+# ---------------------------------------------------------------------------
+# Test: Crash recovery
+# ---------------------------------------------------------------------------
+def test_torn_record_is_discarded(tmp_path):
+    """A partially written record at the tail is dropped on reopen."""
+    with Outbox(tmp_path) as outbox:
+        outbox.append("temperature", 1.0)
+        outbox.append("temperature", 2.0)
+        end = outbox.end
+
+    segment = next(tmp_path.glob("*.seg"))
+    with open(segment, "r+b") as f:
+        f.seek(end)
+        f.write(b"\x20\x00\x00\x00garbage")
+
+    with Outbox(tmp_path) as outbox:
+        assert [v for _, _, v in outbox.replay()] == [1.0, 2.0]
+        outbox.append("temperature", 3.0)
+        assert [v for _, _, v in outbox.replay()] == [1.0, 2.0, 3.0]
+
+
+def test_buffered_publisher_with_outbox(tmp_path):
+    """BufferedPublisher accepts an Outbox as its buffer."""
+    published = []
+
+    class Client:
+        def publish(self, feed, value):
+            published.append((feed, value))
+
+    client = Client()
+    publisher = BufferedPublisher(client, buffer=Outbox(tmp_path))
+    publisher.publish_or_buffer("temperature", 20.0)
+    client.on_connect(client)
+
+    assert published == [("temperature", 20.0)]
+    assert len(publisher.buffer) == 0
+    publisher.buffer.close()
+
+
+# ---------------------------------------------------------------------------
+# Test: Timestamps
+# ---------------------------------------------------------------------------
+def test_stamps_survive_restart(tmp_path):
+    """After a restart the stored wall time is used; the monotonic one is stale."""
+    with Outbox(tmp_path, clock=lambda: 50.0, wall_clock=lambda: 1000.0) as outbox:
+        outbox.append("temperature", 21.0, stamp=40.0)
+        assert outbox.head_stamped(1) == [(990.0, "temperature", 21.0)]
+
+    with Outbox(tmp_path, clock=lambda: 5.0, wall_clock=lambda: 2000.0) as outbox:
+        outbox.append("temperature", 22.0, stamp=4.0)
+        assert outbox.head_stamped(2) == [(990.0, "temperature", 21.0), (1999.0, "temperature", 22.0)]
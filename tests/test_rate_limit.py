@@ -0,0 +1,111 @@
+"""
+Rate limiting: publisher.rate_limit and BufferedPublisher scheduling
+====================================================================
+
+These tests verify that:
+1. The token bucket never exceeds the account quota in any minute
+2. Fresh readings are published before the stale backlog
+3. The backlog drains at the quota rate and the drain time is reported
+"""
+
+import math
+
+import pytest
+
+from publisher.rate_limit import TokenBucket, TIERS
+from publisher.buffered import BufferedPublisher
+from tests.harness import RecordingClient
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# ---------------------------------------------------------------------------
+# Test: Token bucket
+# ---------------------------------------------------------------------------
+@pytest.mark.parametrize("tier", sorted(TIERS))
+def test_tier_bucket_respects_quota(tier):
+    """Greedy publishing never exceeds the per-minute quota in a sliding minute."""
+    clock = ManualClock()
+    bucket = TokenBucket.for_tier(tier, clock=clock)
+    sent_at = []
+    for step in range(10 * 60 * 10):
+        clock.now = step / 10
+        while bucket.try_acquire():
+            sent_at.append(clock.now)
+
+    for i, start in enumerate(sent_at):
+        in_window = sum(1 for t in sent_at[i:] if t < start + 60)
+        assert in_window <= TIERS[tier]
+
+
+def test_wait_time_and_unknown_tier():
+    clock = ManualClock()
+    bucket = TokenBucket(rate=0.5, burst=1, clock=clock)
+    assert bucket.try_acquire()
+    assert bucket.wait_time() == pytest.approx(2.0)
+    clock.now = 2.0
+    assert bucket.try_acquire()
+
+    with pytest.raises(ValueError):
+        TokenBucket.for_tier("enterprise")
+
+
+# ---------------------------------------------------------------------------
+# Test: Scheduling in BufferedPublisher
+# ---------------------------------------------------------------------------
+def test_fresh_readings_before_backlog():
+    """Live samples take tokens before the backlog and never wait behind it."""
+    clock = ManualClock()
+    client = RecordingClient()
+    publisher = BufferedPublisher(client, capacity=100, bucket=TokenBucket(1.0, burst=2, clock=clock))
+
+    for i in range(10):
+        publisher.publish_or_buffer("temperature", float(i))
+    publisher.connected(client)
+    assert len(client.published) == 1  # one token left for live data
+
+    publisher.publish_or_buffer("humidity", 55.0)
+    assert client.published[-1] == ("humidity", 55.0)
+
+
+def test_backlog_drains_at_quota_rate():
+    """A backlog drains over time instead of in one burst, with a drain ETA."""
+    clock = ManualClock()
+    client = RecordingClient()
+    publisher = BufferedPublisher(client, capacity=100, bucket=TokenBucket(0.5, burst=3, clock=clock))
+
+    for i in range(20):
+        publisher.publish_or_buffer("temperature", float(i))
+    publisher.connected(client)
+    assert len(client.published) == 2
+    assert publisher.drain_eta() == pytest.approx((18 - 1) / 0.5)
+    assert publisher.drain_eta(live_rate=0.5) == math.inf
+
+    while publisher.backlog():
+        clock.now += publisher.next_flush_delay()
+        publisher.flush_buffer()
+
+    assert [v for _, v in client.published] == [float(i) for i in range(20)]
+    assert clock.now == pytest.approx(18 / 0.5, abs=1.0)
+
+
+def test_held_values_spill_to_backlog_on_disconnect():
+    """A value held for a token is buffered, not lost, if the link drops."""
+    clock = ManualClock()
+    client = RecordingClient()
+    publisher = BufferedPublisher(client, capacity=100, bucket=TokenBucket(0.5, burst=1, clock=clock))
+    publisher.connected(client)
+
+    publisher.publish_or_buffer("temperature", 1.0)
+    publisher.publish_or_buffer("temperature", 2.0)
+    publisher.publish_or_buffer("temperature", 3.0)
+    publisher.disconnected(client)
+
+    assert client.published == [("temperature", 1.0)]
+    assert list(publisher.buffer) == [("temperature", 2.0), ("temperature", 3.0)]
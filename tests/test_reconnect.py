@@ -0,0 +1,114 @@
+"""
+Reconnect supervisor: publisher.reconnect
+=========================================
+
+These tests verify that the supervisor:
+1. Never blocks the caller: attempts run from the scheduler
+2. Backs off exponentially with full jitter, capped at MAX_DELAY
+3. Resets the backoff once a connection is stable
+4. Exposes its state: attempts, next retry time, last error
+"""
+
+import random
+
+from publisher.reconnect import (
+    ReconnectSupervisor, full_jitter, CONNECTED, WAITING, MAX_DELAY,
+)
+from tests.harness import VirtualClock
+
+
+class FlakyConnect:
+    def __init__(self, failures, on_success):
+        self.failures = failures
+        self.on_success = on_success
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionRefusedError("broker down")
+        self.on_success()
+
+
+# ---------------------------------------------------------------------------
+# Test: Jitter
+# ---------------------------------------------------------------------------
+def test_full_jitter_bounds():
+    rng = random.Random(1)
+    for attempt in range(1, 20):
+        cap = min(MAX_DELAY, 2 ** (attempt - 1))
+        delays = [full_jitter(attempt, rng=rng) for _ in range(200)]
+        assert all(0 <= d <= cap for d in delays)
+        assert max(delays) > cap / 2
+
+
+# ---------------------------------------------------------------------------
+# Test: Supervisor
+# ---------------------------------------------------------------------------
+def test_start_does_not_block_and_retries_until_connected():
+    scheduler = VirtualClock()
+    supervisor = ReconnectSupervisor(lambda: None, scheduler=scheduler, rng=random.Random(2))
+    connect = FlakyConnect(5, supervisor.connection_made)
+    supervisor._connect = connect
+
+    supervisor.start()
+    assert connect.calls == 0  # nothing ran on the caller's stack
+
+    while supervisor.state != CONNECTED:
+        assert scheduler.run_next()
+
+    assert connect.calls == 6
+    assert supervisor.attempts == 6
+    assert isinstance(supervisor.last_error, ConnectionRefusedError)
+    assert scheduler.now <= sum(2 ** i for i in range(5))
+
+
+def test_status_while_waiting():
+    scheduler = VirtualClock()
+    supervisor = ReconnectSupervisor(FlakyConnect(100, None), scheduler=scheduler, rng=random.Random(3))
+    supervisor.start()
+    for _ in range(4):
+        scheduler.run_next()
+
+    status = supervisor.status()
+    assert status["state"] == WAITING
+    assert status["attempts"] == 4
+    assert 0 <= status["next_retry_in"] <= 8
+    assert "broker down" in status["last_error"]
+
+
+def test_backoff_resets_after_stable_connection():
+    scheduler = VirtualClock()
+    supervisor = ReconnectSupervisor(lambda: None, scheduler=scheduler, stable_after=60,
+                                     rng=random.Random(4))
+    supervisor._connect = FlakyConnect(3, supervisor.connection_made)
+    supervisor.start()
+    while supervisor.state != CONNECTED:
+        scheduler.run_next()
+    assert supervisor.attempts == 4
+
+    scheduler.run_next()  # stability timer
+    assert supervisor.attempts == 0
+
+    supervisor.connection_lost(ConnectionResetError("link down"))
+    assert supervisor.state == WAITING
+    assert supervisor.status()["next_retry_in"] <= 1
+
+
+def test_attach_chains_existing_callbacks():
+    events = []
+
+    class Client:
+        on_connect = staticmethod(lambda c: events.append("publisher connected"))
+        on_disconnect = staticmethod(lambda c: events.append("publisher disconnected"))
+
+    client = Client()
+    supervisor = ReconnectSupervisor(lambda: None, scheduler=VirtualClock())
+    supervisor.attach(client)
+
+    client.on_connect(client)
+    client.on_disconnect(client)
+
+    assert events == ["publisher connected", "publisher disconnected"]
+    assert supervisor.connects == 1
+    assert supervisor.state == WAITING
@@ -0,0 +1,131 @@
+"""
+REST bulk upload: publisher.rest and LocalRestServer
+====================================================
+
+These tests verify that the REST path:
+1. Posts batches with created_at over one keep-alive connection
+2. Surfaces 401 and 429 (with Retry-After) as RestError
+3. Drains the BufferedPublisher backlog while MQTT is down
+4. Takes over above rest_threshold and backs off when throttled
+5. Recovers from a timed-out request on the next flush
+"""
+
+import pytest
+
+from publisher.buffered import BufferedPublisher
+from publisher.encoding import iso8601
+from publisher.local_broker import LocalRestServer
+from publisher.rest import RestError, RestUploader
+from tests.harness import VirtualClock, FakeMQTTClient
+
+
+EPOCH = 1772366400.0
+
+
+@pytest.fixture
+def server():
+    server = LocalRestServer(accounts={"student": "key"})
+    server.start()
+    yield server
+    server.stop()
+
+
+def make_publisher(server, rest_threshold=100, batch_size=50):
+    clock = VirtualClock()
+    client = FakeMQTTClient(clock)
+    uploader = RestUploader("student", "key", base_url=f"http://127.0.0.1:{server.port}",
+                            batch_size=batch_size)
+    publisher = BufferedPublisher(client, rest=uploader, rest_threshold=rest_threshold,
+                                  clock=clock, wall_clock=lambda: EPOCH + clock.now)
+    return clock, client, publisher
+
+
+# ---------------------------------------------------------------------------
+# Test: Uploader
+# ---------------------------------------------------------------------------
+def test_batches_share_one_connection(server):
+    with RestUploader("student", "key", base_url=f"http://127.0.0.1:{server.port}",
+                      batch_size=10) as uploader:
+        samples = [(EPOCH + i, float(i)) for i in range(35)]
+        assert uploader.send_batch("temperature", samples) == 35
+
+    assert uploader.requests == 4
+    assert uploader.connections == 1
+    assert server.connections == 1
+    assert server.points[0] == ("temperature", 0.0, iso8601(EPOCH))
+    assert len(server.points) == 35
+
+
+def test_errors_are_reported(server):
+    uploader = RestUploader("student", "wrong", base_url=f"http://127.0.0.1:{server.port}")
+    with pytest.raises(RestError) as info:
+        uploader.send_batch("temperature", [(None, 1.0)])
+    assert info.value.status == 401
+
+    throttled = LocalRestServer(rate_limit=1)
+    url = throttled.start()
+    try:
+        uploader = RestUploader("student", "key", base_url=url)
+        uploader.send_batch("temperature", [(None, 1.0)])
+        with pytest.raises(RestError) as info:
+            uploader.send_batch("temperature", [(None, 2.0)])
+    finally:
+        throttled.stop()
+    assert info.value.status == 429
+    assert info.value.retry_after > 0
+
+
+# ---------------------------------------------------------------------------
+# Test: BufferedPublisher
+# ---------------------------------------------------------------------------
+def test_drains_over_rest_while_mqtt_is_down(server):
+    clock, client, publisher = make_publisher(server)
+    for i in range(120):
+        clock.advance(3)
+        publisher.publish_or_buffer("temperature" if i % 2 else "humidity", float(i))
+    assert publisher.next_flush_delay() == 0.0
+
+    assert publisher.flush_buffer() == 120
+    assert len(publisher.buffer) == 0
+    assert client.delivered == []
+    assert server.points[:2] == [("humidity", 0.0, iso8601(EPOCH + 3)),
+                                 ("humidity", 2.0, iso8601(EPOCH + 9))]
+
+
+def test_threshold_and_backoff(server):
+    clock, client, publisher = make_publisher(server, rest_threshold=100)
+    client.connect()
+    clock.run_until(clock.now)
+    client.disconnect()
+    for i in range(150):
+        publisher.publish_or_buffer("temperature", float(i))
+    client.connect()
+    server.accounts = {}          # every request now fails with 401
+    clock.run_until(clock.now)
+
+    # REST failed: MQTT drained the backlog instead, REST waits for its retry
+    assert isinstance(publisher.rest_error, RestError)
+    assert len(client.delivered) == 150
+    assert server.points == []
+
+
+def test_retries_after_a_timeout():
+    server = LocalRestServer(accounts={"student": "key"}, latency=0.5)
+    server.start()
+    try:
+        clock, client, publisher = make_publisher(server)
+        publisher.rest.timeout = 0.2
+        for i in range(10):
+            publisher.publish_or_buffer("temperature", float(i))
+
+        assert publisher.flush_buffer() == 0
+        assert isinstance(publisher.rest_error, TimeoutError)
+
+        # The half-done request is dropped with its connection, not reused
+        server.latency = 0.0
+        clock.advance(3600)
+        assert publisher.flush_buffer() == 10
+        assert len(publisher.buffer) == 0
+        assert publisher.rest.connections == 2
+    finally:
+        server.stop()
@@ -0,0 +1,124 @@
+"""
+Offline buffer: publisher.ring_buffer and publisher.buffered
+============================================================
+
+These tests verify that the offline buffer:
+1. Keeps a fixed memory footprint whatever the outage length
+2. Applies the selected overflow policy and counts dropped samples
+3. Is flushed in order when the client reconnects
+4. Stamps samples with the wall-clock time they were taken
+"""
+
+import pytest
+
+from publisher.ring_buffer import RingBuffer, DROP_OLDEST, DROP_NEWEST, DOWNSAMPLE
+from publisher.buffered import BufferedPublisher
+from tests.harness import RecordingClient
+
+
+# ---------------------------------------------------------------------------
+# Test: FIFO order and fixed footprint
+# ---------------------------------------------------------------------------
+def test_fifo_order_and_fixed_footprint():
+    """Samples come out oldest first and storage never grows."""
+    buffer = RingBuffer(4)
+    nbytes = buffer.nbytes
+
+    for i in range(3):
+        buffer.append("temperature", float(i))
+    buffer.append("humidity", 50.0)
+
+    assert list(buffer) == [
+        ("temperature", 0.0), ("temperature", 1.0), ("temperature", 2.0), ("humidity", 50.0),
+    ]
+    assert buffer.popleft() == ("temperature", 0.0)
+    assert len(buffer) == 3
+    assert buffer.nbytes == nbytes
+
+
+# ---------------------------------------------------------------------------
+# Test: Overflow policies
+# ---------------------------------------------------------------------------
+def test_drop_oldest_overwrites_head():
+    """drop-oldest keeps the most recent ``capacity`` samples."""
+    buffer = RingBuffer(3, DROP_OLDEST)
+    for i in range(5):
+        assert buffer.append("temperature", float(i))
+
+    assert [v for _, v in buffer] == [2.0, 3.0, 4.0]
+    assert buffer.dropped == 2
+    assert buffer.appended == 5
+
+
+def test_drop_newest_refuses_incoming():
+    """drop-newest keeps the start of the outage and refuses the rest."""
+    buffer = RingBuffer(3, DROP_NEWEST)
+    results = [buffer.append("temperature", float(i)) for i in range(5)]
+
+    assert results == [True, True, True, False, False]
+    assert [v for _, v in buffer] == [0.0, 1.0, 2.0]
+    assert buffer.dropped == 2
+
+
+def test_downsample_preserves_mean_per_feed():
+    """downsample merges same-feed pairs without losing the feed average."""
+    buffer = RingBuffer(8, DOWNSAMPLE)
+    for i in range(20):
+        buffer.append("temperature", float(i))
+        buffer.append("humidity", 100.0)
+
+    temps = [v for feed, v in buffer if feed == "temperature"]
+    assert len(buffer) <= 8
+    assert buffer.dropped == 0
+    assert buffer.downsampled > 0
+    assert temps == sorted(temps)
+    assert all(v == 100.0 for feed, v in buffer if feed == "humidity")
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        RingBuffer(0)
+    with pytest.raises(ValueError):
+        RingBuffer(10, "drop-everything")
+
+
+# ---------------------------------------------------------------------------
+# Test: BufferedPublisher
+# ---------------------------------------------------------------------------
+def test_buffered_publisher_flushes_on_connect():
+    """Samples buffered while disconnected are published in order on connect."""
+    client = RecordingClient()
+    publisher = BufferedPublisher(client, capacity=10)
+
+    publisher.publish_or_buffer("temperature", 21.0)
+    publisher.publish_or_buffer("humidity", 40.0)
+    assert client.published == []
+
+    client.on_connect(client)
+    publisher.publish_or_buffer("temperature", 22.0)
+
+    assert client.published == [("temperature", 21.0), ("humidity", 40.0), ("temperature", 22.0)]
+    assert len(publisher.buffer) == 0
+
+
+# ---------------------------------------------------------------------------
+# Test: Timestamps
+# ---------------------------------------------------------------------------
+def test_stamps_follow_a_wall_clock_step():
+    """A sample buffered before NTP sets the date gets the corrected time."""
+    now = {"mono": 100.0, "wall": 0.0}   # Pi booted without RTC: epoch 0
+    buffer = RingBuffer(8, clock=lambda: now["mono"], wall_clock=lambda: now["wall"])
+    buffer.append("temperature", 21.0)
+    buffer.append("temperature", 21.5, stamp=103.0)
+
+    now.update(mono=160.0, wall=1772366460.0)   # NTP sync
+    assert buffer.head_stamped(5) == [
+        (1772366400.0, "temperature", 21.0), (1772366403.0, "temperature", 21.5)]
+
+
+def test_downsample_merges_stamps():
+    now = {"t": 0.0}
+    buffer = RingBuffer(2, policy=DOWNSAMPLE, clock=lambda: now["t"], wall_clock=lambda: now["t"])
+    for stamp in (10.0, 20.0, 30.0):
+        buffer.append("temperature", stamp, stamp=stamp)
+    assert buffer.head_stamped(2) == [(15.0, "temperature", 15.0), (30.0, "temperature", 30.0)]
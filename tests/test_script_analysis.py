@@ -0,0 +1,118 @@
+"""
+Script analysis index: script_analysis
+======================================
+
+These tests verify that the ScriptIndex:
+1. Records imports, calls with their literal arguments, constants and callbacks
+2. Ignores comments (no false positive from "# TODO: buffer")
+3. Reports syntax errors instead of raising
+4. Parses each distinct script once, whatever its path, in a bounded cache
+"""
+
+import os
+
+import pytest
+
+import script_analysis
+from script_analysis import analyze, analyze_source
+
+
+SCRIPT = '''
+import os
+from Adafruit_IO import MQTTClient as Client
+
+MIN_DELAY = 1
+MAX_DELAY = 60
+USERNAME = os.environ["ADAFRUIT_IO_USERNAME"]
+
+
+def on_disconnect(client):
+    pass
+
+
+client = Client(USERNAME, os.environ["ADAFRUIT_IO_KEY"])
+client.on_disconnect = on_disconnect
+client.connect()
+client.loop_background()
+while True:
+    client.publish("temperature", 21.5)
+    client.publish(feed_id="humidity", value=40)
+'''
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    script_analysis.clear_cache()
+    yield
+    script_analysis.clear_cache()
+
+
+# ---------------------------------------------------------------------------
+# Test: Index
+# ---------------------------------------------------------------------------
+def test_imports_calls_and_constants():
+    index = analyze_source(SCRIPT)
+
+    assert index.syntax_error is None
+    assert index.imports_module("Adafruit_IO")
+    assert index.imports_module("adafruit_io", ignore_case=True)
+    assert index.imported_names["Client"] == "Adafruit_IO.MQTTClient"
+    assert index.has_call("loop_background")
+    assert not index.has_call("loop_blocking")
+
+    assert index.literal_args("publish") == ["temperature"]
+    assert index.literal_args("publish", keyword="feed_id") == ["temperature", "humidity"]
+    assert all(call.in_loop for call in index.calls_to("publish"))
+    assert not index.calls_to("connect")[0].in_loop
+
+    assert index.numeric_constants("DELAY") == {"MIN_DELAY": 1, "MAX_DELAY": 60}
+    assert index.callbacks == {"on_disconnect": "on_disconnect"}
+    assert index.instances == {"client": "Client"}
+    assert analyze_source("from Adafruit_IO import MQTTClient\n").instances == {}
+    assert "on_disconnect" in index.functions
+
+
+def test_comments_are_not_mentions():
+    index = analyze_source("# TODO: add a buffer and reconnect\nprint('Buffered')\n")
+
+    assert not index.mentions("buffer", ignore_case=True, strings=False)
+    assert index.mentions("buffer", ignore_case=True)
+    assert not index.mentions("reconnect", ignore_case=True)
+
+
+def test_hardcoded_keys_and_syntax_errors():
+    index = analyze_source('KEY = "aio_' + "x" * 24 + '"\nif True\n')
+
+    assert index.syntax_error[0] == 2
+    assert len(index.hardcoded_keys) == 1
+    assert not index.calls
+
+
+# ---------------------------------------------------------------------------
+# Test: Cache
+# ---------------------------------------------------------------------------
+def test_each_distinct_script_is_parsed_once(tmp_path):
+    first, second = tmp_path / "a.py", tmp_path / "b.py"
+    first.write_text(SCRIPT)
+    second.write_text(SCRIPT)
+
+    index = analyze(first)
+    assert analyze(first) is index
+    assert analyze(second) is index
+    assert script_analysis.cache_info() == {"hits": 2, "misses": 1, "size": 1}
+
+    first.write_text(SCRIPT + "client.disconnect()\n")
+    os.utime(first, ns=(0, 0))
+    assert analyze(first).has_call("disconnect")
+    assert analyze(tmp_path / "missing.py") is None
+
+
+def test_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(script_analysis, "CACHE_SIZE", 2)
+    for i in range(5):
+        path = tmp_path / f"student{i}.py"
+        path.write_text(SCRIPT + f"# student {i}\n")
+        analyze(path)
+
+    assert script_analysis.cache_info()["size"] == 2
+    assert len(script_analysis._by_stat) == 2
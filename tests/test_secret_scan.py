@@ -0,0 +1,146 @@
+"""
+Secret scanner: secret_scan
+===========================
+
+These tests verify that the scanner:
+1. Matches every rule in one pass and masks what it reports
+2. Finds keys in the files git tracks and in their staged version, but not
+   in untracked, ignored or binary files
+3. Finds keys removed from the tree but still in packed git history, and
+   not in objects no ref reaches; submodule entries are skipped
+4. Reads each blob once, across runs, through the on-disk cache
+"""
+
+import shutil
+import subprocess
+
+import pytest
+
+import secret_scan
+from secret_scan import blob_id, find_secrets, scan
+
+
+# Built at run time so this file does not trip the scanner itself
+AIO_KEY = "aio_" + "Ab12" * 7
+GITHUB_TOKEN = "ghp_" + "x" * 36
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    secret_scan.clear_cache()
+    yield
+    secret_scan.clear_cache()
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    if shutil.which("git") is None:
+        pytest.skip("git not installed")
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "student@example.com")
+    git(tmp_path, "config", "user.name", "Student")
+    (tmp_path / ".gitignore").write_text(".env\n")
+    (tmp_path / "mqtt_publisher.py").write_text("import os\nKEY = os.environ['ADAFRUIT_IO_KEY']\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-qm", "start")
+    return tmp_path
+
+
+# ---------------------------------------------------------------------------
+# Test: Matching
+# ---------------------------------------------------------------------------
+def test_all_rules_in_one_pass():
+    text = f"# header\nKEY = '{AIO_KEY}'\nTOKEN = {GITHUB_TOKEN!r}\n"
+    found = find_secrets(text)
+
+    assert [(rule, line) for rule, line, _ in found] == [("adafruit_io_key", 2), ("github_token", 3)]
+    assert found[0][2] == AIO_KEY[:8] + "..."
+    assert find_secrets("README: export ADAFRUIT_IO_KEY='aio_xxxxx'") == []
+    # Only string literals, as in the original milestone check
+    assert find_secrets(f"ADAFRUIT_IO_KEY={AIO_KEY}\n") == []
+    assert find_secrets(b"\0\x01" + AIO_KEY.encode()) == []
+
+
+def test_blob_id_matches_git(repo):
+    data = (repo / "mqtt_publisher.py").read_bytes()
+    result = subprocess.run(["git", "-C", str(repo), "hash-object", "mqtt_publisher.py"],
+                            capture_output=True, text=True, check=True)
+    assert blob_id(data) == result.stdout.strip()
+
+
+# ---------------------------------------------------------------------------
+# Test: Working tree and history
+# ---------------------------------------------------------------------------
+def test_tracked_and_staged_files(repo):
+    (repo / "config.py").write_text(f"\n\nKEY = '{AIO_KEY}'\n")
+    (repo / "photo.jpg").write_bytes(b"\xff\xd8\0\0'" + AIO_KEY.encode() + b"'")
+    git(repo, "add", "config.py", "photo.jpg")
+    (repo / "scratch.py").write_text(f"KEY = '{AIO_KEY}'\n")       # untracked
+    (repo / ".env").write_text(f"ADAFRUIT_IO_KEY='{AIO_KEY}'\n")   # ignored
+
+    findings = scan(repo)
+    assert [(f.path, f.line, f.where) for f in findings] == [("config.py", 3, "worktree")]
+
+    # Fixed on disk but not staged: the staged version would still be pushed
+    (repo / "config.py").write_text("import os\nKEY = os.environ['ADAFRUIT_IO_KEY']\n")
+    findings = scan(repo)
+    assert [(f.path, f.line, f.where) for f in findings] == [("config.py", 3, "index")]
+
+
+def test_key_removed_but_still_in_packed_history(repo):
+    (repo / "mqtt_publisher.py").write_text(f"KEY = '{AIO_KEY}'\n")
+    git(repo, "commit", "-qam", "oops")
+    (repo / "mqtt_publisher.py").write_text("import os\nKEY = os.environ['ADAFRUIT_IO_KEY']\n")
+    git(repo, "commit", "-qam", "remove key")
+    git(repo, "gc", "-q")
+    assert not list((repo / ".git" / "objects").glob("??/*"))     # all packed
+
+    findings = scan(repo)
+    assert [(f.path, f.rule, f.where) for f in findings] == \
+        [("mqtt_publisher.py", "adafruit_io_key", "history")]
+    assert scan(repo, history=False) == []
+
+
+def test_submodule_gitlink(repo):
+    (repo / "config.py").write_text(f"KEY = '{AIO_KEY}'\n")
+    git(repo, "add", "config.py")
+    # A submodule entry: its commit is not in this repository's objects
+    git(repo, "update-index", "--add", "--cacheinfo", "160000," + "1" * 40 + ",vendor/lib")
+    git(repo, "commit", "-qm", "add submodule")
+
+    findings = scan(repo)
+    assert [(f.path, f.where) for f in findings] == [("config.py", "worktree")]
+
+
+def test_unreachable_objects_are_ignored(repo):
+    (repo / "mqtt_publisher.py").write_text(f"KEY = '{AIO_KEY}'\n")
+    git(repo, "commit", "-qam", "oops")
+    git(repo, "reset", "-q", "--hard", "HEAD~1")
+
+    # Still in the object database, but no ref points at it: never pushed
+    assert scan(repo) == []
+
+
+# ---------------------------------------------------------------------------
+# Test: Cache
+# ---------------------------------------------------------------------------
+def test_blobs_are_read_once_across_runs(repo):
+    (repo / "notes.md").write_text(f"token: {GITHUB_TOKEN}\n")
+    git(repo, "add", "notes.md")
+    first = scan(repo)
+    matched = secret_scan.cache_info()["matched"]
+    assert matched >= 3
+
+    # A new process: only the on-disk cache is left
+    secret_scan.clear_cache()
+    assert scan(repo) == first
+    assert secret_scan.cache_info()["matched"] == 0
+
+    (repo / "notes.md").write_text("nothing here\n")
+    git(repo, "add", "notes.md")
+    assert scan(repo) == []
+    assert secret_scan.cache_info()["matched"] == 1
@@ -0,0 +1,221 @@
+"""
+Incremental validation: validate_pi
+===================================
+
+These tests verify that validate_pi.py:
+1. Records the script hash, adafruit-io version and outcome in its markers
+2. Skips the checks whose inputs did not change, re-runs the others
+3. Detects markers made stale by an edit of mqtt_publisher.py
+4. Runs the checks concurrently, output in order, durations reported
+5. Waits for on_connect instead of polling the connection, and reports a
+   refused connection without waiting for the timeout
+"""
+
+import sys
+import threading
+import types
+
+import pytest
+
+import script_analysis
+import validate_pi
+
+
+SCRIPT = '''
+import os
+from Adafruit_IO import MQTTClient
+
+client = MQTTClient(os.environ["ADAFRUIT_IO_USERNAME"], os.environ["ADAFRUIT_IO_KEY"])
+client.connect()
+client.publish("temperature", 21.5)
+'''
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A student repository with adafruit-io 2.7.0 "installed"."""
+    script = tmp_path / "mqtt_publisher.py"
+    script.write_text(SCRIPT)
+    monkeypatch.setattr(validate_pi, "MARKERS_DIR", tmp_path / ".test_markers")
+    monkeypatch.setattr(validate_pi, "SCRIPT_PATH", script)
+    monkeypatch.setattr(validate_pi, "adafruit_io_version", lambda: "2.7.0")
+    monkeypatch.delenv("ADAFRUIT_IO_USERNAME", raising=False)
+    monkeypatch.delenv("ADAFRUIT_IO_KEY", raising=False)
+
+    calls = []
+
+    def check_adafruit_io():
+        calls.append("adafruit_io")
+        validate_pi.create_marker("adafruit_io_verified", "adafruit-io available")
+        return True
+
+    def check_mqtt_script():
+        calls.append("script")
+        return original_script_check()
+
+    original_script_check = validate_pi.check_mqtt_script
+    monkeypatch.setattr(validate_pi, "check_adafruit_io", check_adafruit_io)
+    monkeypatch.setattr(validate_pi, "check_mqtt_script", check_mqtt_script)
+    monkeypatch.setattr(validate_pi, "_state", None)
+    return types.SimpleNamespace(script=script, calls=calls)
+
+
+def rerun():
+    """A new invocation: state is recomputed, the script re-read."""
+    validate_pi._state = None
+    return validate_pi.main([])
+
+
+# ---------------------------------------------------------------------------
+# Test: Markers
+# ---------------------------------------------------------------------------
+def test_markers_record_their_inputs(repo):
+    assert validate_pi.main([]) == 0
+
+    fields = validate_pi.read_marker("mqtt_script_verified")
+    assert fields["script_sha256"] == script_analysis.analyze(repo.script).sha256
+    assert fields["outcome"] == "passed"
+    assert validate_pi.read_marker("adafruit_io_verified")["adafruit_io"] == "2.7.0"
+    assert validate_pi.read_marker("all_tests_passed")["adafruit_io"] == "2.7.0"
+
+
+# ---------------------------------------------------------------------------
+# Test: Incremental runs
+# ---------------------------------------------------------------------------
+def test_unchanged_checks_are_skipped(repo):
+    # Checks run concurrently: their calls come in any order
+    assert validate_pi.main([]) == 0
+    assert rerun() == 0
+    assert sorted(repo.calls) == ["adafruit_io", "script"]
+
+    # An edit re-runs the script check only
+    repo.script.write_text(SCRIPT + "client.publish('humidity', 40)\n")
+    assert rerun() == 0
+    assert sorted(repo.calls) == ["adafruit_io", "script", "script"]
+
+    assert validate_pi.main(["--force"]) == 0
+    assert sorted(repo.calls[-2:]) == ["adafruit_io", "script"]
+
+
+def test_failed_check_leaves_no_marker(repo):
+    assert validate_pi.main([]) == 0
+    repo.script.write_text("if True\n")
+
+    assert rerun() == 1
+    assert validate_pi.read_marker("mqtt_script_verified") is None
+    assert validate_pi.read_marker("all_tests_passed") is None
+    assert validate_pi.read_marker("adafruit_io_verified") is not None
+
+
+def test_stale_markers_after_an_edit(repo, monkeypatch):
+    assert validate_pi.stale_markers() == []
+    validate_pi.main([])
+    assert validate_pi.stale_markers() == []
+
+    repo.script.write_text(SCRIPT + "# edited after validation\n")
+    validate_pi._state = None
+    assert validate_pi.stale_markers() == ["all_tests_passed", "mqtt_script_verified"]
+
+    monkeypatch.setattr(validate_pi, "adafruit_io_version", lambda: "2.8.0")
+    validate_pi._state = None
+    assert "adafruit_io_verified" in validate_pi.stale_markers()
+
+
+# ---------------------------------------------------------------------------
+# Test: Concurrent checks
+# ---------------------------------------------------------------------------
+class FakeMQTTError(Exception):
+    def __init__(self, rc):
+        super().__init__(f"Connection Refused: not authorised (rc={rc})")
+
+
+class FakeMQTTClient:
+    """
+    Adafruit_IO.MQTTClient whose broker answers ``rc`` after ``delay``
+    seconds, or once the ``barrier`` is reached if one is set. As in the real
+    client, a refused CONNACK raises in the network thread. ``loop()`` counts
+    polls.
+    """
+
+    delay = 0.05
+    barrier = None
+    rc = 0
+    polls = 0
+
+    def __init__(self, username, key):
+        self.on_connect = None
+        self.disconnected = False
+        # The paho client, whose on_connect is the Adafruit_IO handler
+        self._client = types.SimpleNamespace(on_connect=self._mqtt_connect)
+
+    def _mqtt_connect(self, client, userdata, flags, rc):
+        if rc != 0:
+            raise FakeMQTTError(rc)
+        self.on_connect(self)
+
+    def connect(self):
+        pass
+
+    def loop(self, timeout_sec=1.0):
+        FakeMQTTClient.polls += 1
+
+    def loop_background(self):
+        def accept():
+            if self.barrier is not None:
+                self.barrier.wait()
+            self._client.on_connect(self._client, None, {}, self.rc)
+
+        threading.Timer(self.delay, accept).start()
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+@pytest.fixture
+def broker(repo, monkeypatch):
+    monkeypatch.setitem(sys.modules, "Adafruit_IO",
+                        types.SimpleNamespace(MQTTClient=FakeMQTTClient, MQTTError=FakeMQTTError))
+    monkeypatch.setattr(FakeMQTTClient, "polls", 0)
+    monkeypatch.setenv("ADAFRUIT_IO_USERNAME", "student")
+    monkeypatch.setenv("ADAFRUIT_IO_KEY", "key")
+    return repo
+
+
+def test_connection_wait_is_event_driven(broker):
+    assert validate_pi.check_mqtt_connection()
+    # Woken by on_connect: the network loop is never polled from the check
+    assert FakeMQTTClient.polls == 0
+    assert validate_pi.read_marker("mqtt_connection_verified")["user"] == "student"
+
+
+def test_refused_connection_is_reported(broker, monkeypatch, capsys):
+    monkeypatch.setattr(FakeMQTTClient, "rc", 5)
+    monkeypatch.setattr(validate_pi, "CONNECT_TIMEOUT", 30)
+    assert validate_pi.check_mqtt_connection()     # optional check
+
+    out = capsys.readouterr().out
+    assert "Connection failed: Connection Refused: not authorised (rc=5)" in out
+    assert "timeout" not in out
+    assert validate_pi.read_marker("mqtt_connection_verified") is None
+
+
+def test_checks_overlap_the_connection(broker, monkeypatch, capsys):
+    # Neither side gets past the barrier until the other has reached it:
+    # run one after the other, the first would raise BrokenBarrierError
+    barrier = threading.Barrier(2, timeout=5)
+    monkeypatch.setattr(FakeMQTTClient, "barrier", barrier)
+
+    def import_check():
+        barrier.wait()
+        return True
+
+    monkeypatch.setattr(validate_pi, "check_adafruit_io", import_check)
+    assert validate_pi.main([]) == 0
+    assert not barrier.broken
+
+    out = capsys.readouterr().out
+    # Each check's output is printed whole, in order
+    assert out.index("SCRIPT VALIDATION") < out.index("Python syntax is valid") \
+        < out.index("MQTT CONNECTION TEST") < out.index("Connected to Adafruit IO!")
+    assert "Connection: OK (" in out
+    assert "Total: " in out
@@ -0,0 +1,76 @@
+"""
+Sampling windows: publisher.windows
+===================================
+
+These tests verify that the window sampler:
+1. Emits one reduced value per feed and window
+2. Computes mean, min, max and std for every feed at once
+3. Rejects outliers and failed reads before reducing
+4. Accepts blocks of readings spanning several windows
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from publisher.windows import WindowSampler, reduce_windows  # noqa: E402
+
+
+# ---------------------------------------------------------------------------
+# Test: Windows
+# ---------------------------------------------------------------------------
+def test_one_value_per_feed_and_window():
+    sampler = WindowSampler(("temperature", "humidity"), window=10)
+    results = [sampler.add((20.0 + i % 2, 40.0)) for i in range(25)]
+    completed = [r for r in results if r is not None]
+
+    assert len(completed) == 2
+    assert sampler.values(completed[0]) == [("temperature", 20.5), ("humidity", 40.0)]
+    assert len(sampler) == 5
+
+
+def test_statistics_are_per_feed():
+    result = reduce_windows([[1.0, 2.0, 3.0, 4.0], [10.0, 10.0, 10.0, 10.0]], outlier_z=None)
+    assert list(result["mean"]) == [2.5, 10.0]
+    assert list(result["min"]) == [1.0, 10.0]
+    assert list(result["max"]) == [4.0, 10.0]
+    assert result["std"][0] == pytest.approx(np.std([1, 2, 3, 4]))
+    assert list(result["count"]) == [4, 4]
+
+
+# ---------------------------------------------------------------------------
+# Test: Rejection
+# ---------------------------------------------------------------------------
+def test_outliers_and_failed_reads_are_rejected():
+    sampler = WindowSampler(("temperature", "humidity"), window=30)
+    rng = np.random.default_rng(3)
+    for i in range(30):
+        temperature = 21.0 + rng.uniform(-0.1, 0.1)
+        humidity = None if i % 10 == 0 else 45.0
+        if i == 7:
+            temperature = 85.0  # glitch
+        result = sampler.add((temperature, humidity))
+
+    assert sampler.rejected == 1
+    assert result["max"][0] < 22
+    assert list(result["count"]) == [29, 27]
+    assert result["mean"][1] == 45.0
+
+
+def test_quantized_spike_is_rejected():
+    """A DHT22 reads in 0.1 steps: the MAD is often 0 and must not hide spikes."""
+    result = reduce_windows([[21.0] * 20 + [21.1] * 5 + [30.0]])
+    assert result["rejected"] == 1
+    assert result["max"][0] == 21.1
+
+
+def test_block_spanning_windows():
+    sampler = WindowSampler(("a", "b", "c"), window=4, outlier_z=None)
+    block = np.arange(30, dtype=float).reshape(10, 3)
+    results = sampler.add_block(block)
+
+    assert len(results) == 2
+    assert list(results[0]["mean"]) == [4.5, 5.5, 6.5]
+    assert list(sampler.flush()["count"]) == [2, 2, 2]
+    with pytest.raises(ValueError):
+        sampler.add_block(np.zeros((3, 2)))
@@ -11,6 +11,7 @@ It creates marker files that GitHub Actions will verify.
 
 Usage:
     python3 validate_pi.py
+    python3 validate_pi.py --force     # re-run the checks that are up to date
 
 The script will:
 1. Verify adafruit-io is installed
@@ -18,16 +19,34 @@ The script will:
 3. Optionally test MQTT connection (if credentials available)
 4. Create marker files for GitHub Actions
 
+The checks run concurrently (the connection handshake overlaps the local
+checks); each one's output is printed in order, with its duration.
+
+Each marker records what it was verified against (hash of
+mqtt_publisher.py, adafruit-io version, ...). A check whose marker still
+matches is skipped, so re-validating after an edit only re-runs what the
+edit affects; stale_markers() lists the markers that no longer match.
+
 After running successfully, commit and push the .test_markers/ folder.
 
 NOTE: Do NOT commit your API keys! Use environment variables.
 """
 
+import argparse
+import hashlib
+import io
 import os
+import platform
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+from script_analysis import analyze
+from secret_scan import scan
+
 
 # ---------------------------------------------------------------------------
 # Terminal Colors
@@ -67,6 +86,47 @@ def header(msg):
 # Marker Management
 # ---------------------------------------------------------------------------
 MARKERS_DIR = Path(__file__).parent / ".test_markers"
+SCRIPT_PATH = Path(__file__).parent / "mqtt_publisher.py"
+
+# What each marker's check depends on: the marker is up to date while these
+# fields of current_state() are unchanged
+MARKER_DEPENDS = {
+    "adafruit_io_verified": ("python", "adafruit_io"),
+    "mqtt_script_verified": ("validator", "script_sha256", "secrets"),
+    "mqtt_connection_verified": ("adafruit_io", "user"),
+    "all_tests_passed": ("validator", "python", "adafruit_io", "script_sha256", "secrets"),
+}
+
+_state = None
+
+
+def current_state():
+    """What the checks are run against, computed once per run."""
+    global _state
+    if _state is None:
+        index = analyze(SCRIPT_PATH)
+        _state = {
+            "validator": hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16],
+            "python": platform.python_version(),
+            "adafruit_io": adafruit_io_version() or "none",
+            "script_sha256": index.sha256 if index is not None else "none",
+            # A key committed in any file invalidates the script check (cached per blob)
+            "secrets": str(len(scan(SCRIPT_PATH.parent))),
+            "user": os.environ.get('ADAFRUIT_IO_USERNAME') or "none",
+        }
+    return _state
+
+
+def adafruit_io_version():
+    """Installed adafruit-io version, read from its metadata (no import)."""
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        return None
+    try:
+        return version("adafruit-io")
+    except PackageNotFoundError:
+        return None
 
 
 def create_marker(name, content):
@@ -74,10 +134,49 @@ def create_marker(name, content):
     MARKERS_DIR.mkdir(exist_ok=True)
     marker_path = MARKERS_DIR / f"{name}.txt"
     timestamp = datetime.now().isoformat()
-    marker_path.write_text(f"Verified: {timestamp}\n{content}\n")
+    state = current_state()
+    fields = "".join(f"{key}: {state[key]}\n" for key in MARKER_DEPENDS.get(name, ()))
+    marker_path.write_text(f"Verified: {timestamp}\n{content}\n{fields}outcome: passed\n")
     info(f"Marker created: {marker_path.name}")
 
 
+def remove_marker(name):
+    """Drop a marker before its check is re-run, so a failure leaves none."""
+    marker_path = MARKERS_DIR / f"{name}.txt"
+    if marker_path.exists():
+        marker_path.unlink()
+
+
+def read_marker(name):
+    """The ``key: value`` lines of a marker, or None if it does not exist."""
+    marker_path = MARKERS_DIR / f"{name}.txt"
+    if not marker_path.exists():
+        return None
+    fields = {}
+    for line in marker_path.read_text().splitlines():
+        key, sep, value = line.partition(": ")
+        if sep:
+            fields[key] = value
+    return fields
+
+
+def is_current(name):
+    """True if the marker exists, passed, and its dependencies are unchanged."""
+    fields = read_marker(name)
+    if fields is None or fields.get("outcome") != "passed":
+        return False
+    state = current_state()
+    return all(fields.get(key) == state[key] for key in MARKER_DEPENDS.get(name, ()))
+
+
+def stale_markers():
+    """Names of the existing markers that no longer match the repository."""
+    if not MARKERS_DIR.exists():
+        return []
+    return sorted(path.stem for path in MARKERS_DIR.glob("*.txt")
+                  if path.stem in MARKER_DEPENDS and not is_current(path.stem))
+
+
 # ---------------------------------------------------------------------------
 # Test: Adafruit IO Installation
 # ---------------------------------------------------------------------------
@@ -104,9 +203,9 @@ def check_mqtt_script():
     """Verify mqtt_publisher.py script."""
     header("SCRIPT VALIDATION")
 
-    script_path = Path(__file__).parent / "mqtt_publisher.py"
+    index = analyze(SCRIPT_PATH)
 
-    if not script_path.exists():
+    if index is None:
         fail("mqtt_publisher.py not found")
         print("\n  Create your mqtt_publisher.py script in the same folder.")
         return False
@@ -114,34 +213,34 @@ def check_mqtt_script():
     success("mqtt_publisher.py exists")
 
     # Check syntax
-    try:
-        with open(script_path) as f:
-            compile(f.read(), script_path, 'exec')
-        success("Python syntax is valid")
-    except SyntaxError as e:
-        fail(f"Syntax error on line {e.lineno}: {e.msg}")
+    if index.syntax_error is not None:
+        lineno, msg = index.syntax_error
+        fail(f"Syntax error on line {lineno}: {msg}")
         return False
+    success("Python syntax is valid")
 
-    # Check required content
-    content = script_path.read_text()
+    # Check required content (same parse as the milestone tests)
     checks = [
-        ("Adafruit_IO", "Adafruit IO import"),
-        ("MQTTClient", "MQTTClient usage"),
-        (".publish(", "publish function"),
+        (index.imports_module("Adafruit_IO"), "Adafruit IO import"),
+        (index.has_call("MQTTClient"), "MQTTClient usage"),
+        (any(call.name != call.attr for call in index.calls_to("publish")), "publish function"),
     ]
 
     all_present = True
-    for pattern, desc in checks:
-        if pattern in content:
+    for found, desc in checks:
+        if found:
             success(f"Found: {desc}")
         else:
             fail(f"Missing: {desc}")
             all_present = False
 
-    # Security check - no hardcoded keys
-    import re
-    if re.search(r'["\']aio_[a-zA-Z0-9]{20,}["\']', content):
+    # Security check - no hardcoded keys, in any file or commit
+    findings = scan(SCRIPT_PATH.parent)
+    if findings:
         fail("SECURITY: Hardcoded API key detected!")
+        for finding in findings:
+            where = " (git history)" if finding.where == "history" else ""
+            print(f"    {finding.path}:{finding.line} {finding.rule} {finding.secret}{where}")
         print("\n  Never commit API keys to your repository!")
         print("  Use environment variables instead:")
         print("    export ADAFRUIT_IO_KEY='your_key_here'")
@@ -158,6 +257,9 @@ def check_mqtt_script():
 # ---------------------------------------------------------------------------
 # Test: MQTT Connection (Optional)
 # ---------------------------------------------------------------------------
+CONNECT_TIMEOUT = 5     # seconds
+
+
 def check_mqtt_connection():
     """Test MQTT connection if credentials are available."""
     header("MQTT CONNECTION TEST (Optional)")
@@ -173,37 +275,50 @@ def check_mqtt_connection():
         return True  # Optional, don't fail
 
     try:
-        from Adafruit_IO import MQTTClient
+        from Adafruit_IO import MQTTClient, MQTTError
 
         info(f"Testing connection for user: {username}")
 
-        connected = False
+        connected = threading.Event()
+        refused = []
 
         def on_connect(client):
-            nonlocal connected
-            connected = True
-            success("Connected to Adafruit IO!")
+            connected.set()
 
         client = MQTTClient(username, key)
         client.on_connect = on_connect
 
+        # Adafruit_IO raises MQTTError(rc) from paho's thread on a refused
+        # CONNACK, which would leave us waiting for the timeout: catch the
+        # return code first (_client is the private paho client)
+        adafruit_on_connect = client._client.on_connect
+
+        def on_connack(paho, userdata, flags, rc, *properties):
+            if rc != 0:
+                refused.append(MQTTError(rc))
+                connected.set()
+                return
+            adafruit_on_connect(paho, userdata, flags, rc, *properties)
+
+        client._client.on_connect = on_connack
+
         try:
             client.connect()
 
-            # Wait briefly for connection
-            import time
-            start = time.time()
-            while not connected and time.time() - start < 5:
-                client.loop()
-                time.sleep(0.1)
-
-            if connected:
-                create_marker("mqtt_connection_verified", f"User: {username}")
-                client.disconnect()
-                return True
-            else:
+            # The MQTT thread calls on_connect as soon as the broker answers
+            client.loop_background()
+            if not connected.wait(CONNECT_TIMEOUT):
                 warn("Connection timeout - check credentials")
+                client.disconnect()
                 return True  # Optional
+            if refused:
+                warn(f"Connection failed: {refused[0]}")
+                client.disconnect()
+                return True  # Optional
+            success("Connected to Adafruit IO!")
+            create_marker("mqtt_connection_verified", f"User: {username}")
+            client.disconnect()
+            return True
 
         except Exception as e:
             warn(f"Connection failed: {e}")
@@ -217,30 +332,99 @@ def check_mqtt_connection():
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
-def main():
-    print(f"\n{Colors.BOLD}Formatif F5 - Local MQTT Validation{Colors.END}")
-    print(f"{'='*60}\n")
+def run_check(title, marker, check, force=False):
+    """Run ``check``, unless its marker shows it passed on the same inputs."""
+    if not force and is_current(marker):
+        header(title)
+        info(f"Unchanged since {read_marker(marker)['Verified']} - skipped (--force to re-run)")
+        return True
+    remove_marker(marker)
+    return check()
+
+
+class _ThreadOutput:
+    """sys.stdout stand-in giving each check thread its own buffer."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffers = {}
+
+    def write(self, text):
+        buffer = self.buffers.get(threading.get_ident())
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def run_checks(checks, force=False):
+    """
+    Run ``checks`` (name, title, marker, function) concurrently. Each check's
+    output is printed in order once it is done. Returns
+    ``{name: (passed, seconds)}``.
+    """
+    current_state()     # computed once, before the threads
+    output = _ThreadOutput(sys.stdout)
+
+    def timed(title, marker, check):
+        thread = threading.get_ident()
+        output.buffers[thread] = buffer = io.StringIO()
+        started = time.perf_counter()
+        try:
+            passed = run_check(title, marker, check, force)
+        finally:
+            del output.buffers[thread]
+        return passed, time.perf_counter() - started, buffer.getvalue()
 
     results = {}
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(len(checks)) as pool:
+            futures = [(name, pool.submit(timed, title, marker, check))
+                       for name, title, marker, check in checks]
+            for name, future in futures:
+                passed, seconds, text = future.result()
+                output.stream.write(text)
+                output.stream.flush()
+                results[name] = (passed, seconds)
+    finally:
+        sys.stdout = output.stream
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Formatif F5 - Local MQTT Validation")
+    parser.add_argument("--force", action="store_true", help="re-run checks that are up to date")
+    args = parser.parse_args(argv)
+
+    print(f"\n{Colors.BOLD}Formatif F5 - Local MQTT Validation{Colors.END}")
+    print(f"{'='*60}\n")
 
-    # Run all checks
-    results["Adafruit IO"] = check_adafruit_io()
-    results["Script"] = check_mqtt_script()
-    results["Connection"] = check_mqtt_connection()
+    # Run all checks at once (skipping those whose inputs did not change)
+    started = time.perf_counter()
+    timings = run_checks([
+        ("Adafruit IO", "ADAFRUIT IO VERIFICATION", "adafruit_io_verified", check_adafruit_io),
+        ("Script", "SCRIPT VALIDATION", "mqtt_script_verified", check_mqtt_script),
+        ("Connection", "MQTT CONNECTION TEST (Optional)", "mqtt_connection_verified",
+         check_mqtt_connection),
+    ], force=args.force)
+    elapsed = time.perf_counter() - started
+    results = {name: passed for name, (passed, _) in timings.items()}
 
     # Summary
     header("FINAL RESULTS")
 
     all_required_passed = results["Adafruit IO"] and results["Script"]
 
-    for test, passed in results.items():
+    for test, (passed, seconds) in timings.items():
         if passed:
-            success(f"{test}: OK")
+            success(f"{test}: OK ({seconds:.2f}s)")
         elif test == "Connection":
-            warn(f"{test}: SKIPPED (optional)")
+            warn(f"{test}: SKIPPED (optional) ({seconds:.2f}s)")
         else:
-            fail(f"{test}: FAILED")
+            fail(f"{test}: FAILED ({seconds:.2f}s)")
 
+    info(f"Total: {elapsed:.2f}s (checks run concurrently)")
     print()
 
     if all_required_passed:
@@ -260,6 +444,7 @@ def main():
         print(f"{Colors.YELLOW}RAPPEL: Ne committez JAMAIS vos cles API!{Colors.END}")
         return 0
     else:
+        remove_marker("all_tests_passed")
         print(f"{Colors.RED}{Colors.BOLD}")
         print("=" * 60)
         print(" SOME TESTS FAILED - Fix issues and run again")